@@ -0,0 +1,244 @@
+"""
+Compact, versioned binary encoding of `AgentState`.
+
+States are written as one msgpack array, `[version, field..., extras]`, with the
+fields of `AgentState` in a fixed order, so no key names are stored. Within it:
+
+- agent and task names (`next_agent`, `current_task`, `task_plan`, ...) are small
+  integers from a fixed name table;
+- the messages agents append are interned: a known system message is one integer,
+  others are `[tag, ...]` arrays that keep the original type (`AgentMessage`,
+  plain dict or LangChain message), so a state decodes to what was encoded;
+- image references (`image://<sha256>`) become a 32-byte msgpack extension,
+  wherever they appear. Pixels never enter the encoding: a PIL image found in the
+  state is put in the image store and encoded as its reference.
+
+Keys outside the schema are kept in the trailing `extras` map; absent fields stay
+absent. Other values must be msgpack types, and tuples decode as lists.
+
+The name and message tables are part of the format: changing them, or the field
+order, needs a new `CODEC_VERSION` and a decoder for it, so data written by
+earlier versions stays readable.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+import ormsgpack
+from langchain_core.messages import BaseMessage, messages_from_dict
+from PIL import Image
+
+from ..imaging.store import REF_PREFIX, image_store
+from .state import AgentMessage, AgentState
+
+CODEC_VERSION = 1
+
+# Format tables for version 1: any change to them needs a new version
+NAMES = (
+    "image_generation",
+    "text_overlay",
+    "background_removal",
+    "fused_pipeline",
+    "branch_worker",
+    "merge",
+    "supervisor",
+    "__end__",
+)
+SYSTEM_MESSAGES = (
+    "Image Generation Agent: Generated new image",
+    "Text Overlay Agent: Added text to image",
+    "Background Removal Agent: Removed image background",
+) + tuple(f"Supervisor: Routing to {name}" for name in NAMES)
+
+_NAME_CODES = {name: code for code, name in enumerate(NAMES)}
+_MESSAGE_CODES = {content: code for code, content in enumerate(SYSTEM_MESSAGES)}
+
+# Extension types
+_EXT_MISSING = 0
+_EXT_IMAGE_REF = 1
+
+# Message tags
+_AGENT_MESSAGE = 0
+_DICT_MESSAGE = 1
+_LANGCHAIN_MESSAGE = 2
+
+_IMAGE_REF = re.compile(rf"{re.escape(REF_PREFIX)}([0-9a-f]{{64}})")
+_MISSING = ormsgpack.Ext(_EXT_MISSING, b"")
+
+
+class StateCodecError(ValueError):
+    """Raised for data that is not an encoded state of a known version."""
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+
+def _pack_value(value: Any) -> Any:
+    """A JSON-like value with image references (and images) as extensions."""
+    if isinstance(value, str):
+        match = _IMAGE_REF.fullmatch(value)
+        return ormsgpack.Ext(_EXT_IMAGE_REF, bytes.fromhex(match.group(1))) if match else value
+    if isinstance(value, dict):
+        return {key: _pack_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_pack_value(item) for item in value]
+    if isinstance(value, Image.Image):
+        # Out of band: the store keeps the pixels, the encoding only the reference
+        return _pack_value(image_store.put(value))
+    return value
+
+
+def _ext_hook(tag: int, data: bytes) -> Any:
+    if tag == _EXT_IMAGE_REF:
+        return REF_PREFIX + data.hex()
+    if tag == _EXT_MISSING:
+        return MISSING
+    raise StateCodecError(f"Unknown extension type {tag}")
+
+
+def _pack_name(name: Any) -> Any:
+    if isinstance(name, str):
+        return _NAME_CODES.get(name, name)
+    return _pack_value(name)
+
+
+def _unpack_name(value: Any) -> Any:
+    return NAMES[value] if isinstance(value, int) else value
+
+
+def _pack_names(names: Any) -> Any:
+    if isinstance(names, (list, tuple)):
+        return [_pack_name(name) for name in names]
+    return _pack_value(names)
+
+
+def _unpack_names(value: Any) -> Any:
+    return [_unpack_name(name) for name in value] if isinstance(value, list) else value
+
+
+def _pack_message(message: Any) -> Any:
+    if isinstance(message, AgentMessage):
+        if message.role == "system" and message.content in _MESSAGE_CODES:
+            return _MESSAGE_CODES[message.content]
+        return [_AGENT_MESSAGE, message.role, message.content]
+    if isinstance(message, BaseMessage):
+        # Only fields that differ from their defaults (ids, names, tool calls) are kept
+        extras = message.model_dump(exclude_defaults=True, exclude={"content", "type"})
+        return [_LANGCHAIN_MESSAGE, message.type, _pack_value(message.content), _pack_value(extras)]
+    if isinstance(message, dict):
+        return [_DICT_MESSAGE, _pack_value(message)]
+    raise TypeError(f"Cannot encode message of type {type(message).__name__}")
+
+
+def _unpack_message(value: Any) -> Any:
+    if isinstance(value, int):
+        return AgentMessage("system", SYSTEM_MESSAGES[value])
+    tag = value[0]
+    if tag == _AGENT_MESSAGE:
+        return AgentMessage(value[1], value[2])
+    if tag == _DICT_MESSAGE:
+        return value[1]
+    if tag == _LANGCHAIN_MESSAGE:
+        _, message_type, content, extras = value
+        return messages_from_dict([{"type": message_type, "data": {**extras, "content": content}}])[0]
+    raise StateCodecError(f"Unknown message tag {tag}")
+
+
+def _pack_messages(messages: Any) -> Any:
+    if isinstance(messages, (list, tuple)):
+        return [_pack_message(message) for message in messages]
+    return _pack_value(messages)
+
+
+def _unpack_messages(value: Any) -> Any:
+    return [_unpack_message(item) for item in value] if isinstance(value, list) else value
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+_Codec = Tuple[Callable[[Any], Any], Callable[[Any], Any]]
+_MESSAGES: _Codec = (_pack_messages, _unpack_messages)
+_NAME: _Codec = (_pack_name, _unpack_name)
+_NAME_LIST: _Codec = (_pack_names, _unpack_names)
+_VALUE: _Codec = (_pack_value, _identity)
+
+# Version 1 schema: AgentState fields in encoding order
+FIELDS: Tuple[Tuple[str, _Codec], ...] = (
+    ("messages", _MESSAGES),
+    ("next_agent", _NAME),
+    ("current_task", _NAME),
+    ("image_url", _VALUE),
+    ("processed_image_url", _VALUE),
+    ("task_plan", _NAME_LIST),
+    ("plan_step", _VALUE),
+    ("llm_calls_skipped", _VALUE),
+    ("failed_task", _NAME),
+    ("replan_count", _VALUE),
+    ("hop_count", _VALUE),
+    ("branch_results", _VALUE),
+    ("variant_urls", _VALUE),
+    ("supervisor_hops", _VALUE),
+    ("llm_calls", _VALUE),
+    ("llm_cost_usd", _VALUE),
+    ("completed_tasks", _NAME_LIST),
+    ("routing_history", _NAME_LIST),
+    ("termination", _VALUE),
+)
+_FIELD_NAMES = frozenset(name for name, _ in FIELDS)
+
+
+def encode_state(state: Mapping[str, Any]) -> bytes:
+    """Encode a full or partial `AgentState`."""
+    values: List[Any] = [CODEC_VERSION]
+    for name, (pack, _) in FIELDS:
+        values.append(pack(state[name]) if name in state else _MISSING)
+    extras = {key: _pack_value(value) for key, value in state.items() if key not in _FIELD_NAMES}
+    values.append(extras or None)
+    return ormsgpack.packb(values)
+
+
+def _decode_v1(values: List[Any]) -> Dict[str, Any]:
+    if len(values) != len(FIELDS) + 2:
+        raise StateCodecError(f"Expected {len(FIELDS) + 2} values for version 1, got {len(values)}")
+    state: Dict[str, Any] = {}
+    for (name, (_, unpack)), value in zip(FIELDS, values[1:]):
+        if value is not MISSING:
+            state[name] = unpack(value)
+    state.update(values[-1] or {})
+    return state
+
+
+_DECODERS: Dict[int, Callable[[List[Any]], Dict[str, Any]]] = {1: _decode_v1}
+
+
+def decode_state(data: bytes) -> AgentState:
+    """Decode bytes written by `encode_state` of this or an earlier codec version."""
+    try:
+        values = ormsgpack.unpackb(data, ext_hook=_ext_hook)
+    except ormsgpack.MsgpackDecodeError as e:
+        raise StateCodecError(f"Not an encoded state: {e}") from e
+    if not isinstance(values, list) or not values or not isinstance(values[0], int):
+        raise StateCodecError("Not an encoded state")
+    decoder = _DECODERS.get(values[0])
+    if decoder is None:
+        raise StateCodecError(f"Unsupported state codec version {values[0]} (this build reads {sorted(_DECODERS)})")
+    return decoder(values)
+
+
+def encode_messages(messages: List[Any]) -> bytes:
+    """Encode a message list on its own, as written to the `messages` channel."""
+    return ormsgpack.packb([CODEC_VERSION, _pack_messages(messages)])
+
+
+def decode_messages(data: bytes) -> List[Any]:
+    values = ormsgpack.unpackb(data, ext_hook=_ext_hook)
+    if values[0] not in _DECODERS:
+        raise StateCodecError(f"Unsupported state codec version {values[0]}")
+    return _unpack_messages(values[1])
@@ -1,9 +1,120 @@
-from typing import List, TypedDict, Optional
+from dataclasses import dataclass
+from typing import Annotated, Any, Dict, List, TypedDict, Optional, Union
 from langchain_core.messages import BaseMessage
 
+@dataclass
+class AgentMessage:
+    """Compact record for the system messages agents append to the history.
+
+    Supports `msg["content"]` and `msg.get("role")` so code written against the
+    original dict messages keeps working.
+    """
+
+    __slots__ = ("role", "content")
+
+    role: str
+    content: str
+
+    def __getitem__(self, key: str) -> str:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+def append_messages(existing: List[Any], new: Union[List[Any], Any]) -> List[Any]:
+    """Reducer for `messages`: agents return only their new messages.
+
+    Always returns a new list. Checkpoints are serialized in the background and
+    hold the channel's list by reference, so extending it in place would leak
+    later hops' messages into earlier checkpoints.
+    """
+    if isinstance(new, list):
+        return existing + new
+    return existing + [new]
+
+def merge_branch_results(existing: Optional[List[dict]], new: Optional[List[dict]]) -> List[dict]:
+    """Reducer for `branch_results`: parallel branches append, `None` clears.
+
+    Branches of one fan-out all write in the same step, so their results are
+    concatenated; the merge step clears the list once it has combined them.
+    """
+    if new is None:
+        return []
+    return (existing or []) + list(new)
+
+def latest_hop(existing: Optional[int], new: Optional[int]) -> int:
+    """Reducer for `hop_count`: parallel branches report the same hop in one step."""
+    return max(existing or 0, new or 0)
+
+class BranchTask(TypedDict):
+    """Input of one `branch_worker` execution, sent by the supervisor's fan-out."""
+    branch: int
+    # "variant" (an independent copy of the chain), "base" or "layer"
+    role: str
+    tasks: List[str]
+    source_url: Optional[str]
+    params: Dict[str, str]
+    # Plan position of the branch's first task
+    plan_index: int
+    hop_count: int
+
 class AgentState(TypedDict):
-    messages: List[BaseMessage]
+    messages: Annotated[List[Union[BaseMessage, AgentMessage, dict]], append_messages]
     next_agent: Optional[str]
     current_task: Optional[str]
     image_url: Optional[str]
-    processed_image_url: Optional[str] 
\ No newline at end of file
+    processed_image_url: Optional[str]
+    # Ordered task plan, when the supervisor knows it up front
+    task_plan: Optional[List[str]]
+    # Number of plan steps already dispatched
+    plan_step: int
+    # Supervisor hops that were routed without an LLM call
+    llm_calls_skipped: int
+    # Set by a task agent that could not complete its work
+    failed_task: Optional[str]
+    # Number of times the plan was rebuilt after a failure
+    replan_count: int
+    # Number of node executions so far in this run
+    hop_count: Annotated[int, latest_hop]
+    # Results of the parallel branches in flight, combined by the merge step
+    branch_results: Annotated[List[dict], merge_branch_results]
+    # Every image produced by a variants fan-out; processed_image_url is the first
+    variant_urls: Optional[List[str]]
+    # Supervisor decisions so far, counted against WORKFLOW_MAX_HOPS
+    supervisor_hops: int
+    # Supervisor LLM calls made and their estimated cost, counted against WORKFLOW_MAX_COST_USD
+    llm_calls: int
+    llm_cost_usd: float
+    # Tasks that finished successfully, in order
+    completed_tasks: List[str]
+    # Agents the supervisor routed to, in order, for loop detection
+    routing_history: List[str]
+    # Why the run was ended early by a safeguard, with its partial result; None otherwise
+    termination: Optional[Dict[str, Any]]
+
+def create_initial_state(request_message: Any) -> AgentState:
+    """Build the starting state for a workflow from the user's request message."""
+    return {
+        "messages": [request_message],
+        "next_agent": None,
+        "current_task": None,
+        "image_url": None,
+        "processed_image_url": None,
+        "task_plan": None,
+        "plan_step": 0,
+        "llm_calls_skipped": 0,
+        "failed_task": None,
+        "replan_count": 0,
+        "hop_count": 0,
+        "branch_results": [],
+        "variant_urls": None,
+        "supervisor_hops": 0,
+        "llm_calls": 0,
+        "llm_cost_usd": 0.0,
+        "completed_tasks": [],
+        "routing_history": [],
+        "termination": None,
+    }
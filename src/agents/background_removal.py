@@ -1,19 +1,41 @@
-from typing import Dict, Literal
+from typing import Dict, Literal, Optional
 from langgraph.types import Command
-from ..agent_types.state import AgentState
+from ..agent_types.state import AgentMessage, AgentState
+from ..execution.pools import WorkerPools
+from ..imaging.store import image_store
+from .common import (
+    ImageAgentRoutine, ImageTask, arun_image_agent, failure_command, get_input_image,
+    run_image_agent,
+)
 
-def create_background_removal_agent():
+def _background_removal(state: AgentState) -> ImageAgentRoutine:
+    print("\n✂️ Background Removal Agent: Processing request...")
+    
+    try:
+        source_ref = get_input_image(state)
+        if source_ref is None:
+            raise ValueError("no image to remove the background from")
+        image = yield ImageTask("background_removal", ["background_removal"], image_store.get(source_ref), {})
+        image_ref = image_store.put(image)
+    except Exception as e:
+        return failure_command("background_removal", "Background Removal Agent", e)
+    
+    return Command(
+        goto="supervisor",
+        update={
+            "processed_image_url": image_ref,
+            "messages": [AgentMessage("system", "Background Removal Agent: Removed image background")]
+        }
+    )
+
+def create_background_removal_agent(pools: Optional[WorkerPools] = None):
     def background_removal_agent(state: AgentState) -> Command[Literal["supervisor"]]:
-        print("\n✂️ Background Removal Agent: Processing request...")
-        
-        return Command(
-            goto="supervisor",
-            update={
-                "processed_image_url": "mock_bg_removed_image.jpg",
-                "messages": state["messages"] + [
-                    {"role": "system", "content": "Background Removal Agent: Removed image background"}
-                ]
-            }
-        )
+        return run_image_agent(_background_removal(state), pools)
+    
+    return background_removal_agent
+
+def create_async_background_removal_agent(pools: Optional[WorkerPools] = None):
+    async def background_removal_agent(state: AgentState) -> Command[Literal["supervisor"]]:
+        return await arun_image_agent(_background_removal(state), pools)
     
-    return background_removal_agent 
\ No newline at end of file
+    return background_removal_agent
\ No newline at end of file
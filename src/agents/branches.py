@@ -0,0 +1,194 @@
+"""
+Parallel branches: a supervisor fan-out, the worker that runs each branch and the
+merge step that combines them.
+
+Steps of a plan that do not depend on each other do not need to take turns. The
+supervisor sends them to `branch_worker` as separate `Send`s, LangGraph runs those
+in the same step, and `merge` combines their `branch_results` once all of them
+have finished, so the step costs as much as its longest branch:
+
+- variants: "3 variations of ..." runs the rest of the plan once per variant,
+  each with its own generation seed;
+- text layer: "remove background, then add text" renders the text on a
+  transparent layer while the background is removed, and composites it on.
+"""
+
+from typing import List, Literal, Optional, Tuple
+
+from langgraph.types import Command, Send
+
+from ..agent_types.state import AgentMessage, AgentState, BranchTask
+from ..config.settings import MAX_BRANCHES
+from ..execution.pools import WorkerPools
+from ..imaging.pipeline import PipelineError, can_fuse
+from ..imaging.store import image_store
+from ..imaging.text import apply_text_layer
+from .common import (
+    ImageAgentRoutine, ImageTask, arun_image_agent, extract_overlay_text, extract_subject,
+    extract_variant_count, get_input_image, get_user_request, run_image_agent,
+)
+from .fused_pipeline import TASK_MESSAGES
+
+# Worker pool that runs a branch made of a single task other than the agents' own
+_POOLS = {"text_layer": "text_overlay"}
+
+def plan_branches(state: AgentState, task_plan: List[str], plan_step: int, fused: bool) -> Optional[Tuple[List[Send], int]]:
+    """Fan-out for the next plan step, or None if it should run on its own.
+
+    Returns the branches to send and the plan position after them. Variants take
+    priority over fusion, since a fused pipeline produces a single image; a
+    fusable chain otherwise stays fused, as that already saves every hop.
+    """
+    remaining = task_plan[plan_step:]
+    if not remaining:
+        return None
+
+    request = get_user_request(state)
+    params = {"subject": extract_subject(request), "text": extract_overlay_text(request)}
+    hop_count = (state.get("hop_count") or 0) + 1
+    source_url = get_input_image(state)
+
+    def branch(index: int, role: str, tasks: List[str], branch_params) -> Send:
+        task: BranchTask = {
+            "branch": index,
+            "role": role,
+            "tasks": tasks,
+            "source_url": source_url,
+            "params": branch_params,
+            "plan_index": plan_step,
+            "hop_count": hop_count,
+        }
+        return Send("branch_worker", task)
+
+    variants = min(extract_variant_count(request), MAX_BRANCHES)
+    if variants > 1 and remaining[0] == "image_generation":
+        # Each variant runs the rest of the chain independently
+        sends = [
+            branch(index, "variant", remaining, {**params, "variant": str(index)})
+            for index in range(variants)
+        ]
+        return sends, len(task_plan)
+
+    if fused and can_fuse(remaining):
+        return None
+
+    if remaining[:2] == ["background_removal", "text_overlay"] and source_url is not None:
+        sends = [
+            branch(0, "base", ["background_removal"], params),
+            branch(1, "layer", ["text_layer"], params),
+        ]
+        return sends, plan_step + 2
+
+    return None
+
+def _branch_worker(task: BranchTask) -> ImageAgentRoutine:
+    tasks = task["tasks"]
+    print(f"\n🔀 Branch {task['branch']}: Running {' → '.join(tasks)}...")
+
+    result = {
+        "branch": task["branch"],
+        "role": task["role"],
+        "plan_index": task["plan_index"],
+        "completed": list(tasks),
+        "failed_task": None,
+        "image_url": None,
+    }
+    agent = _POOLS.get(tasks[0], tasks[0]) if len(tasks) == 1 else "fused_pipeline"
+    try:
+        source = image_store.get(task["source_url"]) if task["source_url"] is not None else None
+        image = yield ImageTask(agent, tasks, source, task["params"])
+    except PipelineError as e:
+        print(f"❌ Branch {task['branch']}: {e.task} failed: {e}")
+        image = e.image
+        result["completed"] = e.completed
+        result["failed_task"] = e.task
+    except Exception as e:
+        print(f"❌ Branch {task['branch']}: {e}")
+        image = None
+        result["completed"] = []
+        result["failed_task"] = tasks[0]
+
+    if image is not None:
+        result["image_url"] = image_store.put(image)
+    return Command(goto="merge", update={"branch_results": [result]})
+
+def _merge_variants(results: List[dict], update: dict) -> List[AgentMessage]:
+    finished = [result for result in results if result["failed_task"] is None]
+    # The history reads as the chain having run once, like the fused pipeline's
+    reference = finished[0] if finished else results[0]
+    messages = [AgentMessage("system", TASK_MESSAGES[task]) for task in reference["completed"]]
+    if finished:
+        update["variant_urls"] = [result["image_url"] for result in finished]
+        update["processed_image_url"] = finished[0]["image_url"]
+        messages.append(AgentMessage("system", f"Merge: Produced {len(finished)} of {len(results)} variants"))
+        return messages
+
+    # Every variant failed; report the first as if the chain had run alone
+    first = results[0]
+    update["failed_task"] = first["failed_task"]
+    update["plan_step"] = first["plan_index"] + len(first["completed"]) + 1
+    if first["image_url"] is not None:
+        update["processed_image_url"] = first["image_url"]
+    messages.append(AgentMessage("system", f"Merge: Failed at {first['failed_task']}"))
+    return messages
+
+def _merge_text_layer(results: List[dict], update: dict) -> List[AgentMessage]:
+    base = next(result for result in results if result["role"] == "base")
+    layer = next(result for result in results if result["role"] == "layer")
+
+    if base["failed_task"] is not None:
+        update["failed_task"] = "background_removal"
+        update["plan_step"] = base["plan_index"] + 1
+        return [AgentMessage("system", "Merge: Failed at background_removal")]
+
+    messages = [AgentMessage("system", TASK_MESSAGES["background_removal"])]
+    if layer["failed_task"] is not None:
+        # Keep the background removal and let the supervisor replan the text
+        update["processed_image_url"] = base["image_url"]
+        update["failed_task"] = "text_overlay"
+        update["plan_step"] = base["plan_index"] + 2
+        messages.append(AgentMessage("system", "Merge: Failed at text_overlay"))
+        return messages
+
+    image = apply_text_layer(image_store.get(base["image_url"]), image_store.get(layer["image_url"]))
+    update["processed_image_url"] = image_store.put(image)
+    messages.append(AgentMessage("system", TASK_MESSAGES["text_overlay"]))
+    return messages
+
+def _merge(state: AgentState) -> Command[Literal["supervisor"]]:
+    results = sorted(state.get("branch_results") or [], key=lambda result: result["branch"])
+    print(f"\n🧬 Merge: Combining {len(results)} branch result(s)...")
+
+    # Clear the results so the next fan-out starts empty
+    update = {"branch_results": None}
+    if not results:
+        update["messages"] = []
+    elif results[0]["role"] == "variant":
+        update["messages"] = _merge_variants(results, update)
+    else:
+        try:
+            update["messages"] = _merge_text_layer(results, update)
+        except Exception as e:
+            print(f"❌ Merge: {e}")
+            update["failed_task"] = "text_overlay"
+            update["plan_step"] = results[0]["plan_index"] + 2
+            update["messages"] = [AgentMessage("system", f"Merge: Failed - {e}")]
+    return Command(goto="supervisor", update=update)
+
+def create_branch_worker_agent(pools: Optional[WorkerPools] = None):
+    def branch_worker(task: BranchTask) -> Command[Literal["merge"]]:
+        return run_image_agent(_branch_worker(task), pools)
+
+    return branch_worker
+
+def create_async_branch_worker_agent(pools: Optional[WorkerPools] = None):
+    async def branch_worker(task: BranchTask) -> Command[Literal["merge"]]:
+        return await arun_image_agent(_branch_worker(task), pools)
+
+    return branch_worker
+
+def create_merge_agent():
+    def merge_agent(state: AgentState) -> Command[Literal["supervisor"]]:
+        return _merge(state)
+
+    return merge_agent
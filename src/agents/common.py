@@ -0,0 +1,206 @@
+"""
+Helpers shared by the task agents: pulling parameters out of the workflow state and
+the user's request, running image work, and reporting failures back to the supervisor.
+
+Task agents are written once as generators that yield an `ImageTask` when they need
+pixels processed and receive the resulting image back. `run_image_agent` and
+`arun_image_agent` drive them inline, on a worker thread, or in a `WorkerPools`
+pool, so sync and async agents share the same code.
+
+With the result cache enabled, a task's longest cached prefix is served from the
+cache and the remaining steps are dispatched as one request, fused as before;
+only that request's final output is cached.
+"""
+
+import asyncio
+import re
+from typing import Dict, Generator, List, Literal, NamedTuple, Optional
+
+from PIL import Image
+from langgraph.types import Command
+
+from ..agent_types.state import AgentMessage, AgentState
+from ..cache.results import ResultCache, get_result_cache
+from ..execution.pools import WorkerPools
+from ..imaging.pipeline import PipelineError, run_pipeline
+from ..imaging.store import content_hash
+
+_QUOTED = re.compile(r"""(?<!\w)['"‘“](.+?)['"’”](?!\w)""")
+_SUBJECT = re.compile(
+    r"\b(?:image|picture|photo|illustration|drawing|painting|scene|portrait|variants?|variations?|versions?)"
+    r"\s+of\s+(?:(?:an?\s+)?(?:image|picture|photo)\s+of\s+)?(.+?)"
+    r"(?=\s+(?:and|with|then)\b|[,.;]|$)",
+    re.IGNORECASE,
+)
+
+_VARIANTS = re.compile(
+    r"\b(\d+|two|three|four|five|six|seven|eight)\s+(?:different\s+)?(?:variants|variations|versions)\b",
+    re.IGNORECASE,
+)
+_NUMBER_WORDS = {"two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8}
+
+DEFAULT_OVERLAY_TEXT = "Hello"
+
+
+def get_user_request(state: AgentState) -> str:
+    first = state["messages"][0]
+    return first["content"] if isinstance(first, dict) else first.content
+
+
+def get_input_image(state: AgentState) -> Optional[str]:
+    """Reference of the image the next operation should work on."""
+    return state.get("processed_image_url") or state.get("image_url")
+
+
+def extract_overlay_text(request: str) -> str:
+    match = _QUOTED.search(request)
+    return match.group(1) if match else DEFAULT_OVERLAY_TEXT
+
+
+def extract_subject(request: str) -> str:
+    match = _SUBJECT.search(_QUOTED.sub("", request))
+    return match.group(1).strip() if match else request
+
+
+def extract_variant_count(request: str) -> int:
+    """Number of image variants asked for ("3 variations of ..."), 1 if none."""
+    match = _VARIANTS.search(_QUOTED.sub("", request))
+    if not match:
+        return 1
+    count = match.group(1).lower()
+    return int(count) if count.isdigit() else _NUMBER_WORDS[count]
+
+
+def failure_command(task: str, agent_label: str, error: Exception) -> Command[Literal["supervisor"]]:
+    """Hand control back to the supervisor with `failed_task` set so it can replan."""
+    print(f"❌ {agent_label}: {error}")
+    return Command(
+        goto="supervisor",
+        update={
+            "failed_task": task,
+            "messages": [AgentMessage("system", f"{agent_label}: Failed - {error}")]
+        }
+    )
+
+
+class ImageTask(NamedTuple):
+    agent: str
+    tasks: List[str]
+    image: Optional[Image.Image]
+    params: Dict[str, str]
+
+
+ImageAgentRoutine = Generator[ImageTask, Image.Image, Command]
+
+
+def _cached_steps(request: ImageTask, cache: ResultCache) -> Generator[ImageTask, Image.Image, Image.Image]:
+    """Replay the longest cached prefix of `request.tasks`, then yield the rest as one request.
+
+    A prefix may have been cached step by step or as one chain. Failures are
+    reported as a `PipelineError` covering the whole chain, exactly as
+    `run_pipeline` would.
+    """
+    image = request.image
+    input_hash = content_hash(image) if image is not None else None
+    completed: List[str] = []
+
+    while len(completed) < len(request.tasks):
+        remaining = request.tasks[len(completed):]
+        for end in range(len(remaining), 0, -1):
+            cached = cache.get(remaining[:end], request.params, input_hash)
+            if cached is not None:
+                image, input_hash = cached
+                completed.extend(remaining[:end])
+                break
+        else:
+            break
+
+    remaining = request.tasks[len(completed):]
+    if not remaining:
+        return image
+    try:
+        output = yield ImageTask(request.agent, remaining, image, request.params)
+    except PipelineError as e:
+        partial = e.image if e.completed else (image if completed else None)
+        raise PipelineError(e.task, completed + e.completed, partial, e.cause) from e.cause
+    cache.put(remaining, request.params, input_hash, output)
+    return output
+
+
+def _execute(request: ImageTask, pools: Optional[WorkerPools]) -> Image.Image:
+    if pools is None:
+        image, _ = run_pipeline(request.tasks, request.image, request.params)
+        return image
+    return pools.submit_image_task(*request).result()
+
+
+async def _aexecute(request: ImageTask, pools: Optional[WorkerPools]) -> Image.Image:
+    if pools is None:
+        # Keep the event loop free for other workflows while pixels are processed
+        image, _ = await asyncio.to_thread(run_pipeline, request.tasks, request.image, request.params)
+        return image
+    return await pools.run_image_task(*request)
+
+
+def _process(request: ImageTask, pools: Optional[WorkerPools]) -> Image.Image:
+    cache = get_result_cache()
+    if cache is None:
+        return _execute(request, pools)
+    steps = _cached_steps(request, cache)
+    try:
+        step = next(steps)
+        while True:
+            try:
+                image = _execute(step, pools)
+            except Exception as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(image)
+    except StopIteration as done:
+        return done.value
+
+
+async def _aprocess(request: ImageTask, pools: Optional[WorkerPools]) -> Image.Image:
+    cache = get_result_cache()
+    if cache is None:
+        return await _aexecute(request, pools)
+    steps = _cached_steps(request, cache)
+    try:
+        step = next(steps)
+        while True:
+            try:
+                image = await _aexecute(step, pools)
+            except Exception as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(image)
+    except StopIteration as done:
+        return done.value
+
+
+def run_image_agent(routine: ImageAgentRoutine, pools: Optional[WorkerPools] = None) -> Command:
+    try:
+        request = next(routine)
+        while True:
+            try:
+                image = _process(request, pools)
+            except Exception as e:
+                request = routine.throw(e)
+            else:
+                request = routine.send(image)
+    except StopIteration as done:
+        return done.value
+
+
+async def arun_image_agent(routine: ImageAgentRoutine, pools: Optional[WorkerPools] = None) -> Command:
+    try:
+        request = next(routine)
+        while True:
+            try:
+                image = await _aprocess(request, pools)
+            except Exception as e:
+                request = routine.throw(e)
+            else:
+                request = routine.send(image)
+    except StopIteration as done:
+        return done.value
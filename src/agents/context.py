@@ -0,0 +1,183 @@
+"""
+Prompt construction for the supervisor's LLM calls.
+
+Two prompt styles are available (`SUPERVISOR_PROMPT_STYLE`):
+
+- "verbose": the original prose system prompt and free-form request message;
+- "compact": a short, machine-oriented system prompt, with the run's state
+  summarised as a fixed-size checklist (one entry per task type, so its size does
+  not grow with the number of hops) instead of raw history.
+
+The system message is a single constant object in both styles, so every call
+starts with a byte-identical prefix and provider-side prompt caching can reuse it;
+everything that varies per call comes after it. Compact prompts are kept within
+`SUPERVISOR_CONTEXT_TOKENS` by truncating the middle of overly long requests.
+
+Token counts come from `src.llm.tokens`: the model's tiktoken encoding, or a
+character estimate when it cannot be loaded (offline, say).
+Each compact call reports its prompt size and the tokens saved against the
+verbose prompt for the same call.
+"""
+
+import functools
+from typing import Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from ..config.settings import SUPERVISOR_CONTEXT_TOKENS, SUPERVISOR_MODEL, SUPERVISOR_PROMPT_STYLE
+from ..instrumentation.metrics import metrics
+from ..llm.tokens import MESSAGE_OVERHEAD, get_tokenizer
+from .router import BACKGROUND_REMOVAL, IMAGE_GENERATION, TEXT_OVERLAY
+
+TASKS = (IMAGE_GENERATION, TEXT_OVERLAY, BACKGROUND_REMOVAL)
+
+# Never truncate a request below this many tokens, whatever the budget
+MIN_REQUEST_TOKENS = 16
+
+VERBOSE_SYSTEM_PROMPT = """You are a supervisor agent coordinating image processing tasks.
+    Based on the user's request and current state, determine which task should be executed next.
+    
+    Available tasks:
+    1. image_generation - When user needs to create a new image
+    2. text_overlay - When text needs to be added to an image
+    3. background_removal - When background needs to be removed from an image
+    
+    Rules:
+    - Process tasks in sequence until all requested operations are complete
+    - If the request mentions creating/generating an image, start with 'image_generation'
+    - After image generation, if text/caption is requested, use 'text_overlay'
+    - If the request mentions removing/deleting background, use 'background_removal'
+    - Only respond with '__end__' when all requested tasks are complete
+    - Consider both the original request and the current task state when deciding the next task
+    
+    Example sequences:
+    - "Generate an image and add text" → image_generation → text_overlay → __end__
+    - "Create an image, remove background, add text" → image_generation → background_removal → text_overlay → __end__
+    """
+
+COMPACT_SYSTEM_PROMPT = """Route an image request through tasks.
+Tasks: image_generation=create image; text_overlay=add text/caption; background_removal=remove background/make transparent.
+Rules: image_generation first if an image must be created; then requested tasks in request order; only tasks the request asks for.
+Checklist: [x]=done [!]=failed [ ]=not done.
+Next task: reply with one task name, or __end__ when every requested task is [x].
+Examples: "image + text" -> image_generation,text_overlay; "image, remove background, text" -> image_generation,background_removal,text_overlay"""
+
+# style -> (system prompt, version); bump a version whenever its prompt changes so
+# cached routing decisions are invalidated
+PROMPTS = {
+    "verbose": (VERBOSE_SYSTEM_PROMPT, "1"),
+    "compact": (COMPACT_SYSTEM_PROMPT, "compact-1"),
+}
+
+
+def checklist(completed: Optional[List[str]], failed_task: Optional[str]) -> str:
+    """Fixed-size task checklist: one entry per task type."""
+    done = set(completed or [])
+    entries = []
+    for task in TASKS:
+        mark = "x" if task in done else "!" if task == failed_task else " "
+        entries.append(f"[{mark}] {task}")
+    return " ".join(entries)
+
+
+def _verbose_plan(request: str, completed: Optional[List[str]], failed_task: Optional[str]) -> str:
+    details = ""
+    if completed is not None:
+        details = f"""
+            Completed Tasks: {", ".join(completed) or "none"}
+            Failed Task: {failed_task}
+            """
+    return f"""
+            Original Request: {request}
+            {details}
+            List every remaining task, in order, needed to complete the request.
+            """
+
+
+def _verbose_step(request: str, current_task: Optional[str]) -> str:
+    return f"""
+            Original Request: {request}
+            Current Task: {current_task}
+            
+            What should be the next task?
+            """
+
+
+class SupervisorContext:
+    """Builds the messages for the supervisor's plan and next-step calls."""
+
+    def __init__(
+        self,
+        style: str = SUPERVISOR_PROMPT_STYLE,
+        budget: int = SUPERVISOR_CONTEXT_TOKENS,
+        model: str = SUPERVISOR_MODEL,
+    ):
+        if style not in PROMPTS:
+            raise ValueError(f"Unknown supervisor prompt style '{style}'")
+        self.style = style
+        self.budget = budget
+        self.model = model
+        system_prompt, self.version = PROMPTS[style]
+        # One message object for every call: the prompt prefix never varies
+        self._system = SystemMessage(content=system_prompt)
+
+    @functools.cached_property
+    def _fixed_tokens(self) -> Dict[str, int]:
+        tokenizer = get_tokenizer(self.model)
+        return {
+            "system": tokenizer.count(self._system.content) + MESSAGE_OVERHEAD,
+            "verbose_system": tokenizer.count(VERBOSE_SYSTEM_PROMPT) + MESSAGE_OVERHEAD,
+        }
+
+    def plan_messages(
+        self, request: str, completed: Optional[List[str]] = None, failed_task: Optional[str] = None
+    ) -> List[BaseMessage]:
+        """Messages asking for every remaining task; `completed` is given on replans."""
+        verbose = _verbose_plan(request, completed, failed_task)
+        if self.style == "verbose":
+            return [self._system, HumanMessage(content=verbose)]
+
+        state = checklist(completed, failed_task)
+        render = lambda r: f"Original Request: {r}\nChecklist: {state}\nReply with every remaining task, in order."
+        return self._compact(request, render, verbose)
+
+    def step_messages(
+        self,
+        request: str,
+        current_task: Optional[str],
+        completed: Optional[List[str]] = None,
+        failed_task: Optional[str] = None,
+    ) -> List[BaseMessage]:
+        """Messages asking for the single next task."""
+        verbose = _verbose_step(request, current_task)
+        if self.style == "verbose":
+            return [self._system, HumanMessage(content=verbose)]
+
+        state = checklist(completed, failed_task)
+        render = lambda r: f"Original Request: {r}\nChecklist: {state}\nCurrent Task: {current_task}\nNext task?"
+        return self._compact(request, render, verbose)
+
+    def step_cache_context(
+        self, current_task: Optional[str], completed: Optional[List[str]], failed_task: Optional[str]
+    ) -> Dict:
+        """What a next-step answer depends on besides the request, for the routing cache key."""
+        if self.style == "verbose":
+            return {"current_task": current_task}
+        return {"current_task": current_task, "checklist": checklist(completed, failed_task)}
+
+    def _compact(self, request: str, render, verbose: str) -> List[BaseMessage]:
+        tokenizer = get_tokenizer(self.model)
+        fixed = self._fixed_tokens
+        content = render(request)
+        tokens = fixed["system"] + tokenizer.count(content) + MESSAGE_OVERHEAD
+        if tokens > self.budget:
+            # Only the request can grow; cut it to what the budget leaves over
+            available = self.budget - (fixed["system"] + tokenizer.count(render("")) + MESSAGE_OVERHEAD)
+            content = render(tokenizer.truncate(request, max(available, MIN_REQUEST_TOKENS)))
+            tokens = fixed["system"] + tokenizer.count(content) + MESSAGE_OVERHEAD
+
+        baseline = fixed["verbose_system"] + tokenizer.count(verbose) + MESSAGE_OVERHEAD
+        saved = baseline - tokens
+        metrics.record_prompt("supervisor", tokens, saved)
+        print(f"🪶 Supervisor prompt: {tokens} tokens ({saved} saved)")
+        return [self._system, HumanMessage(content=content)]
@@ -0,0 +1,88 @@
+from typing import Literal, Optional
+from langgraph.types import Command
+from ..agent_types.state import AgentMessage, AgentState
+from ..execution.pools import WorkerPools
+from ..imaging.pipeline import PipelineError
+from ..imaging.store import image_store
+from .common import (
+    ImageAgentRoutine, ImageTask, arun_image_agent, extract_overlay_text, extract_subject,
+    failure_command, get_input_image, get_user_request, run_image_agent,
+)
+
+# Same messages the individual agents record, so the execution history is unchanged
+TASK_MESSAGES = {
+    "image_generation": "Image Generation Agent: Generated new image",
+    "background_removal": "Background Removal Agent: Removed image background",
+    "text_overlay": "Text Overlay Agent: Added text to image",
+}
+
+def _fused_pipeline(state: AgentState) -> ImageAgentRoutine:
+    task_plan = state["task_plan"]
+    plan_step = state.get("plan_step") or 0
+    tasks = task_plan[plan_step:]
+    print(f"\n⚙️ Fused Pipeline: Running {' → '.join(tasks)} in one pass...")
+
+    request = get_user_request(state)
+    params = {"subject": extract_subject(request), "text": extract_overlay_text(request)}
+    source_ref = get_input_image(state)
+
+    update = {}
+    try:
+        source = image_store.get(source_ref) if source_ref is not None else None
+    except (KeyError, OSError) as e:
+        # The input image is gone (evicted, or its blob is missing); nothing ran
+        command = failure_command(tasks[0], "Fused Pipeline", e)
+        command.update["plan_step"] = plan_step + 1
+        return command
+
+    image, completed, generated = source, [], None
+    try:
+        if tasks[0] == "image_generation":
+            # Published on its own, as the generation agent does: image_url is the raw
+            # generated image and only the rest of the chain is fused
+            image = generated = yield ImageTask("fused_pipeline", tasks[:1], None, params)
+            update["image_url"] = image_store.put(image)
+            completed = tasks[:1]
+        if len(completed) < len(tasks):
+            image = yield ImageTask("fused_pipeline", tasks[len(completed):], image, params)
+        completed = tasks
+    except PipelineError as e:
+        print(f"❌ Fused Pipeline: {e.task} failed: {e}")
+        if e.completed:
+            image = e.image
+        completed = completed + e.completed
+        update["failed_task"] = e.task
+    except Exception as e:
+        # The pool itself failed (a worker died, shared memory ran out): fail at the
+        # first task that did not finish, as that task's own agent would
+        print(f"❌ Fused Pipeline: {e}")
+        update["failed_task"] = tasks[len(completed)]
+
+    if "failed_task" in update:
+        # Point plan_step just past the failed task, as if it had been dispatched alone
+        update["plan_step"] = plan_step + len(completed) + 1
+    else:
+        update["plan_step"] = len(task_plan)
+
+    messages = [AgentMessage("system", TASK_MESSAGES[task]) for task in completed]
+    if "failed_task" in update:
+        messages.append(AgentMessage("system", f"Fused Pipeline: Failed at {update['failed_task']}"))
+    update["messages"] = messages
+
+    # Publish only the final buffer
+    if completed and image is not None:
+        update["processed_image_url"] = update["image_url"] if image is generated else image_store.put(image)
+
+    return Command(goto="supervisor", update=update)
+
+def create_fused_pipeline_agent(pools: Optional[WorkerPools] = None):
+    def fused_pipeline_agent(state: AgentState) -> Command[Literal["supervisor"]]:
+        return run_image_agent(_fused_pipeline(state), pools)
+
+    return fused_pipeline_agent
+
+def create_async_fused_pipeline_agent(pools: Optional[WorkerPools] = None):
+    async def fused_pipeline_agent(state: AgentState) -> Command[Literal["supervisor"]]:
+        return await arun_image_agent(_fused_pipeline(state), pools)
+
+    return fused_pipeline_agent
@@ -0,0 +1,104 @@
+"""
+Safeguards for the supervisor's routing loop.
+
+Every supervisor visit is a hop. A run is ended early, keeping whatever image it
+has produced, when it:
+
+- exceeds its hop budget (`WORKFLOW_MAX_HOPS` supervisor decisions);
+- has spent its LLM cost budget (`WORKFLOW_MAX_COST_USD`);
+- routes the same cycle of agents `SUPERVISOR_LOOP_REPEATS` times in a row;
+- is sent back to a task that already completed by the step-by-step LLM router.
+
+The outcome is recorded in `AgentState.termination` so callers can tell a partial
+result from a finished one.
+"""
+
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from ..instrumentation.metrics import llm_cost
+from .fused_pipeline import TASK_MESSAGES
+
+_MESSAGE_TASKS = {message: task for task, message in TASK_MESSAGES.items()}
+
+# Longest routing cycle looked for, in hops
+_MAX_CYCLE = 3
+
+
+def _content(msg: Any) -> str:
+    content = msg["content"] if isinstance(msg, dict) else getattr(msg, "content", "")
+    return content if isinstance(content, str) else ""
+
+
+def tasks_completed_since_last_visit(messages: List[Any]) -> List[str]:
+    """Tasks whose success message was added after the supervisor's last routing message.
+
+    Only the tail of the history is read, so the cost per hop does not grow with
+    the run.
+    """
+    completed = []
+    for msg in reversed(messages):
+        content = _content(msg)
+        if content.startswith("Supervisor:"):
+            break
+        task = _MESSAGE_TASKS.get(content)
+        if task is not None:
+            completed.append(task)
+    completed.reverse()
+    return completed
+
+
+def find_cycle(history: List[str], repeats: int) -> Optional[List[str]]:
+    """The routing cycle `history` ends with, if it repeats at least `repeats` times."""
+    if repeats < 2:
+        return None
+    for period in range(1, _MAX_CYCLE + 1):
+        window = period * repeats
+        if len(history) < window:
+            break
+        cycle = history[-period:]
+        if all(history[-window + index] == cycle[index % period] for index in range(window)):
+            return cycle
+    return None
+
+
+def response_cost(response: Any) -> float:
+    """USD cost of one LLM response, from its token usage."""
+    # Structured output with include_raw returns {"raw": AIMessage, "parsed": ...}
+    message = response.get("raw") if isinstance(response, dict) else response
+    usage = getattr(message, "usage_metadata", None) or {}
+    return llm_cost(usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+
+
+def metered(routine: Generator[Any, Any, Any]) -> Generator[Any, Any, Tuple[Any, int, float]]:
+    """Forward a routing routine's LLM calls; returns (result, calls made, their cost)."""
+    calls, cost = 0, 0.0
+    try:
+        request = next(routine)
+        while True:
+            response = yield request
+            calls += 1
+            cost += response_cost(response)
+            request = routine.send(response)
+    except StopIteration as done:
+        return done.value, calls, cost
+
+
+def termination(
+    reason: str,
+    detail: str,
+    completed: List[str],
+    remaining: Optional[List[str]],
+    state: Dict,
+    hops: int,
+    cost: float,
+) -> Dict:
+    """Structured record of a run ended by a safeguard."""
+    return {
+        "reason": reason,
+        "detail": detail,
+        "completed_tasks": list(completed),
+        "remaining_tasks": list(remaining) if remaining is not None else None,
+        "processed_image_url": state.get("processed_image_url"),
+        "hops": hops,
+        "llm_cost_usd": round(cost, 6),
+    }
@@ -1,19 +1,40 @@
-from typing import Dict, Literal
+from typing import Dict, Literal, Optional
 from langgraph.types import Command
-from ..agent_types.state import AgentState
+from ..agent_types.state import AgentMessage, AgentState
+from ..execution.pools import WorkerPools
+from ..imaging.store import image_store
+from .common import (
+    ImageAgentRoutine, ImageTask, arun_image_agent, extract_subject, failure_command,
+    get_user_request, run_image_agent,
+)
 
-def create_image_generation_agent():
+def _image_generation(state: AgentState) -> ImageAgentRoutine:
+    print("\n🎨 Image Generation Agent: Processing request...")
+    
+    try:
+        params = {"subject": extract_subject(get_user_request(state))}
+        image = yield ImageTask("image_generation", ["image_generation"], None, params)
+        image_ref = image_store.put(image)
+    except Exception as e:
+        return failure_command("image_generation", "Image Generation Agent", e)
+    
+    return Command(
+        goto="supervisor",
+        update={
+            "image_url": image_ref,
+            "processed_image_url": image_ref,
+            "messages": [AgentMessage("system", "Image Generation Agent: Generated new image")]
+        }
+    )
+
+def create_image_generation_agent(pools: Optional[WorkerPools] = None):
     def image_generation_agent(state: AgentState) -> Command[Literal["supervisor"]]:
-        print("\n🎨 Image Generation Agent: Processing request...")
-        
-        return Command(
-            goto="supervisor",
-            update={
-                "processed_image_url": "mock_generated_image.jpg",
-                "messages": state["messages"] + [
-                    {"role": "system", "content": "Image Generation Agent: Generated new image"}
-                ]
-            }
-        )
+        return run_image_agent(_image_generation(state), pools)
+    
+    return image_generation_agent
+
+def create_async_image_generation_agent(pools: Optional[WorkerPools] = None):
+    async def image_generation_agent(state: AgentState) -> Command[Literal["supervisor"]]:
+        return await arun_image_agent(_image_generation(state), pools)
     
-    return image_generation_agent 
\ No newline at end of file
+    return image_generation_agent
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Deterministic fast-path router for the supervisor.
+
+Most requests follow a handful of boilerplate shapes ("generate X and add text Y",
+"create X and remove its background"). For those, a compiled keyword/regex parser
+can produce the whole task plan up front, letting the supervisor drive every hop
+without an LLM call. Requests the parser cannot classify confidently return None,
+and the supervisor falls back to the LLM.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Canonical task names understood by the graph
+IMAGE_GENERATION = "image_generation"
+TEXT_OVERLAY = "text_overlay"
+BACKGROUND_REMOVAL = "background_removal"
+
+# Quoted literals ('Beautiful Evening') are overlay text, never instructions
+_QUOTED = re.compile(r"""(?<!\w)(['"‘“])(.+?)(['"’”])(?!\w)""")
+
+_INTENT_PATTERNS = {
+    IMAGE_GENERATION: re.compile(
+        r"\b(generate|create|make|render|produce|design)\b[^.]{0,40}?"
+        r"\b(image|picture|photo|illustration|drawing|painting|artwork|art|scene|"
+        r"portrait|landscape|logo|poster|banner|icon|variant|variation)s?\b"
+        r"|\b(draw|paint|sketch|illustrate)\b",
+        re.IGNORECASE,
+    ),
+    BACKGROUND_REMOVAL: re.compile(
+        r"\b(remove|removing|removal|delete|erase|strip|cut\s+out|get\s+rid\s+of|drop|isolate)\b"
+        r"[^.]{0,30}?\b(background|bg)\b"
+        r"|\b(background|bg)\b[^.]{0,20}?\b(removal|removed|transparent)\b"
+        r"|\btransparent\s+(background|bg)\b",
+        re.IGNORECASE,
+    ),
+    TEXT_OVERLAY: re.compile(
+        r"\b(text|caption|captions|captioned|title|label|watermark|headline|slogan|words|quote)\b",
+        re.IGNORECASE,
+    ),
+}
+
+# Anything that changes the meaning of a matched keyword goes to the LLM
+_AMBIGUOUS = re.compile(
+    r"\b(not|no|don't|dont|do\s+not|without|except|instead|unless|or|maybe|either|neither|nor)\b"
+    r"|\b(resize|crop|rotate|blur|sharpen|upscale|filter|recolor|colorize|flip|compress|enhance)\b",
+    re.IGNORECASE,
+)
+
+# Mentions of a background that are not a removal request ("on a beach background")
+_BACKGROUND_MENTION = re.compile(r"\b(background|bg)\b", re.IGNORECASE)
+
+
+@dataclass
+class RouterStats:
+    """Process-wide counters describing how often the fast path was taken."""
+
+    planned: int = 0
+    fallbacks: int = 0
+    llm_calls_skipped: int = 0
+
+
+class KeywordRouter:
+    """Turns a request into an ordered task plan, or None when it is ambiguous."""
+
+    def __init__(self):
+        self.stats = RouterStats()
+
+    def plan(self, request: str) -> Optional[List[str]]:
+        plan = self.predict(request)
+        if plan is None:
+            self.stats.fallbacks += 1
+        else:
+            self.stats.planned += 1
+        return plan
+
+    def predict(self, request: str) -> Optional[List[str]]:
+        """The plan `plan` would return, without counting it in the stats."""
+        text = _QUOTED.sub(" QUOTED ", request)
+
+        if _AMBIGUOUS.search(text):
+            return None
+
+        positions = {}
+        for task, pattern in _INTENT_PATTERNS.items():
+            match = pattern.search(text)
+            if match:
+                positions[task] = match.start()
+
+        if not positions or (
+            BACKGROUND_REMOVAL not in positions and _BACKGROUND_MENTION.search(text)
+        ):
+            return None
+
+        # Generation always comes first; the rest follow the order they were mentioned
+        return sorted(
+            positions,
+            key=lambda task: (task != IMAGE_GENERATION, positions[task]),
+        )
+
+
+# Shared by every supervisor in the process so the stats aggregate across workflows
+default_router = KeywordRouter()
@@ -1,58 +1,230 @@
-from typing import Literal
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
+import json
+import time
+from typing import Any, Generator, List, Literal, Optional
+from pydantic import BaseModel, Field
 from langgraph.types import Command
 
 # Simplified imports without src
-from ..agent_types.state import AgentState
-from ..config.settings import SUPERVISOR_MODEL, SUPERVISOR_TEMPERATURE
+from ..agent_types.state import AgentMessage, AgentState
+from ..config.settings import (
+    SUPERVISOR_MODEL,
+    SUPERVISOR_TEMPERATURE,
+    SUPERVISOR_FAST_PATH,
+    SUPERVISOR_PLANNING,
+    SUPERVISOR_MAX_REPLANS,
+    FUSED_EXECUTION,
+    PARALLEL_BRANCHES,
+    SUPERVISOR_LOOP_REPEATS,
+    WORKFLOW_MAX_COST_USD,
+    WORKFLOW_MAX_HOPS,
+)
+from ..cache.routing import get_routing_cache, routing_key
+from ..execution.scheduler import llm_slot
+from ..imaging.pipeline import can_fuse
+from ..instrumentation.metrics import metrics
+from ..llm.gateway import ChatModel, get_gateway
+from .branches import plan_branches
+from .context import SupervisorContext
+from .guards import find_cycle, metered, tasks_completed_since_last_visit, termination
+from .router import KeywordRouter, default_router
 
-def create_supervisor_agent():
-    llm = ChatOpenAI(
-        model=SUPERVISOR_MODEL,
-        temperature=SUPERVISOR_TEMPERATURE
+class TaskPlan(BaseModel):
+    """Ordered list of tasks that fulfils the user's request."""
+
+    tasks: List[Literal["image_generation", "text_overlay", "background_removal"]] = Field(
+        description="Tasks to execute, in order. Empty if nothing needs to be done."
     )
+
+def _create_supervisor_logic(router: Optional[KeywordRouter], planning: Optional[bool], fused: Optional[bool], parallel: Optional[bool]):
+    # The routing logic is written once as a generator that yields (model, messages)
+    # whenever it needs the LLM; the sync and async agents only differ in how they call
+    # the shared gateway
+    if router is None and SUPERVISOR_FAST_PATH:
+        router = default_router
+    if planning is None:
+        planning = SUPERVISOR_PLANNING
+    if fused is None:
+        fused = FUSED_EXECUTION
+    if parallel is None:
+        parallel = PARALLEL_BRANCHES
+    max_hops, max_cost, loop_repeats = WORKFLOW_MAX_HOPS, WORKFLOW_MAX_COST_USD, SUPERVISOR_LOOP_REPEATS
+
+    llm = ChatModel(SUPERVISOR_MODEL, SUPERVISOR_TEMPERATURE)
+    planner_llm = ChatModel(SUPERVISOR_MODEL, SUPERVISOR_TEMPERATURE, schema=TaskPlan)
     
-    system_prompt = """You are a supervisor agent coordinating image processing tasks.
-    Based on the user's request and current state, determine which task should be executed next.
-    
-    Available tasks:
-    1. image_generation - When user needs to create a new image
-    2. text_overlay - When text needs to be added to an image
-    3. background_removal - When background needs to be removed from an image
-    
-    Rules:
-    - Process tasks in sequence until all requested operations are complete
-    - If the request mentions creating/generating an image, start with 'image_generation'
-    - After image generation, if text/caption is requested, use 'text_overlay'
-    - If the request mentions removing/deleting background, use 'background_removal'
-    - Only respond with '__end__' when all requested tasks are complete
-    - Consider both the original request and the current task state when deciding the next task
+    cache = get_routing_cache()
+    context = SupervisorContext()
     
-    Example sequences:
-    - "Generate an image and add text" → image_generation → text_overlay → __end__
-    - "Create an image, remove background, add text" → image_generation → background_removal → text_overlay → __end__
-    """
-
-    def supervisor_agent(state: AgentState) -> Command[Literal["image_generation", "text_overlay", "background_removal", "__end__"]]:
+    def supervise(state: AgentState) -> Generator[Any, Any, Command]:
         print("\n🎯 Supervisor Agent: Deciding next task...")
         
         # Get the initial request if this is the first run
         messages = state["messages"]
         user_request = messages[0]["content"] if isinstance(messages[0], dict) else messages[0].content
         
+        task_plan = state.get("task_plan")
+        plan_step = state.get("plan_step") or 0
+        llm_calls_skipped = state.get("llm_calls_skipped") or 0
+        replan_count = state.get("replan_count") or 0
+        failed_task = state.get("failed_task")
+        called_llm = False
+        
+        # Per-run budgets and the record of what has been done so far
+        hops = (state.get("supervisor_hops") or 0) + 1
+        llm_calls = state.get("llm_calls") or 0
+        llm_cost_usd = state.get("llm_cost_usd") or 0.0
+        completed_tasks = (state.get("completed_tasks") or []) + tasks_completed_since_last_visit(messages)
+        routing_history = state.get("routing_history") or []
+        
+        def command(goto, next_agent: str, routed: str, **update) -> Command:
+            return Command(
+                goto=goto,
+                update={
+                    "next_agent": next_agent,
+                    "current_task": next_agent,
+                    "task_plan": task_plan,
+                    "plan_step": plan_step,
+                    "llm_calls_skipped": llm_calls_skipped,
+                    "replan_count": replan_count,
+                    "failed_task": None,
+                    "supervisor_hops": hops,
+                    "llm_calls": llm_calls,
+                    "llm_cost_usd": llm_cost_usd,
+                    "completed_tasks": completed_tasks,
+                    "routing_history": routing_history + [next_agent],
+                    "messages": [AgentMessage("system", routed)],
+                    **update,
+                }
+            )
+        
+        def stop(reason: str, detail: str) -> Command:
+            # End the run now; the image produced so far is the partial result
+            print(f"🛑 Supervisor: Stopping early - {detail}")
+            remaining = task_plan[plan_step:] if task_plan is not None else None
+            record = termination(reason, detail, completed_tasks, remaining, state, hops, llm_cost_usd)
+            return command("__end__", "__end__", f"Supervisor: Stopped early - {detail}", termination=record)
+        
+        plan_finished = task_plan is not None and plan_step >= len(task_plan) and failed_task is None
+        if not plan_finished:
+            # Only runs with work left are cut short; a finished plan still ends normally
+            if hops > max_hops:
+                return stop("hop_budget", f"Hop budget of {max_hops} exhausted")
+            if max_cost and llm_cost_usd >= max_cost:
+                return stop("cost_budget", f"LLM cost budget of ${max_cost:.2f} exhausted")
+        
+        # Try the deterministic fast path once, on the first visit
+        if task_plan is None and router is not None and state["current_task"] is None:
+            task_plan = router.plan(user_request)
+            if task_plan is not None:
+                print(f"⚡ Fast-path plan: {' → '.join(task_plan)}")
+        
+        # Plan-once mode: a single LLM call produces the whole sequence
+        if task_plan is None and planning and state["current_task"] is None:
+            task_plan, calls, cost = yield from metered(request_plan(user_request))
+            llm_calls, llm_cost_usd = llm_calls + calls, llm_cost_usd + cost
+            called_llm = True
+            if task_plan is not None:
+                print(f"📋 Planned: {' → '.join(task_plan) or '(nothing to do)'}")
+        
+        # A failed agent invalidates the rest of the plan
+        if failed_task is not None and task_plan is not None:
+            completed = task_plan[:max(plan_step - 1, 0)]
+            print(f"⚠️ {failed_task} reported a failure, discarding the current plan")
+            task_plan = None
+            if planning and replan_count < SUPERVISOR_MAX_REPLANS:
+                task_plan, calls, cost = yield from metered(request_plan(user_request, completed, failed_task))
+                llm_calls, llm_cost_usd = llm_calls + calls, llm_cost_usd + cost
+                plan_step = 0
+                replan_count += 1
+                called_llm = True
+                if task_plan is not None:
+                    print(f"📋 Replanned: {' → '.join(task_plan) or '(nothing to do)'}")
+            elif planning:
+                # Out of replans, stop with whatever was produced so far
+                task_plan = completed
+                plan_step = len(completed)
+        
+        goto = None
+        if task_plan is not None:
+            # Drive the hop from the plan
+            fan_out = plan_branches(state, task_plan, plan_step, fused) if parallel else None
+            if fan_out is not None:
+                # Independent steps run as parallel branches; the merge step reports back
+                goto, plan_step = fan_out
+                next_agent = "branch_worker"
+            elif fused and can_fuse(task_plan[plan_step:]):
+                # The fused pipeline runs the rest of the chain and advances plan_step itself
+                next_agent = "fused_pipeline"
+            elif plan_step < len(task_plan):
+                next_agent = task_plan[plan_step]
+                plan_step += 1
+            else:
+                next_agent = "__end__"
+            if not called_llm:
+                llm_calls_skipped += 1
+                if router is not None:
+                    router.stats.llm_calls_skipped += 1
+        else:
+            next_agent, calls, cost = yield from metered(
+                decide_next_agent(user_request, state["current_task"], completed_tasks, failed_task)
+            )
+            llm_calls, llm_cost_usd = llm_calls + calls, llm_cost_usd + cost
+            if next_agent in completed_tasks:
+                # Step-by-step routing sent the run back to finished work
+                return stop("completed_task", f"{next_agent} already completed")
+        
+        if next_agent != "__end__":
+            cycle = find_cycle(routing_history + [next_agent], loop_repeats)
+            if cycle is not None:
+                return stop("loop", f"Routing cycle {' → '.join(cycle)} repeated {loop_repeats} times")
+        
+        if goto is None:
+            goto = next_agent
+            routed = f"Supervisor: Routing to {next_agent}"
+            print(f"➡️ Next agent: {next_agent}")
+        else:
+            routed = f"Supervisor: Routing to {len(goto)} parallel branches"
+            print(f"➡️ Next agents: {len(goto)} parallel branches")
+        
+        return command(goto, next_agent, routed)
+    
+    def request_plan(user_request: str, completed: Optional[List[str]] = None, failed_task: Optional[str] = None) -> Generator[Any, Any, Optional[List[str]]]:
+        """The planner's task list, or None if its answer could not be parsed (route step by step)."""
+        if cache is not None:
+            key = routing_key(
+                "plan", user_request, context.version, SUPERVISOR_MODEL,
+                completed=completed, failed_task=failed_task,
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        
+        # Ask for the full ordered sequence in one structured call
+        messages = context.plan_messages(user_request, completed, failed_task)
+        
+        response = yield planner_llm, messages
+        if response.get("parsing_error") is not None or response.get("parsed") is None:
+            print(f"⚠️ Supervisor: Could not parse the plan ({response.get('parsing_error')}), routing step by step")
+            return None
+        tasks = list(response["parsed"].tasks)
+        if cache is not None:
+            cache.set(key, json.dumps(tasks))
+        return tasks
+    
+    def decide_next_agent(user_request: str, current_task: Optional[str], completed: List[str], failed_task: Optional[str]) -> Generator[Any, Any, str]:
+        if cache is not None:
+            key = routing_key(
+                "step", user_request, context.version, SUPERVISOR_MODEL,
+                **context.step_cache_context(current_task, completed, failed_task),
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        
         # Use LLM to decide next task
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"""
-            Original Request: {user_request}
-            Current Task: {state["current_task"]}
-            
-            What should be the next task?
-            """)
-        ]
-        
-        response = llm.invoke(messages).content
+        messages = context.step_messages(user_request, current_task, completed, failed_task)
+        
+        response = (yield llm, messages).content
         
         # Parse the response to get the next task
         if "image_generation" in response.lower():
@@ -64,17 +236,61 @@ def create_supervisor_agent():
         else:
             next_agent = "__end__"
         
-        print(f"➡️ Next agent: {next_agent}")
-        
-        return Command(
-            goto=next_agent,
-            update={
-                "next_agent": next_agent,
-                "current_task": next_agent,
-                "messages": state["messages"] + [
-                    {"role": "system", "content": f"Supervisor: Routing to {next_agent}"}
-                ]
-            }
-        )
+        if cache is not None:
+            cache.set(key, next_agent)
+        return next_agent
+    
+    return supervise
+
+def _record_llm_call(started: float, response: Any) -> None:
+    # Structured output with include_raw returns {"raw": AIMessage, "parsed": ...}
+    message = response.get("raw") if isinstance(response, dict) else response
+    usage = getattr(message, "usage_metadata", None) or {}
+    metrics.record_llm_call(
+        "supervisor",
+        time.perf_counter() - started,
+        usage.get("input_tokens", 0),
+        usage.get("output_tokens", 0),
+    )
+
+def _run_sync(routing):
+    try:
+        model, messages = next(routing)
+        while True:
+            started = time.perf_counter()
+            response = get_gateway().invoke(model, messages)
+            _record_llm_call(started, response)
+            model, messages = routing.send(response)
+    except StopIteration as done:
+        return done.value
+
+async def _run_async(routing, state: AgentState):
+    try:
+        model, messages = next(routing)
+        while True:
+            # With scheduling enabled, each call waits for an LLM slot in priority order
+            async with llm_slot(state):
+                started = time.perf_counter()
+                response = await get_gateway().ainvoke(model, messages)
+            _record_llm_call(started, response)
+            model, messages = routing.send(response)
+    except StopIteration as done:
+        return done.value
+
+SupervisorCommand = Command[Literal["image_generation", "text_overlay", "background_removal", "fused_pipeline", "branch_worker", "__end__"]]
+
+def create_supervisor_agent(router: Optional[KeywordRouter] = None, planning: Optional[bool] = None, fused: Optional[bool] = None, parallel: Optional[bool] = None):
+    supervise = _create_supervisor_logic(router, planning, fused, parallel)
+    
+    def supervisor_agent(state: AgentState) -> SupervisorCommand:
+        return _run_sync(supervise(state))
+    
+    return supervisor_agent
+
+def create_async_supervisor_agent(router: Optional[KeywordRouter] = None, planning: Optional[bool] = None, fused: Optional[bool] = None, parallel: Optional[bool] = None):
+    supervise = _create_supervisor_logic(router, planning, fused, parallel)
+    
+    async def supervisor_agent(state: AgentState) -> SupervisorCommand:
+        return await _run_async(supervise(state), state)
     
     return supervisor_agent 
\ No newline at end of file
@@ -1,19 +1,42 @@
-from typing import Dict, Literal
+from typing import Dict, Literal, Optional
 from langgraph.types import Command
-from ..agent_types.state import AgentState
+from ..agent_types.state import AgentMessage, AgentState
+from ..execution.pools import WorkerPools
+from ..imaging.store import image_store
+from .common import (
+    ImageAgentRoutine, ImageTask, arun_image_agent, extract_overlay_text, failure_command,
+    get_input_image, get_user_request, run_image_agent,
+)
 
-def create_text_overlay_agent():
+def _text_overlay(state: AgentState) -> ImageAgentRoutine:
+    print("\n✍️ Text Overlay Agent: Processing request...")
+    
+    try:
+        source_ref = get_input_image(state)
+        if source_ref is None:
+            raise ValueError("no image to add text to")
+        params = {"text": extract_overlay_text(get_user_request(state))}
+        image = yield ImageTask("text_overlay", ["text_overlay"], image_store.get(source_ref), params)
+        image_ref = image_store.put(image)
+    except Exception as e:
+        return failure_command("text_overlay", "Text Overlay Agent", e)
+    
+    return Command(
+        goto="supervisor",
+        update={
+            "processed_image_url": image_ref,
+            "messages": [AgentMessage("system", "Text Overlay Agent: Added text to image")]
+        }
+    )
+
+def create_text_overlay_agent(pools: Optional[WorkerPools] = None):
     def text_overlay_agent(state: AgentState) -> Command[Literal["supervisor"]]:
-        print("\n✍️ Text Overlay Agent: Processing request...")
-        
-        return Command(
-            goto="supervisor",
-            update={
-                "processed_image_url": "mock_text_overlay_image.jpg",
-                "messages": state["messages"] + [
-                    {"role": "system", "content": "Text Overlay Agent: Added text to image"}
-                ]
-            }
-        )
+        return run_image_agent(_text_overlay(state), pools)
+    
+    return text_overlay_agent
+
+def create_async_text_overlay_agent(pools: Optional[WorkerPools] = None):
+    async def text_overlay_agent(state: AgentState) -> Command[Literal["supervisor"]]:
+        return await arun_image_agent(_text_overlay(state), pools)
     
-    return text_overlay_agent 
\ No newline at end of file
+    return text_overlay_agent
\ No newline at end of file
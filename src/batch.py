@@ -0,0 +1,208 @@
+"""
+Concurrent batch processing of workflow requests.
+
+Reads requests from a file (one per line, or JSON objects with a "request" key) or
+from stdin, runs them through a single compiled async graph with a bounded number
+in flight, and writes one JSON line per finished request.
+
+With checkpointing enabled every request runs under a thread id (taken from the
+line's "thread_id" key, or generated) that is reported in its result. Feeding a
+timed-out or failed record back in resumes it from its last completed node.
+
+Usage:
+    python -m src.batch requests.txt --concurrency 16 --timeout 60 --output results.jsonl
+    cat requests.txt | python -m src.batch -
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage
+
+from .agent_types.state import create_initial_state
+from .execution.checkpoints import get_checkpointer, resume_input, thread_config
+from .config.settings import (
+    BATCH_CONCURRENCY,
+    BATCH_TIMEOUT_SECONDS,
+    INSTRUMENTATION_ENABLED,
+    METRICS_PROMETHEUS_PATH,
+)
+from .instrumentation.metrics import metrics
+from .llm.gateway import get_gateway
+
+
+# (request, thread id to continue or None)
+BatchItem = Tuple[Optional[str], Optional[str]]
+
+
+def _parse_request(line: str) -> Optional[BatchItem]:
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        item = json.loads(line)
+        return item.get("request"), item.get("thread_id")
+    return line, None
+
+
+async def _aiter_requests(source: Union[Iterable[str], AsyncIterator[str]]) -> AsyncIterator[BatchItem]:
+    if hasattr(source, "__aiter__"):
+        async for line in source:
+            request = _parse_request(line)
+            if request is not None:
+                yield request
+        return
+
+    # Blocking reads (stdin, pipes) happen off the event loop so in-flight work keeps running
+    lines = iter(source)
+    while True:
+        line = await asyncio.to_thread(next, lines, None)
+        if line is None:
+            return
+        request = _parse_request(line)
+        if request is not None:
+            yield request
+
+
+async def _aenumerate(source: AsyncIterator[str]):
+    index = 0
+    async for item in source:
+        yield index, item
+        index += 1
+
+
+def _message_content(msg) -> str:
+    return msg.content if hasattr(msg, "content") else msg.get("content", str(msg))
+
+
+async def _run_one(workflow, index: int, item: BatchItem, timeout: float) -> Dict:
+    started = time.perf_counter()
+    request, thread_id = item
+    record = {"index": index, "request": request}
+    config = None
+    if get_checkpointer() is not None:
+        thread_id = thread_id or str(uuid.uuid4())
+        config = thread_config(thread_id)
+        record["thread_id"] = thread_id
+
+    async def consume():
+        initial_state = create_initial_state(HumanMessage(content=request)) if request is not None else None
+        graph_input = initial_state
+        if config is not None:
+            snapshot = await workflow.aget_state(config)
+            graph_input, finished = resume_input(snapshot, initial_state)
+            if finished:
+                return snapshot.values
+        final_state = None
+        async for state in workflow.astream(graph_input, config, stream_mode="values"):
+            final_state = state
+        return final_state
+
+    try:
+        final_state = await asyncio.wait_for(consume(), timeout=timeout)
+        record.update(
+            status="ok",
+            processed_image_url=final_state.get("processed_image_url"),
+            hop_count=final_state.get("hop_count"),
+            termination=final_state.get("termination"),
+            messages=[_message_content(msg) for msg in final_state["messages"]],
+        )
+    except asyncio.TimeoutError:
+        record.update(status="timeout", error=f"Timed out after {timeout:.0f}s")
+    except Exception as e:
+        record.update(status="error", error=str(e))
+
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+async def run_batch(
+    requests: Union[Iterable[str], AsyncIterator[str]],
+    workflow=None,
+    concurrency: int = BATCH_CONCURRENCY,
+    timeout: float = BATCH_TIMEOUT_SECONDS,
+) -> AsyncIterator[Dict]:
+    """Run requests through the async graph, yielding results as they finish.
+
+    At most `concurrency` requests are in flight; new requests are only read from
+    `requests` when a slot frees up, so arbitrarily long streams use bounded memory.
+    """
+    if workflow is None:
+        from .main import get_workflow
+        workflow = get_workflow(use_async=True)
+
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    async for index, item in _aenumerate(_aiter_requests(requests)):
+        await slots.acquire()
+        task = asyncio.create_task(_run_one(workflow, index, item, timeout))
+        task.add_done_callback(lambda _: slots.release())
+        pending.add(task)
+
+        finished = {task for task in pending if task.done()}
+        pending -= finished
+        for task in finished:
+            yield task.result()
+
+    while pending:
+        finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in finished:
+            yield task.result()
+
+
+async def _main(args) -> None:
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    counts = {"ok": 0, "timeout": 0, "error": 0}
+    started = time.perf_counter()
+
+    try:
+        async for record in run_batch(source, concurrency=args.concurrency, timeout=args.timeout):
+            counts[record["status"]] += 1
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+        await get_gateway().aclose()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(
+        f"\n📦 Batch complete: {total} request(s) in {elapsed:.2f}s "
+        f"({counts['ok']} ok, {counts['timeout']} timed out, {counts['error']} failed)",
+        file=sys.stderr,
+    )
+    if INSTRUMENTATION_ENABLED:
+        print(f"\n⏱️ Node metrics:\n{metrics.format_table()}", file=sys.stderr)
+        if METRICS_PROMETHEUS_PATH:
+            metrics.write_prometheus(METRICS_PROMETHEUS_PATH)
+
+
+def main():
+    load_dotenv()
+    if not os.getenv("OPENAI_API_KEY"):
+        print("Error: OPENAI_API_KEY not found in environment variables")
+        return
+
+    parser = argparse.ArgumentParser(description="Run a batch of requests through the workflow")
+    parser.add_argument("input", help="File with one request per line, or '-' for stdin")
+    parser.add_argument("-c", "--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("-t", "--timeout", type=float, default=BATCH_TIMEOUT_SECONDS,
+                        help="Per-request timeout in seconds")
+    parser.add_argument("-o", "--output", help="Write JSON lines here instead of stdout")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: vectorized background removal throughput versus a naive Pillow loop.
+
+The NumPy engine runs on a full 4K image (and larger sizes if requested) with
+different tile sizes and thread counts. The naive per-pixel getpixel/putpixel loop
+is far too slow for 4K, so it runs on a small image and its rate is reported in
+the same megapixels/second unit. Peak traced memory is reported relative to the
+size of one RGBA copy of the image.
+
+Usage:
+    python -m src.benchmarks.background_removal [--sizes 3840x2160,7680x4320] [--repeat 3]
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ..imaging.background import estimate_background, remove_background
+from ..imaging.generation import generate_image
+
+NAIVE_SIZE = (480, 270)
+
+
+def naive_remove_background(image: Image.Image, threshold: int = 60) -> Image.Image:
+    """Reference implementation: one Python-level distance check per pixel."""
+    rgb = image.convert("RGB")
+    bg = tuple(int(v) for v in estimate_background(np.asarray(rgb)))
+    result = rgb.convert("RGBA")
+    limit = threshold * threshold
+    for y in range(rgb.height):
+        for x in range(rgb.width):
+            r, g, b = rgb.getpixel((x, y))
+            distance = (r - bg[0]) ** 2 + (g - bg[1]) ** 2 + (b - bg[2]) ** 2
+            result.putpixel((x, y), (r, g, b, 255 if distance > limit else 0))
+    return result
+
+
+def _measure(run: Callable[[], Image.Image], megapixels: float, repeat: int) -> Tuple[float, int]:
+    best = float("inf")
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return megapixels / best, peak
+
+
+def _parse_sizes(value: str):
+    return [tuple(int(part) for part in size.split("x")) for size in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=_parse_sizes, default=[(3840, 2160)])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    naive_image = generate_image("a cat on a sofa", NAIVE_SIZE)
+    naive_rate, _ = _measure(lambda: naive_remove_background(naive_image), NAIVE_SIZE[0] * NAIVE_SIZE[1] / 1e6, 1)
+
+    print("\n✂️ Background removal throughput")
+    print(f"{'image':>11} {'engine':<28} {'MP/s':>8} {'speedup':>8} {'peak mem':>9}")
+    print(f"{'%dx%d' % NAIVE_SIZE:>11} {'naive Pillow loop':<28} {naive_rate:>8.2f} {1:>7.0f}x {'-':>9}")
+
+    for width, height in args.sizes:
+        image = generate_image("a cat on a sofa", (width, height))
+        megapixels = width * height / 1e6
+        rgba_bytes = width * height * 4
+        configs = [
+            ("numpy, untiled", dict(tile_size=max(width, height))),
+            ("numpy, 1024 tiles", dict(tile_size=1024)),
+            ("numpy, 512 tiles", dict(tile_size=512)),
+        ]
+        if cpus > 1:
+            configs.append((f"numpy, 512 tiles, {cpus} threads", dict(tile_size=512, workers=cpus)))
+        configs.append(("numpy, 1024 tiles, edge", dict(tile_size=1024, method="edge")))
+
+        for label, options in configs:
+            rate, peak = _measure(lambda: remove_background(image, **options), megapixels, args.repeat)
+            print(
+                f"{'%dx%d' % (width, height):>11} {label:<28} {rate:>8.2f} "
+                f"{rate / naive_rate:>7.0f}x {peak / rgba_bytes:>8.2f}x"
+            )
+
+    print("\npeak mem: peak traced allocation / size of one RGBA copy of the image")
+
+
+if __name__ == "__main__":
+    main()
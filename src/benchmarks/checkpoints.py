@@ -0,0 +1,157 @@
+"""
+Offline check of checkpoint history and resume.
+
+Runs a synthetic workload against the mock chat completions server with
+checkpointing on, on the sync graph one run at a time and on the async graph
+concurrently, then for every thread:
+
+- compares the messages of each checkpoint with its parent's plus the messages
+  written by the step that produced it (`history_mismatches`);
+- resumes from a checkpoint half-way through the run (time travel) and checks the
+  resumed run ends with the same messages as the original, with a clean history.
+
+Exits non-zero if any checkpoint or resumed run differs.
+
+Usage:
+    python -m src.benchmarks.checkpoints --requests 20 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional
+
+from .mock_llm import MockChatServer
+from .workload import generate_workload
+
+
+def _written_messages(metadata: Optional[Dict]) -> List[Any]:
+    messages: List[Any] = []
+    for updates in ((metadata or {}).get("writes") or {}).values():
+        # Several executions of one node in a step (parallel branches) are listed together
+        for update in updates if isinstance(updates, list) else [updates]:
+            new = update.get("messages") if isinstance(update, dict) else None
+            if new is not None:
+                messages.extend(new if isinstance(new, list) else [new])
+    return messages
+
+
+def history_mismatches(history: Iterable) -> List[str]:
+    """Checkpoints whose messages are not their parent's plus the step's own writes.
+
+    `history` is a thread's `StateSnapshot`s in any order (as from
+    `get_state_history`). A checkpoint holding messages written by later steps, or
+    missing its own, is reported; resume and time travel would replay it as is.
+    """
+    snapshots = sorted(history, key=lambda snapshot: snapshot.metadata["step"])
+    problems = []
+    for parent, child in zip(snapshots, snapshots[1:]):
+        before = list(parent.values.get("messages") or [])
+        after = list(child.values.get("messages") or [])
+        written = _written_messages(child.metadata)
+        if parent.metadata.get("source") == "input":
+            # The run's input is recorded on the checkpoint before the step that applies it
+            written = _written_messages(parent.metadata) + written
+        # Parallel branches of one step may be applied in any order
+        if after[:len(before)] != before or sorted(map(repr, after[len(before):])) != sorted(map(repr, written)):
+            problems.append(
+                f"step {child.metadata['step']}: {len(after)} messages, expected {len(before)} + {len(written)} written"
+            )
+    return problems
+
+
+def _checkpoint_id(config) -> str:
+    return config["configurable"]["checkpoint_id"]
+
+
+def _lineage(history: List) -> List:
+    """The latest checkpoint of a thread and its ancestors, leaving out other forks."""
+    by_id = {_checkpoint_id(snapshot.config): snapshot for snapshot in history}
+    lineage = [history[0]]
+    while lineage[-1].parent_config is not None:
+        lineage.append(by_id[_checkpoint_id(lineage[-1].parent_config)])
+    return lineage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8, help="Async runs in flight at once")
+    parser.add_argument("--llm-fraction", type=float, default=0.2, help="Share of requests routed by the LLM")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    items = generate_workload(args.requests, args.seed, args.llm_fraction)
+    script = {item.request: item.plan for item in items}
+
+    with MockChatServer(latency=0.01, script=script, seed=args.seed) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        # Settings are read at import time, so configure the environment before importing the graph
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ["OPENAI_API_BASE"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "mock"
+        os.environ["CHECKPOINTING_ENABLED"] = "true"
+        os.environ["CHECKPOINT_PATH"] = os.path.join(directory, "checkpoints.db")
+        os.environ.setdefault("IMAGE_BLOB_DIR", os.path.join(directory, "blobs"))
+        os.environ.setdefault("ROUTING_CACHE_ENABLED", "false")
+        os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+        os.environ.setdefault("LLM_RPM_LIMIT", "0")
+        os.environ.setdefault("LLM_TPM_LIMIT", "0")
+
+        from ..execution.checkpoints import thread_config
+        from ..main import arun_workflow, get_workflow, run_workflow
+
+        threads = [f"sync-{index}" for index in range(len(items))]
+        threads += [f"async-{index}" for index in range(len(items))]
+
+        async def run_async():
+            slots = asyncio.Semaphore(args.concurrency)
+
+            async def one(index: int, request: str):
+                async with slots:
+                    await arun_workflow(request, f"async-{index}")
+
+            await asyncio.gather(*(one(index, item.request) for index, item in enumerate(items)))
+
+        # Agents print progress; keep the report readable
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        failures: List[str] = []
+        resumed = 0
+        try:
+            for index, item in enumerate(items):
+                run_workflow(item.request, f"sync-{index}")
+            asyncio.run(run_async())
+
+            workflow = get_workflow()
+            for thread_id in threads:
+                history = list(workflow.get_state_history(thread_config(thread_id)))
+                failures += [f"{thread_id} {problem}" for problem in history_mismatches(history)]
+
+                # Time travel: continue from the middle of the run on a fork of the thread
+                final = history[0].values["messages"]
+                middle = history[len(history) // 2]
+                forked = workflow.invoke(None, middle.config)
+                if forked["messages"] != final:
+                    failures.append(f"{thread_id} resumed from step {middle.metadata['step']}: "
+                                    f"{len(forked['messages'])} messages, expected {len(final)}")
+                fork_history = list(workflow.get_state_history(thread_config(thread_id)))
+                failures += [f"{thread_id} fork {problem}" for problem in history_mismatches(_lineage(fork_history))]
+                resumed += 1
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    print(f"\n💾 Checkpoint history: {len(threads)} threads ({len(items)} sync, {len(items)} async), "
+          f"{resumed} resumed from the middle")
+    if failures:
+        for failure in failures:
+            print(f"- {failure}")
+        raise SystemExit(f"❌ {len(failures)} checkpoints or resumed runs differ")
+    print("✅ Every checkpoint holds exactly the messages of the steps up to it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Offline burst test of the shared LLM gateway.
+
+Starts the mock chat completions server with a server-side rate limit and a
+share of failing requests, then fires a burst of prompts at it, with a share of
+them duplicated while in flight, in two modes:
+
+- direct: one `ChatOpenAI` client with the OpenAI client's default retries, as
+  the supervisor and judge used before the gateway;
+- gateway: `LLMGateway` with a client-side limit just under the server's.
+
+For each mode it reports completed and failed calls, wall time, requests that
+reached the server, the 429s and 503s it answered, and the gateway's coalesced
+calls, retries and time spent throttled.
+
+Usage:
+    python -m src.benchmarks.gateway --requests 300 --concurrency 64 --rate-limit 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+from .mock_llm import MockChatServer
+
+# Client-side limit as a share of the server's, leaving room for clock skew
+_HEADROOM = 0.9
+
+
+def _prompts(count: int, duplicates: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    prompts: List[str] = []
+    for index in range(count):
+        if prompts and rng.random() < duplicates:
+            prompts.append(rng.choice(prompts))
+        else:
+            prompts.append(f"Original Request: benchmark prompt {index}")
+    rng.shuffle(prompts)
+    return prompts
+
+
+async def _burst(call, prompts: List[str], concurrency: int) -> Dict:
+    from langchain_core.messages import HumanMessage
+
+    slots = asyncio.Semaphore(concurrency)
+    counters = {"completed": 0, "failed": 0}
+
+    async def one(prompt: str) -> None:
+        async with slots:
+            try:
+                await call([HumanMessage(content=prompt)])
+                counters["completed"] += 1
+            except Exception:
+                counters["failed"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(prompt) for prompt in prompts))
+    counters["seconds"] = time.perf_counter() - started
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=64, help="Calls in flight at once")
+    parser.add_argument("--duplicates", type=float, default=0.3, help="Share of prompts repeating an earlier one")
+    parser.add_argument("--rate-limit", type=float, default=20.0, help="Mock server requests per second")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of requests the mock fails with 503")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock LLM seconds per completion")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    prompts = _prompts(args.requests, args.duplicates, args.seed)
+    os.environ["OPENAI_API_KEY"] = "mock"
+
+    from langchain_openai import ChatOpenAI
+
+    from ..llm.gateway import ChatModel, LLMGateway
+
+    rows = []
+    for mode in ("direct", "gateway"):
+        server = MockChatServer(
+            latency=args.latency, seed=args.seed, rate_limit=args.rate_limit, error_rate=args.error_rate
+        )
+        with server:
+            os.environ["OPENAI_BASE_URL"] = server.base_url
+            os.environ["OPENAI_API_BASE"] = server.base_url
+            gateway = None
+            if mode == "direct":
+                call = ChatOpenAI(model="gpt-4", temperature=0).ainvoke
+            else:
+                gateway = LLMGateway(rpm=int(args.rate_limit * 60 * _HEADROOM), tpm=0)
+                model = ChatModel("gpt-4")
+                call = lambda messages: gateway.ainvoke(model, messages)
+
+            # The gateway prints every retry; keep the report readable
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, "w")
+            try:
+                result = asyncio.run(_burst(call, prompts, args.concurrency))
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            result.update(
+                mode=mode,
+                upstream=server.requests_served + server.requests_rate_limited + server.requests_failed,
+                rate_limited=server.requests_rate_limited,
+                server_errors=server.requests_failed,
+                gateway=gateway.stats.as_dict() if gateway is not None else None,
+            )
+            rows.append(result)
+
+    print(f"\n📡 LLM burst: {args.requests} prompts ({args.duplicates:.0%} duplicates), "
+          f"{args.concurrency} in flight, server limit {args.rate_limit:g} req/s, "
+          f"{args.error_rate:.0%} 503s")
+    print(f"{'mode':<8} {'done':>6} {'failed':>7} {'seconds':>8} {'upstream':>9} {'429s':>6} {'503s':>6}")
+    for row in rows:
+        print(f"{row['mode']:<8} {row['completed']:>6} {row['failed']:>7} {row['seconds']:>8.2f} "
+              f"{row['upstream']:>9} {row['rate_limited']:>6} {row['server_errors']:>6}")
+    stats = rows[-1]["gateway"]
+    print(f"Gateway: {stats['coalesced']} coalesced, {stats['retries']} retries, "
+          f"{stats['throttled_seconds']:.1f}s throttled across callers")
+
+
+if __name__ == "__main__":
+    main()
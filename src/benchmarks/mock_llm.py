@@ -0,0 +1,268 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint.
+
+Serves `POST /v1/chat/completions` from a background thread with configurable
+latency, so `ChatOpenAI` (supervisor and evaluators) can be benchmarked without
+network access or API spend. Point a client at it with `OPENAI_BASE_URL`.
+
+Answers are scripted from the prompt:
+- structured plan requests (the `TaskPlan` tool) get the scripted plan for the
+  request, minus any completed tasks (listed, or checked in a compact checklist);
+- next-step requests ("Current Task: ...") get the task after the current one in
+  the scripted plan, or `__end__`;
+- evaluation judge prompts get "CORRECT".
+
+Requests without a script entry are planned with the keyword router, falling back
+to a single image generation.
+
+To exercise client retries and rate limiting, the server can enforce its own
+requests-per-second limit (429 with `Retry-After`, like the real API) and fail a
+share of requests with 503.
+
+Usage (standalone, for manual runs of src.main against it):
+    python -m src.benchmarks.mock_llm --port 8765 --latency 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock python -m src.main
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from ..agents.router import IMAGE_GENERATION, KeywordRouter
+
+_ORIGINAL_REQUEST = re.compile(r"Original Request:\s*(.*)")
+_CURRENT_TASK = re.compile(r"Current Task:\s*(\S+)")
+_COMPLETED_TASKS = re.compile(r"Completed Tasks:\s*(.*)")
+_CHECKED_TASKS = re.compile(r"\[x\]\s*(\w+)")
+
+
+def _normalize(request: str) -> str:
+    return " ".join(request.lower().split())
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class MockChatServer:
+    """Threaded HTTP server answering chat completions from a routing script."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        script: Optional[Dict[str, List[str]]] = None,
+        seed: int = 0,
+        rate_limit: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.script = {_normalize(request): plan for request, plan in (script or {}).items()}
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.requests_served = 0
+        self.requests_rate_limited = 0
+        self.requests_failed = 0
+        # One second of burst, refilled at rate_limit per second
+        self._allowance = rate_limit
+        self._allowance_updated = time.monotonic()
+        self._router = KeywordRouter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockChatServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockChatServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def plan_for(self, request: str) -> List[str]:
+        plan = self.script.get(_normalize(request))
+        if plan is None:
+            plan = self._router.plan(request) or [IMAGE_GENERATION]
+        return list(plan)
+
+    def admit(self) -> Optional[Tuple[int, Dict[str, str]]]:
+        """(status, headers) to reject a request with, or None to answer it."""
+        with self._lock:
+            if self.rate_limit > 0:
+                now = time.monotonic()
+                self._allowance = min(self.rate_limit, self._allowance + (now - self._allowance_updated) * self.rate_limit)
+                self._allowance_updated = now
+                if self._allowance < 1:
+                    self.requests_rate_limited += 1
+                    wait = (1 - self._allowance) / self.rate_limit
+                    return 429, {"retry-after-ms": f"{wait * 1000:.0f}", "retry-after": str(math.ceil(wait))}
+                self._allowance -= 1
+            if self.error_rate > 0 and self._random.random() < self.error_rate:
+                self.requests_failed += 1
+                return 503, {}
+        return None
+
+    def complete(self, body: Dict) -> Dict:
+        """Build a chat.completion response for a request body."""
+        with self._lock:
+            self.requests_served += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        time.sleep(delay)
+
+        messages = body.get("messages", [])
+        prompt = "\n".join(str(m.get("content") or "") for m in messages)
+        last = str(messages[-1].get("content") or "") if messages else ""
+        message: Dict = {"role": "assistant", "content": None}
+
+        request_match = _ORIGINAL_REQUEST.search(last)
+        request = request_match.group(1).strip() if request_match else ""
+
+        if body.get("tools"):
+            tasks = self.plan_for(request)
+            completed = _COMPLETED_TASKS.search(last)
+            if completed:
+                done = {task.strip() for task in completed.group(1).split(",")}
+            else:
+                # Compact prompts report progress as a checklist
+                done = set(_CHECKED_TASKS.findall(last))
+            tasks = [task for task in tasks if task not in done]
+            tool = body["tools"][0]["function"]["name"]
+            message["tool_calls"] = [{
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": tool, "arguments": json.dumps({"tasks": tasks})},
+            }]
+            answer = json.dumps(tasks)
+        elif _CURRENT_TASK.search(last):
+            plan = self.plan_for(request)
+            current = _CURRENT_TASK.search(last).group(1)
+            if current in plan:
+                position = plan.index(current) + 1
+            else:
+                # First visit ("None") starts the plan; anything unexpected ends it
+                position = 0 if current == "None" else len(plan)
+            answer = plan[position] if position < len(plan) else "__end__"
+            message["content"] = answer
+        elif "evaluation judge" in prompt:
+            answer = "CORRECT - scripted by the mock judge"
+            message["content"] = answer
+        else:
+            answer = "OK"
+            message["content"] = answer
+
+        prompt_tokens = _estimate_tokens(prompt)
+        completion_tokens = _estimate_tokens(answer)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if "tool_calls" in message else "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # High-concurrency runs open many connections at once
+    request_queue_size = 1024
+    mock: MockChatServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            rejection = self.server.mock.admit()
+            if rejection is not None:
+                status, headers = rejection
+                error = "rate_limit_exceeded" if status == 429 else "server_error"
+                self._send(status, {"error": {"message": f"Mock {error}", "type": error, "code": error}}, headers)
+                return
+            self._send(200, self.server.mock.complete(body))
+        except Exception as e:
+            self._send(500, {"error": {"message": str(e)}})
+
+    def _send(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random latency, in seconds")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before 429s, 0 for none")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failed with 503")
+    args = parser.parse_args()
+
+    server = MockChatServer(
+        args.host, args.port, args.latency, args.jitter, rate_limit=args.rate_limit, error_rate=args.error_rate
+    )
+    print(f"🧪 Mock chat completions listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Simulation: tail latency of concurrent runs with and without the hop scheduler.
+
+A discrete-event simulation (simulated clock, no LLM or images) of runs sharing
+an LLM pool and a CPU pool, as they do under `SCHEDULER_ENABLED=true`. Requests
+arrive as a Poisson stream with a mix of plan lengths; every planned task is a
+supervisor hop, which calls the LLM for `--llm-share` of hops and is otherwise
+answered by the keyword router at no cost, followed by an image hop with a
+heavy-tailed duration. `--priority-share` of the requests have priority 1 and a
+deadline of `--deadline` seconds.
+
+The same workload, with the same hop durations, is run under two policies:
+
+- fifo: each pool serves waiting hops in arrival order, as the unscheduled graph
+  effectively does;
+- scheduler: waiting hops are granted by `src.execution.scheduler.rank`, with each
+  run's remaining tasks updated after every image hop.
+
+It reports end-to-end p50/p95/p99 latency overall, per plan length and for the
+priority requests, plus their missed deadlines.
+
+Usage:
+    python -m src.benchmarks.scheduler --requests 20000 --rate 2.1 --llm-slots 4 --cpu-slots 2
+"""
+
+import argparse
+import heapq
+import itertools
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from ..execution.scheduler import Ticket, rank
+from ..instrumentation.percentiles import percentile
+
+# Share of requests planning 1, 2 and 3 tasks
+PLAN_MIX = {1: 0.5, 2: 0.3, 3: 0.2}
+POLICIES = ("fifo", "scheduler")
+
+
+@dataclass
+class _Run:
+    arrival: float
+    tasks: int
+    # (pool, seconds) per hop; supervisor hops answered without the LLM are left out
+    hops: List[Tuple[str, float]]
+    ticket: Ticket
+    hop: int = 0
+    finished: Optional[float] = None
+
+
+@dataclass
+class _Pool:
+    capacity: int
+    busy: int = 0
+    waiting: List[Tuple[_Run, float]] = field(default_factory=list)
+
+
+def generate_runs(args) -> List[dict]:
+    """Workload shared by every policy: arrivals, plans and hop durations."""
+    rng = random.Random(args.seed)
+    # Lognormal image hops with mean `cpu_seconds`
+    sigma = args.cpu_tail
+    mu = math.log(args.cpu_seconds) - sigma ** 2 / 2
+    plans, weights = zip(*PLAN_MIX.items())
+    now = 0.0
+    runs = []
+    for _ in range(args.requests):
+        now += rng.expovariate(args.rate)
+        tasks = rng.choices(plans, weights)[0]
+        hops = []
+        # One supervisor hop per task plus the one that ends the run
+        for index in range(tasks + 1):
+            if rng.random() < args.llm_share:
+                hops.append(("llm", rng.expovariate(1 / args.llm_seconds)))
+            if index < tasks:
+                hops.append(("cpu", rng.lognormvariate(mu, sigma)))
+        priority = 1 if rng.random() < args.priority_share else 0
+        runs.append({"arrival": now, "tasks": tasks, "hops": hops, "priority": priority})
+    return runs
+
+
+def simulate(workload: List[dict], policy: str, args) -> List[_Run]:
+    pools = {"llm": _Pool(args.llm_slots), "cpu": _Pool(args.cpu_slots)}
+    # Time one remaining task adds, as the scheduler's pool estimates converge to
+    hop_seconds = args.llm_share * args.llm_seconds + args.cpu_seconds
+    events: List[Tuple[float, int, str, _Run]] = []
+    sequence = itertools.count()
+    runs = []
+    for item in workload:
+        deadline = item["arrival"] + args.deadline if item["priority"] else None
+        ticket = Ticket(item["priority"], deadline, item["tasks"], submitted=item["arrival"],
+                        sequence=len(runs), predicted=item["tasks"])
+        run = _Run(item["arrival"], item["tasks"], item["hops"], ticket)
+        runs.append(run)
+        heapq.heappush(events, (run.arrival, next(sequence), "arrive", run))
+
+    def start(run: _Run, now: float) -> None:
+        pool_name, seconds = run.hops[run.hop]
+        pools[pool_name].busy += 1
+        heapq.heappush(events, (now + seconds, next(sequence), "complete", run))
+
+    def request(run: _Run, now: float) -> None:
+        if run.hop == len(run.hops):
+            run.finished = now
+            return
+        pool = pools[run.hops[run.hop][0]]
+        if pool.busy < pool.capacity and not pool.waiting:
+            start(run, now)
+        else:
+            pool.waiting.append((run, now))
+
+    def grant(pool: _Pool, now: float) -> None:
+        while pool.busy < pool.capacity and pool.waiting:
+            if policy == "fifo":
+                index = 0
+            else:
+                index = min(
+                    range(len(pool.waiting)),
+                    key=lambda i: rank(pool.waiting[i][0].ticket, pool.waiting[i][1], now,
+                                       hop_seconds, args.aging),
+                )
+            run, since = pool.waiting.pop(index)
+            run.ticket.waited += now - since
+            start(run, now)
+
+    while events:
+        now, _, kind, run = heapq.heappop(events)
+        if kind == "arrive":
+            request(run, now)
+            continue
+        pool_name = run.hops[run.hop][0]
+        pools[pool_name].busy -= 1
+        if pool_name == "cpu":
+            run.ticket.remaining = max(run.ticket.remaining - 1, 0)
+        run.hop += 1
+        request(run, now)
+        grant(pools[pool_name], now)
+    return runs
+
+
+def _summary(runs: List[_Run]) -> Dict[str, float]:
+    latencies = [run.finished - run.arrival for run in runs]
+    return {
+        "runs": len(runs),
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=2.1, help="Arrivals per second")
+    parser.add_argument("--llm-slots", type=int, default=4)
+    parser.add_argument("--cpu-slots", type=int, default=2)
+    parser.add_argument("--llm-share", type=float, default=0.5, help="Share of supervisor hops that call the LLM")
+    parser.add_argument("--llm-seconds", type=float, default=0.8, help="Mean LLM call")
+    parser.add_argument("--cpu-seconds", type=float, default=0.5, help="Mean image hop")
+    parser.add_argument("--cpu-tail", type=float, default=1.0, help="Lognormal sigma of image hops")
+    parser.add_argument("--priority-share", type=float, default=0.1)
+    parser.add_argument("--deadline", type=float, default=10.0, help="Seconds from arrival, priority requests")
+    parser.add_argument("--aging", type=float, default=5.0, help="SCHEDULER_AGING_SECONDS")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workload = generate_runs(args)
+    cpu_load = sum(PLAN_MIX[tasks] * tasks for tasks in PLAN_MIX) * args.cpu_seconds * args.rate / args.cpu_slots
+    print(f"\n🗓️ {args.requests} requests at {args.rate:g}/s, {args.llm_slots} LLM and {args.cpu_slots} CPU slots "
+          f"(CPU {cpu_load:.0%} busy), {args.priority_share:.0%} priority with {args.deadline:g}s deadlines")
+    print(f"{'policy':<10} {'group':<10} {'runs':>6} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}")
+
+    p99 = {}
+    for policy in POLICIES:
+        runs = simulate(workload, policy, args)
+        groups = {"all": runs}
+        for tasks in PLAN_MIX:
+            groups[f"{tasks} task{'s' if tasks > 1 else ''}"] = [run for run in runs if run.tasks == tasks]
+        priority = [run for run in runs if run.ticket.priority]
+        groups["priority"] = priority
+        for group, members in groups.items():
+            stats = _summary(members)
+            print(f"{policy:<10} {group:<10} {stats['runs']:>6} {stats['p50']:>8.2f} {stats['p95']:>8.2f} "
+                  f"{stats['p99']:>8.2f}")
+        missed = sum(1 for run in priority if run.finished > run.ticket.deadline)
+        print(f"{policy:<10} {'deadlines':<10} {missed:>6} missed of {len(priority)}")
+        p99[policy] = _summary(runs)["p99"]
+
+    change = (p99["fifo"] - p99["scheduler"]) / p99["fifo"] if p99["fifo"] else 0.0
+    print(f"\n✅ Overall p99 {p99['fifo']:.2f}s -> {p99['scheduler']:.2f}s ({change:.0%} lower with the scheduler)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Offline load test of the HTTP service.
+
+Starts the mock chat completions server and drives the ASGI app in-process
+through httpx: every simulated client submits a job with `POST /jobs`, retries
+on 429 and follows it to the end with `GET /jobs/{id}/events`. One tenant sends
+`--heavy-share` of the traffic and the rest is spread over light tenants, so the
+per-tenant latencies show whether the heavy tenant crowds the others out.
+
+Reports throughput, end-to-end p50/p95/p99 latency, rejected submissions and
+p50 latency per tenant, then drains the service.
+
+Usage:
+    python -m src.benchmarks.server --requests 500 --clients 64 --workers 32 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+from ..instrumentation.percentiles import percentile
+from .mock_llm import MockChatServer
+from .workload import generate_workload
+
+# Seconds a client waits before resubmitting a rejected job
+_RETRY_DELAY = 0.05
+
+
+async def _client(http, queue: asyncio.Queue, results: List[Dict], counters: Dict[str, int]) -> None:
+    while True:
+        try:
+            tenant, request = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        started = time.perf_counter()
+        while True:
+            response = await http.post("/jobs", json={"request": request}, headers={"X-Tenant": tenant})
+            if response.status_code != 429:
+                break
+            counters["rejected"] += 1
+            await asyncio.sleep(_RETRY_DELAY)
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+
+        status = None
+        async with http.stream("GET", f"/jobs/{job_id}/events") as events:
+            async for line in events.aiter_lines():
+                if line:
+                    event = json.loads(line)
+                    if event["event"] == "job":
+                        status = event["status"]
+        if status != "done":
+            raise RuntimeError(f"Job {job_id} ended as {status}")
+        results.append({"tenant": tenant, "latency": time.perf_counter() - started})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--clients", type=int, default=64, help="Simulated clients sending requests at once")
+    parser.add_argument("--workers", type=int, default=32, help="Jobs the service runs at once")
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--tenant-concurrency", type=int, default=16)
+    parser.add_argument("--tenants", type=int, default=4, help="Light tenants next to the heavy one")
+    parser.add_argument("--heavy-share", type=float, default=0.7, help="Share of requests from the heavy tenant")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock LLM seconds per completion")
+    parser.add_argument("--llm-fraction", type=float, default=0.2, help="Share of requests routed by the LLM")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    items = generate_workload(args.requests, args.seed, args.llm_fraction)
+    script = {item.request: item.plan for item in items}
+
+    with MockChatServer(latency=args.latency, script=script, seed=args.seed) as server:
+        # Settings are read at import time, so configure the environment before importing the graph
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ["OPENAI_API_BASE"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "mock"
+        os.environ.setdefault("ROUTING_CACHE_ENABLED", "false")
+        os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+        # The mock does not rate limit, so measure the graph rather than client-side pacing
+        os.environ.setdefault("LLM_RPM_LIMIT", "0")
+        os.environ.setdefault("LLM_TPM_LIMIT", "0")
+
+        import httpx
+
+        from ..server import JobService, ServiceApp
+
+        async def go():
+            service = JobService(
+                workers=args.workers,
+                queue_size=args.queue_size,
+                tenant_concurrency=args.tenant_concurrency,
+            )
+            app = ServiceApp(service)
+            queue: asyncio.Queue = asyncio.Queue()
+            light = max(args.tenants, 1)
+            for index, item in enumerate(items):
+                heavy = (index % 100) < args.heavy_share * 100
+                queue.put_nowait(("heavy" if heavy else f"light-{index % light}", item.request))
+
+            results: List[Dict] = []
+            counters = {"rejected": 0}
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://service", timeout=None) as http:
+                started = time.perf_counter()
+                await asyncio.gather(*(_client(http, queue, results, counters) for _ in range(args.clients)))
+                elapsed = time.perf_counter() - started
+                health = (await http.get("/health")).json()
+            await service.drain()
+            return results, counters, elapsed, health
+
+        # Agents print progress; keep the report readable
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        try:
+            results, counters, elapsed, health = asyncio.run(go())
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        llm_requests = server.requests_served
+
+    latencies = [result["latency"] for result in results]
+    print(f"\n🌐 Service load test: {len(results)} jobs from {args.clients} clients, "
+          f"{args.workers} workers, mock LLM latency {args.latency * 1000:.0f} ms")
+    print(f"Throughput: {len(results) / elapsed:.2f} jobs/s over {elapsed:.2f}s")
+    print(f"Latency: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"Rejected submissions (429): {counters['rejected']}")
+    for tenant in sorted({result["tenant"] for result in results}):
+        samples = [result["latency"] for result in results if result["tenant"] == tenant]
+        print(f"• {tenant}: {len(samples)} job(s), p50 {percentile(samples, 0.5) * 1000:.1f} ms")
+    print(f"Service after run: {health}")
+    print(f"Mock LLM completions served: {llm_requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Micro-benchmark: size and speed of `AgentState` encodings.
+
+Builds states as the workflow leaves them after a few, tens and hundreds of hops,
+with a `HumanMessage` request, `AgentMessage` history, a dict message as the
+evaluation harness adds, image references, a plan and branch results. Each state
+is then encoded with:
+
+- json: `json.dumps`, messages flattened to dicts (lossy: they decode as dicts);
+- pickle: highest protocol;
+- jsonplus: LangGraph's checkpoint serializer, used for checkpoints before the codec;
+- codec: `src.agent_types.codec`.
+
+It reports encoded bytes and encode/decode microseconds (best of `--repeat`), and
+checks that every lossless format decodes to a state equal to the original.
+
+Usage:
+    python -m src.benchmarks.state_codec --repeat 200
+"""
+
+import argparse
+import json
+import pickle
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, message_to_dict
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from ..agent_types.codec import decode_state, encode_state
+from ..agent_types.state import AgentMessage, AgentState, create_initial_state
+
+HOPS = [3, 30, 300]
+TASKS = ["image_generation", "background_removal", "text_overlay"]
+_TASK_MESSAGES = {
+    "image_generation": "Image Generation Agent: Generated new image",
+    "background_removal": "Background Removal Agent: Removed image background",
+    "text_overlay": "Text Overlay Agent: Added text to image",
+}
+
+
+def _ref(index: int) -> str:
+    return f"image://{index:064x}"
+
+
+def build_state(hops: int) -> AgentState:
+    state = create_initial_state(
+        HumanMessage(content="Create an image of a lighthouse at dusk, remove the background and add text 'Ahoy'")
+    )
+    state["messages"].append({"role": "system", "content": "Evaluation: expected 3 agent actions"})
+    for hop in range(hops):
+        task = TASKS[hop % len(TASKS)]
+        state["messages"].append(AgentMessage("system", f"Supervisor: Routing to {task}"))
+        state["messages"].append(AgentMessage("system", _TASK_MESSAGES[task]))
+        state["routing_history"].append(task)
+        state["completed_tasks"].append(task)
+    state["messages"].append(AgentMessage("system", "Merge: Produced 2 of 2 variants"))
+    state.update(
+        next_agent="__end__",
+        current_task="text_overlay",
+        image_url=_ref(1),
+        processed_image_url=_ref(2),
+        task_plan=list(TASKS),
+        plan_step=len(TASKS),
+        hop_count=hops * 2,
+        supervisor_hops=hops,
+        llm_calls=1,
+        llm_cost_usd=0.0123,
+        variant_urls=[_ref(2), _ref(3)],
+        branch_results=[
+            {"branch": 0, "role": "variant", "url": _ref(2), "completed": list(TASKS)},
+            {"branch": 1, "role": "variant", "url": _ref(3), "completed": list(TASKS)},
+        ],
+    )
+    return state
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, AgentMessage):
+        return {"role": value.role, "content": value.content}
+    if isinstance(value, BaseMessage):
+        return message_to_dict(value)
+    raise TypeError(type(value).__name__)
+
+
+_jsonplus = JsonPlusSerializer()
+
+# name -> (encode, decode, lossless)
+FORMATS: Dict[str, Tuple[Callable[[AgentState], bytes], Callable[[bytes], Any], bool]] = {
+    "json": (
+        lambda state: json.dumps(state, default=_json_default, separators=(",", ":")).encode("utf-8"),
+        json.loads,
+        False,
+    ),
+    "pickle": (lambda state: pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads, True),
+    "jsonplus": (
+        lambda state: _jsonplus.dumps_typed(state)[1],
+        lambda data: _jsonplus.loads_typed(("msgpack", data)),
+        True,
+    ),
+    "codec": (encode_state, decode_state, True),
+}
+
+
+def _best_microseconds(function: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    for hops in HOPS:
+        state = build_state(hops)
+        print(f"\n📦 AgentState after {hops} hops ({len(state['messages'])} messages)")
+        print(f"{'format':<10} {'bytes':>9} {'encode µs':>11} {'decode µs':>11} {'round trip':>11}")
+        for name, (encode, decode, lossless) in FORMATS.items():
+            data = encode(state)
+            encode_us = _best_microseconds(lambda: encode(state), args.repeat)
+            decode_us = _best_microseconds(lambda: decode(data), args.repeat)
+            if lossless:
+                intact = decode(data) == state
+                if not intact:
+                    failures.append(f"{name} after {hops} hops")
+                check = "ok" if intact else "MISMATCH"
+            else:
+                check = "lossy"
+            print(f"{name:<10} {len(data):>9,} {encode_us:>11.1f} {decode_us:>11.1f} {check:>11}")
+
+    if failures:
+        raise SystemExit(f"❌ Round trip failed: {', '.join(failures)}")
+    print("\n✅ Every lossless encoding decoded to an equal state")
+
+
+if __name__ == "__main__":
+    main()
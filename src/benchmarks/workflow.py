@@ -0,0 +1,229 @@
+"""
+Offline load test of the full workflow graph.
+
+Starts the mock chat completions server, points `ChatOpenAI` at it and drives a
+synthetic workload through `create_workflow()` in three modes:
+
+- sequential: one synchronous `invoke` at a time;
+- batch: `run_batch` with a bounded number of requests in flight;
+- concurrent: every request started at once on the async graph.
+
+For each mode it reports throughput, p50/p95/p99 latency and the peak
+traced memory per in-flight workflow (measured in a separate, smaller pass so
+tracing does not distort the timings). Results can be saved as a baseline and
+later runs compared against it; a regression beyond the tolerance exits non-zero.
+
+Usage:
+    python -m src.benchmarks.workflow --requests 200 --latency 0.05 --output results.json
+    python -m src.benchmarks.workflow --baseline results.json --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from ..instrumentation.percentiles import percentile
+from .mock_llm import MockChatServer
+from .workload import SHAPES, WorkloadItem, generate_workload
+
+MODES = ("sequential", "batch", "concurrent")
+# Metrics compared against the baseline, and whether higher is better
+COMPARED = {"throughput_rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False}
+
+
+def _initial_state(item: WorkloadItem):
+    from ..agent_types.state import create_initial_state
+    return create_initial_state({"role": "user", "content": item.request})
+
+
+def run_sequential(workflow, items: List[WorkloadItem]) -> List[float]:
+    latencies = []
+    for item in items:
+        started = time.perf_counter()
+        workflow.invoke(_initial_state(item))
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run_batch_mode(loop, workflow, items: List[WorkloadItem], concurrency: int) -> List[float]:
+    from ..batch import run_batch
+
+    async def go():
+        latencies = []
+        async for record in run_batch([item.request for item in items], workflow, concurrency, timeout=600):
+            if record["status"] != "ok":
+                raise RuntimeError(f"Request {record['index']} {record['status']}: {record.get('error')}")
+            latencies.append(record["elapsed_seconds"])
+        return latencies
+
+    return loop.run_until_complete(go())
+
+
+def run_concurrent(loop, workflow, items: List[WorkloadItem]) -> List[float]:
+    async def one(item):
+        started = time.perf_counter()
+        await workflow.ainvoke(_initial_state(item))
+        return time.perf_counter() - started
+
+    async def go():
+        return await asyncio.gather(*(one(item) for item in items))
+
+    return list(loop.run_until_complete(go()))
+
+
+def _measure(run: Callable[[], List[float]]) -> Dict:
+    started = time.perf_counter()
+    latencies = run()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def _peak_memory(run: Callable[[], List[float]], in_flight: int) -> float:
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return round(peak / max(in_flight, 1) / 1024, 1)
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for mode, current in results["modes"].items():
+        previous = baseline.get("modes", {}).get(mode)
+        if previous is None:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append(f"{mode} {metric}: {old} → {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--concurrency", type=int, default=16, help="In-flight requests in batch mode")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock LLM seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--llm-fraction", type=float, default=0.2, help="Share of requests routed by the LLM")
+    parser.add_argument("--memory-requests", type=int, default=20, help="Requests in the memory pass (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here (usable as a baseline)")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    items = generate_workload(args.requests, args.seed, args.llm_fraction)
+    memory_items = generate_workload(args.memory_requests, args.seed + 1, args.llm_fraction)
+    warmup_items = generate_workload(len(SHAPES), args.seed + 2, 0.5)
+    script = {item.request: item.plan for item in items + memory_items + warmup_items}
+
+    with MockChatServer(latency=args.latency, jitter=args.jitter, script=script, seed=args.seed) as server:
+        # Settings are read at import time, so configure the environment before importing the graph
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ["OPENAI_API_BASE"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "mock"
+        os.environ.setdefault("ROUTING_CACHE_ENABLED", "false")
+        os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+        # The mock does not rate limit, so measure the graph rather than client-side pacing
+        os.environ.setdefault("LLM_RPM_LIMIT", "0")
+        os.environ.setdefault("LLM_TPM_LIMIT", "0")
+
+        from ..main import create_workflow
+        from ..instrumentation.metrics import metrics
+
+        sync_workflow = create_workflow()
+        async_workflow = create_workflow(use_async=True)
+
+        # One loop for every async run: the OpenAI client pools connections per loop
+        loop = asyncio.new_event_loop()
+        runners = {
+            "sequential": (lambda batch: run_sequential(sync_workflow, batch), lambda batch: 1),
+            "batch": (lambda batch: run_batch_mode(loop, async_workflow, batch, args.concurrency),
+                      lambda batch: min(args.concurrency, len(batch))),
+            "concurrent": (lambda batch: run_concurrent(loop, async_workflow, batch), len),
+        }
+
+        results = {
+            "config": {
+                "requests": args.requests, "concurrency": args.concurrency, "latency": args.latency,
+                "jitter": args.jitter, "llm_fraction": args.llm_fraction, "seed": args.seed,
+                "python": platform.python_version(), "cpus": os.cpu_count(),
+            },
+            "modes": {},
+        }
+
+        # Agents print progress; keep the report readable
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        try:
+            # Fonts, lazily imported modules and client pools are set up once, outside the measurements
+            run_sequential(sync_workflow, warmup_items)
+            run_concurrent(loop, async_workflow, warmup_items)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+        for mode in args.modes.split(","):
+            run, in_flight = runners[mode]
+            sys.stdout = open(os.devnull, "w")
+            try:
+                summary = _measure(lambda: run(items))
+                if memory_items:
+                    summary["peak_kb_per_workflow"] = _peak_memory(lambda: run(memory_items), in_flight(memory_items))
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            results["modes"][mode] = summary
+        loop.close()
+
+        results["llm_requests"] = server.requests_served
+
+    print(f"\n🏋️ Workflow load test: {args.requests} requests, mock LLM latency {args.latency * 1000:.0f} ms")
+    print(f"{'mode':<12} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'KB/wf':>9}")
+    for mode, s in results["modes"].items():
+        print(
+            f"{mode:<12} {s['throughput_rps']:>8.2f} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} "
+            f"{s['p99_ms']:>9.1f} {s.get('peak_kb_per_workflow', 0):>9.1f}"
+        )
+    print(f"\nMock LLM completions served: {results['llm_requests']}")
+    print(f"\n⏱️ Node metrics:\n{metrics.format_table()}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"- {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Synthetic workload of realistic multi-step requests.
+
+Each item pairs a request with the plan a correct supervisor should follow, so the
+mock LLM can be scripted with the same answers. A share of the requests is phrased
+so the keyword fast path rejects it ("don't forget", "or"), which exercises the
+LLM routing path as well.
+
+Usage:
+    python -m src.benchmarks.workload --count 20 --seed 1
+"""
+
+import argparse
+import json
+import random
+from dataclasses import asdict, dataclass
+from typing import List
+
+from ..agents.router import BACKGROUND_REMOVAL, IMAGE_GENERATION, TEXT_OVERLAY
+
+SUBJECTS = [
+    "a cat on a sofa", "a mountain at sunrise", "a red sports car", "a lighthouse by the sea",
+    "a bowl of ramen", "a city skyline at night", "a golden retriever", "a forest in autumn",
+    "a vintage camera", "a sunflower field", "an astronaut on the moon", "a coffee cup",
+]
+TEXTS = [
+    "Hello World", "Beautiful Evening", "Summer Sale", "Welcome Home", "Good Morning",
+    "Limited Edition", "Happy Birthday", "Explore More",
+]
+
+# (plan, fast-path template, template the fast path hands to the LLM)
+SHAPES = [
+    (
+        [IMAGE_GENERATION],
+        "Generate an image of {subject}",
+        "Draw {subject}, nothing fancy or extra",
+    ),
+    (
+        [IMAGE_GENERATION, TEXT_OVERLAY],
+        "Generate an image of {subject} and add text '{text}'",
+        "Create an image of {subject} and don't forget a caption saying '{text}'",
+    ),
+    (
+        [IMAGE_GENERATION, BACKGROUND_REMOVAL],
+        "Create an image of {subject} and remove the background",
+        "Make a picture of {subject}, then remove the background or make it transparent",
+    ),
+    (
+        [IMAGE_GENERATION, BACKGROUND_REMOVAL, TEXT_OVERLAY],
+        "Create an image of {subject}, remove the background, and add the text '{text}'",
+        "Create an image of {subject}, strip the background or make it transparent, then add text '{text}'",
+    ),
+    (
+        [IMAGE_GENERATION, TEXT_OVERLAY, BACKGROUND_REMOVAL],
+        "Generate an image of {subject}, add a caption '{text}' and then remove the background",
+        "Generate an image of {subject}, add a caption '{text}', and don't keep the background; remove the background",
+    ),
+]
+
+
+@dataclass
+class WorkloadItem:
+    request: str
+    plan: List[str]
+    llm_routed: bool
+
+
+def generate_workload(count: int, seed: int = 0, llm_fraction: float = 0.2) -> List[WorkloadItem]:
+    """`count` requests; about `llm_fraction` of them are phrased to need the LLM."""
+    rng = random.Random(seed)
+    items = []
+    for index in range(count):
+        plan, fast_template, llm_template = rng.choice(SHAPES)
+        llm_routed = rng.random() < llm_fraction
+        template = llm_template if llm_routed else fast_template
+        # The index keeps requests distinct so caches do not flatter the numbers
+        subject = f"{rng.choice(SUBJECTS)} #{index}"
+        request = template.format(subject=subject, text=rng.choice(TEXTS))
+        items.append(WorkloadItem(request, list(plan), llm_routed))
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a synthetic workload as JSON lines")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-fraction", type=float, default=0.2)
+    args = parser.parse_args()
+    for item in generate_workload(args.count, args.seed, args.llm_fraction):
+        print(json.dumps(asdict(item)))
+
+
+if __name__ == "__main__":
+    main()
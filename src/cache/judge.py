@@ -0,0 +1,52 @@
+"""
+Judge-response cache for the evaluation harness.
+
+The judge runs at temperature 0, so the same prompt always gets the same verdict.
+Responses are stored under a hash of everything sent to the judge (model, prompt
+version, instructions and the comparison message), which makes repeated
+evaluation runs and repetitions of the same example free after the first.
+"""
+
+import hashlib
+import json
+from typing import Optional
+
+from ..config.settings import (
+    JUDGE_CACHE_ENABLED,
+    JUDGE_CACHE_PATH,
+    ROUTING_CACHE_MAX_ENTRIES,
+    ROUTING_CACHE_MEMORY_ENTRIES,
+    ROUTING_CACHE_TTL_SECONDS,
+)
+from .store import TwoTierCache
+
+_judge_cache: Optional[TwoTierCache] = None
+
+
+def judge_key(model: str, prompt_version: str, instructions: str, content: str) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "prompt_version": prompt_version,
+            "instructions": instructions,
+            "content": content,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_judge_cache() -> Optional[TwoTierCache]:
+    """Process-wide judge cache, or None when caching is disabled."""
+    global _judge_cache
+    if not JUDGE_CACHE_ENABLED:
+        return None
+    if _judge_cache is None:
+        _judge_cache = TwoTierCache(
+            JUDGE_CACHE_PATH,
+            namespace="judge",
+            memory_entries=ROUTING_CACHE_MEMORY_ENTRIES,
+            max_entries=ROUTING_CACHE_MAX_ENTRIES,
+            ttl_seconds=ROUTING_CACHE_TTL_SECONDS,
+        )
+    return _judge_cache
@@ -0,0 +1,188 @@
+"""
+Content-addressed cache of task-agent outputs.
+
+Every image operation is deterministic, so its output is fully determined by the
+operation, the parameters it reads and the content hash of its input image. A
+result is stored under a key built from exactly those, which means:
+
+- a repeated request replays every step from the cache;
+- a near-repeat ("same subject, different caption") reuses the steps it shares
+  and only computes the first step that differs and everything after it.
+
+A fused chain is run in one pass and only its final output is stored, under a
+key covering every operation of the chain.
+
+Results live in a size-bounded directory of PNG blobs (lossless, so a reloaded
+image hashes exactly as the original) with least-recently-used eviction, shared
+by every process that points at it. A small in-process map from key to image
+store reference serves hot entries without decoding anything.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from ..config.settings import (
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_MEMORY_ENTRIES,
+)
+from ..imaging.pipeline import operation_params
+from ..imaging.store import REF_PREFIX, image_store
+from .store import CacheStats
+
+# Bump whenever an operation's output changes for the same inputs
+OPERATION_VERSION = "1"
+
+
+def result_key(tasks: Sequence[str], params: Dict[str, str], input_hash: Optional[str]) -> str:
+    """Key of the output of running `tasks` in order on the input with `input_hash`."""
+    if len(tasks) == 1:
+        operations = [tasks[0], operation_params(tasks[0], params)]
+    else:
+        operations = [[task, operation_params(task, params)] for task in tasks]
+    payload = json.dumps([OPERATION_VERSION, *operations, input_hash], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """Directory of PNG files bounded by total size, evicting least recently used."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # key -> size, oldest access first; rebuilt from file times on start-up
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".png"):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+        self._total = sum(self._sizes.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key: str) -> Optional[Image.Image]:
+        path = self._path(key)
+        try:
+            with Image.open(path) as opened:
+                opened.load()
+                image = opened.copy()
+            # File times carry recency across processes and restarts
+            os.utime(path)
+        except (FileNotFoundError, OSError):
+            with self._lock:
+                self._total -= self._sizes.pop(key, 0)
+            return None
+        with self._lock:
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+        return image
+
+    def put(self, key: str, image: Image.Image) -> None:
+        path = self._path(key)
+        # Unique per process and thread: several processes may share the directory
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        image.save(temp_path, format="PNG", compress_level=1)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._total += size - self._sizes.pop(key, 0)
+            self._sizes[key] = size
+            while self._total > self.max_bytes and len(self._sizes) > 1:
+                oldest, oldest_size = self._sizes.popitem(last=False)
+                self._total -= oldest_size
+                self.stats.evictions += 1
+                try:
+                    os.remove(self._path(oldest))
+                except FileNotFoundError:
+                    pass
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+
+class ResultCache:
+    def __init__(self, blobs: BlobStore, memory_entries: int = RESULT_CACHE_MEMORY_ENTRIES):
+        self.blobs = blobs
+        self.memory_entries = memory_entries
+        # One set of counters: hits and misses here, evictions from the blob store
+        self.stats = blobs.stats
+        self._refs: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        # PNG encoding stays off the agents' critical path
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-cache-writer")
+
+    def _remember(self, key: str, ref: str) -> None:
+        with self._lock:
+            self._refs[key] = ref
+            self._refs.move_to_end(key)
+            while len(self._refs) > self.memory_entries:
+                self._refs.popitem(last=False)
+
+    def get(
+        self, tasks: Sequence[str], params: Dict[str, str], input_hash: Optional[str]
+    ) -> Optional[Tuple[Image.Image, str]]:
+        """Cached output of the chain `tasks` and its content hash, or None."""
+        key = result_key(tasks, params, input_hash)
+        with self._lock:
+            ref = self._refs.get(key)
+        if ref is not None and ref in image_store:
+            with self._lock:
+                self.stats.memory_hits += 1
+            return image_store.get(ref), ref[len(REF_PREFIX):]
+
+        image = self.blobs.get(key)
+        if image is None:
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        ref = image_store.put(image)
+        self._remember(key, ref)
+        with self._lock:
+            self.stats.disk_hits += 1
+        return image, ref[len(REF_PREFIX):]
+
+    def put(self, tasks: Sequence[str], params: Dict[str, str], input_hash: Optional[str], image: Image.Image) -> str:
+        """Record the output of the chain `tasks` and return its content hash."""
+        key = result_key(tasks, params, input_hash)
+        ref = image_store.put(image)
+        self._remember(key, ref)
+        with self._lock:
+            self.stats.writes += 1
+        self._writer.submit(self.blobs.put, key, image)
+        return ref[len(REF_PREFIX):]
+
+    def flush(self) -> None:
+        """Wait for pending blob writes."""
+        self._writer.submit(lambda: None).result()
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Process-wide result cache configured from settings, or None when disabled."""
+    global _result_cache
+    if not RESULT_CACHE_ENABLED:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(BlobStore(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES))
+    return _result_cache
@@ -0,0 +1,64 @@
+"""
+Routing-decision cache for the supervisor.
+
+The supervisor calls the LLM with temperature 0, so the same (request, current task)
+pair always routes the same way. Keys are built from a normalized form of the
+request plus everything that can change the answer: the prompt version, the model
+and the kind of decision being made.
+"""
+
+import hashlib
+import json
+import re
+from typing import Optional
+
+from ..config.settings import (
+    ROUTING_CACHE_ENABLED,
+    ROUTING_CACHE_PATH,
+    ROUTING_CACHE_MEMORY_ENTRIES,
+    ROUTING_CACHE_MAX_ENTRIES,
+    ROUTING_CACHE_TTL_SECONDS,
+)
+from .store import TwoTierCache
+
+# Quoted literals are overlay text; they never change which agent runs next
+_QUOTED = re.compile(r"""(?<!\w)(['"‘“])(.+?)(['"’”])(?!\w)""")
+_WHITESPACE = re.compile(r"\s+")
+
+_routing_cache: Optional[TwoTierCache] = None
+
+
+def normalize_request(request: str) -> str:
+    text = _QUOTED.sub(' "<text>" ', request.lower())
+    text = _WHITESPACE.sub(" ", text)
+    return text.strip(" .!?")
+
+
+def routing_key(kind: str, request: str, prompt_version: str, model: str, **context) -> str:
+    payload = json.dumps(
+        {
+            "kind": kind,
+            "request": normalize_request(request),
+            "prompt_version": prompt_version,
+            "model": model,
+            "context": context,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_routing_cache() -> Optional[TwoTierCache]:
+    """Process-wide routing cache, or None when caching is disabled."""
+    global _routing_cache
+    if not ROUTING_CACHE_ENABLED:
+        return None
+    if _routing_cache is None:
+        _routing_cache = TwoTierCache(
+            ROUTING_CACHE_PATH,
+            namespace="routing",
+            memory_entries=ROUTING_CACHE_MEMORY_ENTRIES,
+            max_entries=ROUTING_CACHE_MAX_ENTRIES,
+            ttl_seconds=ROUTING_CACHE_TTL_SECONDS,
+        )
+    return _routing_cache
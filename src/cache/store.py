@@ -0,0 +1,176 @@
+"""
+Two-tier key/value cache: an in-process LRU in front of a shared SQLite file.
+
+The SQLite tier survives process restarts and can be shared by several processes
+(the CLI and the evaluation harness point at the same file). Entries expire after
+a TTL, and each namespace is capped at a maximum number of rows, evicting the
+least recently used ones first.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# How many writes between size-eviction sweeps of the disk tier
+_EVICTION_INTERVAL = 64
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TwoTierCache:
+    def __init__(
+        self,
+        path: Optional[str],
+        namespace: str,
+        memory_entries: int = 1024,
+        max_entries: int = 100_000,
+        ttl_seconds: float = 7 * 24 * 3600,
+    ):
+        self.namespace = namespace
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self._db = self._connect(path) if path else None
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        # WAL lets the CLI and the evaluation harness read while the other writes
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, accessed_at)"
+        )
+        db.commit()
+        return db
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if now - created_at < self.ttl_seconds:
+                        self._db.execute(
+                            "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                            (now, self.namespace, key),
+                        )
+                        self._db.commit()
+                        self._remember(key, value, created_at)
+                        self.stats.disk_hits += 1
+                        return value
+                    self._db.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (self.namespace, key),
+                    )
+                    self._db.commit()
+                    self.stats.evictions += 1
+
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self.stats.writes += 1
+            if self._db is None:
+                return
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, value, now, now),
+            )
+            self._writes_since_sweep += 1
+            if self._writes_since_sweep >= _EVICTION_INTERVAL:
+                self._sweep(now)
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _sweep(self, now: float) -> None:
+        # Drop expired rows, then trim the namespace to its size cap by LRU order
+        self._writes_since_sweep = 0
+        expired = self._db.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+            (self.namespace, now - self.ttl_seconds),
+        ).rowcount
+        (count,) = self._db.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        overflow = max(count - self.max_entries, 0)
+        if overflow:
+            self._db.execute(
+                """
+                DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY accessed_at ASC LIMIT ?
+                )
+                """,
+                (self.namespace, self.namespace, overflow),
+            )
+        self.stats.evictions += expired + overflow
@@ -10,4 +10,117 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SUPERVISOR_MODEL = "gpt-4"
 SUPERVISOR_TEMPERATURE = 0
 
+# Route unambiguous requests with the keyword fast path instead of the LLM
+SUPERVISOR_FAST_PATH = os.getenv("SUPERVISOR_FAST_PATH", "true").lower() == "true"
+
+# Opt-in: ask the LLM for the whole task sequence once instead of once per hop
+SUPERVISOR_PLANNING = os.getenv("SUPERVISOR_PLANNING", "false").lower() == "true"
+SUPERVISOR_MAX_REPLANS = int(os.getenv("SUPERVISOR_MAX_REPLANS", "1"))
+
+# Supervisor prompts: "verbose" (the original prose prompt) or opt-in "compact" (checklist state, token-budgeted)
+SUPERVISOR_PROMPT_STYLE = os.getenv("SUPERVISOR_PROMPT_STYLE", "verbose")
+SUPERVISOR_CONTEXT_TOKENS = int(os.getenv("SUPERVISOR_CONTEXT_TOKENS", "384"))  # per compact call, system prompt included
+
+# Shared LLM gateway (src.llm.gateway): pooled connections, client-side rate limits, retries, request coalescing
+LLM_RPM_LIMIT = int(os.getenv("LLM_RPM_LIMIT", "500"))  # requests per minute across the process, 0 for no limit
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "300000"))  # tokens per minute across the process, 0 for no limit
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))  # on 429, 5xx, timeouts and connection errors
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "20"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))  # pooled HTTP connections per client
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_COALESCE = os.getenv("LLM_COALESCE", "true").lower() == "true"  # share identical in-flight temperature-0 calls
+
+# Routing cache shared by the CLI and the evaluation harness
+ROUTING_CACHE_ENABLED = os.getenv("ROUTING_CACHE_ENABLED", "true").lower() == "true"
+ROUTING_CACHE_PATH = os.getenv("ROUTING_CACHE_PATH", os.path.join(".cache", "routing_cache.sqlite3"))
+ROUTING_CACHE_MEMORY_ENTRIES = int(os.getenv("ROUTING_CACHE_MEMORY_ENTRIES", "1024"))
+ROUTING_CACHE_MAX_ENTRIES = int(os.getenv("ROUTING_CACHE_MAX_ENTRIES", "100000"))
+ROUTING_CACHE_TTL_SECONDS = float(os.getenv("ROUTING_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Evaluation harness
+EVAL_DATASET_NAME = os.getenv("EVAL_DATASET_NAME", "image_processing_agent")
+EVAL_DATASET_PATH = os.getenv("EVAL_DATASET_PATH", os.path.join("datasets", "image_processing_agent.jsonl"))
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "8"))  # examples evaluated at once
+EVAL_REPETITIONS = int(os.getenv("EVAL_REPETITIONS", "1"))
+JUDGE_MODEL = os.getenv("JUDGE_MODEL", "gpt-4")
+JUDGE_CONCURRENCY = int(os.getenv("JUDGE_CONCURRENCY", "8"))  # judge calls in flight
+JUDGE_CACHE_ENABLED = os.getenv("JUDGE_CACHE_ENABLED", "true").lower() == "true"
+JUDGE_CACHE_PATH = os.getenv("JUDGE_CACHE_PATH", ROUTING_CACHE_PATH)
+
+# Batch processing
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_TIMEOUT_SECONDS = float(os.getenv("BATCH_TIMEOUT_SECONDS", "120"))
+
+# Image processing
+IMAGE_SIZE = (int(os.getenv("IMAGE_WIDTH", "512")), int(os.getenv("IMAGE_HEIGHT", "512")))
+BACKGROUND_THRESHOLD = int(os.getenv("BACKGROUND_THRESHOLD", "60"))
+BACKGROUND_METHOD = os.getenv("BACKGROUND_METHOD", "color")  # "color" or "edge"
+BACKGROUND_TILE_SIZE = int(os.getenv("BACKGROUND_TILE_SIZE", "1024"))
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "1"))
+BACKGROUND_MORPH_RADIUS = int(os.getenv("BACKGROUND_MORPH_RADIUS", "1"))
+IMAGE_STORE_CAPACITY = int(os.getenv("IMAGE_STORE_CAPACITY", "256"))
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
+
+# Run a known multi-step plan as one fused image pipeline instead of one agent per hop
+FUSED_EXECUTION = os.getenv("FUSED_EXECUTION", "false").lower() == "true"
+
+# Run independent work (image variants, a text layer alongside background removal) as parallel branches
+PARALLEL_BRANCHES = os.getenv("PARALLEL_BRANCHES", "false").lower() == "true"
+MAX_BRANCHES = int(os.getenv("MAX_BRANCHES", "8"))  # upper bound on variants per request
+
+# Offload CPU-bound agent work to worker pools ("agent=process|thread:workers,...")
+WORKER_POOLS_ENABLED = os.getenv("WORKER_POOLS_ENABLED", "false").lower() == "true"
+WORKER_POOL_SIZES = os.getenv(
+    "WORKER_POOL_SIZES",
+    "background_removal=process:2,fused_pipeline=process:2,text_overlay=thread:2,image_generation=thread:2",
+)
+WORKER_POOL_MAX_PENDING = int(os.getenv("WORKER_POOL_MAX_PENDING", "8"))
+
+# Per-node latency, token and state-size instrumentation
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "true").lower() == "true"
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "10000"))  # samples kept per node for percentiles
+# Share of node executions whose incoming state is pickled to record its size (0 disables; it costs O(history))
+METRICS_STATE_SAMPLE_RATE = float(os.getenv("METRICS_STATE_SAMPLE_RATE", "0"))
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH")  # one JSON event per node/LLM call when set
+METRICS_PROMETHEUS_PATH = os.getenv("METRICS_PROMETHEUS_PATH")  # Prometheus text file written after runs
+LLM_PROMPT_COST_PER_1K = float(os.getenv("LLM_PROMPT_COST_PER_1K", "0.03"))
+LLM_COMPLETION_COST_PER_1K = float(os.getenv("LLM_COMPLETION_COST_PER_1K", "0.06"))
+
+# Durable checkpoints after every node, resumable by thread id
+CHECKPOINTING_ENABLED = os.getenv("CHECKPOINTING_ENABLED", "false").lower() == "true"
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", os.path.join(".cache", "checkpoints.sqlite3"))
+IMAGE_BLOB_DIR = os.getenv("IMAGE_BLOB_DIR", os.path.join(".cache", "images"))
+
+# Content-addressed cache of image operation results (opt in: a miss adds a PNG encode and disk write off the hot path)
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "false").lower() == "true"
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(".cache", "results"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+RESULT_CACHE_MEMORY_ENTRIES = int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", "1024"))
+
+# Graph visualization, rendered only on demand and cached by graph hash
+GRAPH_CACHE_DIR = os.getenv("GRAPH_CACHE_DIR", os.path.join(".cache", "graphs"))
+GRAPH_RENDER_METHOD = os.getenv("GRAPH_RENDER_METHOD", "api")  # "api" (mermaid.ink) or "pyppeteer"
+
+# Per-run safeguards in the supervisor loop; a run that hits one ends early with its partial result
+WORKFLOW_MAX_HOPS = int(os.getenv("WORKFLOW_MAX_HOPS", "10"))  # supervisor decisions, below LangGraph's 25-step recursion limit
+WORKFLOW_MAX_COST_USD = float(os.getenv("WORKFLOW_MAX_COST_USD", "0.5"))  # supervisor LLM spend, 0 for no limit
+SUPERVISOR_LOOP_REPEATS = int(os.getenv("SUPERVISOR_LOOP_REPEATS", "3"))  # same routing cycle in a row that counts as a loop
+
+# Priority/deadline scheduling of LLM calls and image hops across concurrent runs (async graph only)
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "false").lower() == "true"
+SCHEDULER_LLM_SLOTS = int(os.getenv("SCHEDULER_LLM_SLOTS", "8"))  # supervisor LLM calls at once
+SCHEDULER_CPU_SLOTS = int(os.getenv("SCHEDULER_CPU_SLOTS", str(os.cpu_count() or 4)))  # image agent nodes at once
+SCHEDULER_AGING_SECONDS = float(os.getenv("SCHEDULER_AGING_SECONDS", "5"))  # waiting this long ranks a run one task shorter
+
+# HTTP service (src.server)
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "32"))  # jobs running at once, across tenants
+SERVER_QUEUE_SIZE = int(os.getenv("SERVER_QUEUE_SIZE", "1000"))  # jobs waiting before submissions get 429
+SERVER_TENANT_CONCURRENCY = int(os.getenv("SERVER_TENANT_CONCURRENCY", "8"))
+SERVER_TENANT_MAX_QUEUED = int(os.getenv("SERVER_TENANT_MAX_QUEUED", "200"))
+SERVER_JOB_RETENTION = int(os.getenv("SERVER_JOB_RETENTION", "10000"))  # finished jobs kept for polling
+SERVER_DRAIN_SECONDS = float(os.getenv("SERVER_DRAIN_SECONDS", "30"))
+
 # Other settings can be added here as needed
@@ -0,0 +1,221 @@
+"""
+Aggregation of evaluation results.
+
+Works on the experiment DataFrame from LangSmith's `to_pandas()` and on rows
+written by the offline runner (JSONL or Parquet), which share column names:
+`feedback.<evaluator>` scores, `execution_time` in seconds, `error`,
+`reference.expected_sequence` and, for offline runs, per-node wall time in
+`outputs.node_ms`. Every statistic is computed with column-wise pandas
+operations over the whole experiment, so reports stay fast at tens of
+thousands of rows.
+
+Usage:
+    python -m src.evaluation.analysis results.jsonl --summary summary.parquet
+    python -m src.evaluation.analysis results.jsonl --baseline previous.jsonl --score-tolerance 0.02
+"""
+
+import argparse
+import sys
+from typing import Dict, Optional
+
+import pandas as pd
+
+FEEDBACK_PREFIX = "feedback."
+QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+
+def load_results(path: str) -> pd.DataFrame:
+    """Rows of an evaluation run from a JSONL or Parquet file."""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_json(path, lines=True, dtype=False)
+
+
+def write_results(df: pd.DataFrame, path: str) -> str:
+    """Write experiment rows as JSON lines, readable by `load_results`."""
+    df.to_json(path, orient="records", lines=True, default_handler=str)
+    return path
+
+
+def feedback_scores(df: pd.DataFrame) -> pd.DataFrame:
+    """One numeric column per evaluator, named without the `feedback.` prefix."""
+    columns = [column for column in df.columns if column.startswith(FEEDBACK_PREFIX)]
+    scores = df[columns].apply(pd.to_numeric, errors="coerce")
+    scores.columns = [column[len(FEEDBACK_PREFIX):] for column in columns]
+    return scores
+
+
+def _shapes(df: pd.DataFrame) -> pd.Series:
+    if "reference.expected_sequence" not in df:
+        return pd.Series("all", index=df.index)
+    # "Image Generation Agent: ..." -> "Image Generation"
+    agents = df["reference.expected_sequence"].map(
+        lambda sequence: " → ".join(step.split(" Agent:")[0] for step in sequence)
+    )
+    return agents.rename("shape")
+
+
+def score_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """Runs, mean, spread and pass rate per evaluator."""
+    scores = feedback_scores(df)
+    runs = scores.count()
+    return pd.DataFrame({
+        "runs": runs,
+        "mean": scores.mean(),
+        "std": scores.std(ddof=0),
+        "pass_rate": scores.ge(1.0).sum() / runs.where(runs > 0),
+        "failures": scores.lt(1.0).sum(),
+    })
+
+
+def latency_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """Latency distribution of whole runs and, when recorded, of every node, in ms."""
+    columns = {"total": pd.to_numeric(df["execution_time"], errors="coerce") * 1000}
+    if "outputs.node_ms" in df:
+        # Wide frame: one column per node, NaN where a run did not execute it
+        nodes = pd.DataFrame.from_records(
+            df["outputs.node_ms"].map(lambda value: value if isinstance(value, dict) else {}).tolist(),
+            index=df.index,
+        )
+        columns.update({node: nodes[node] for node in sorted(nodes.columns)})
+    wide = pd.DataFrame(columns)
+
+    summary = pd.DataFrame({"runs": wide.count(), "mean_ms": wide.mean()})
+    quantiles = wide.quantile(list(QUANTILES.values())).T
+    quantiles.columns = [f"{name}_ms" for name in QUANTILES]
+    summary = summary.join(quantiles)
+    summary["max_ms"] = wide.max()
+    return summary
+
+
+def failure_breakdown(df: pd.DataFrame) -> pd.DataFrame:
+    """Failure rate of every evaluator and error count, per task sequence."""
+    scores = feedback_scores(df)
+    shapes = _shapes(df)
+    failed = scores.lt(1.0).where(scores.notna())
+    breakdown = failed.groupby(shapes).mean()
+    breakdown.insert(0, "runs", shapes.value_counts())
+    if "error" in df:
+        breakdown["errors"] = df["error"].notna().groupby(shapes).sum()
+    return breakdown.sort_values("runs", ascending=False)
+
+
+def error_counts(df: pd.DataFrame) -> pd.Series:
+    """Most frequent run errors, by their first line."""
+    if "error" not in df:
+        return pd.Series(dtype="int64", name="runs")
+    errors = df["error"].dropna().astype(str).str.split("\n").str[0].str.slice(0, 120)
+    return errors.value_counts().rename("runs")
+
+
+def summarize(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    return {
+        "scores": score_summary(df),
+        "latency": latency_summary(df),
+        "failures": failure_breakdown(df),
+    }
+
+
+def compare_experiments(
+    baseline: pd.DataFrame,
+    current: pd.DataFrame,
+    score_tolerance: float = 0.01,
+    latency_tolerance: float = 0.10,
+) -> pd.DataFrame:
+    """Metric-by-metric comparison of two experiments, flagging regressions.
+
+    A mean score lower than the baseline's by more than `score_tolerance`
+    (absolute), or a p50/p95 latency higher by more than `latency_tolerance`
+    (relative), is a regression. When both experiments carry `example_id`,
+    `examples_worse` counts examples whose mean score dropped.
+    """
+    old_scores, new_scores = score_summary(baseline)["mean"], score_summary(current)["mean"]
+    scores = pd.DataFrame({"baseline": old_scores, "current": new_scores}).dropna()
+    scores["change"] = scores["current"] - scores["baseline"]
+    scores["regression"] = scores["change"] < -score_tolerance
+    scores.index = "score." + scores.index
+
+    old_latency, new_latency = latency_summary(baseline), latency_summary(current)
+    metrics = ["p50_ms", "p95_ms"]
+    latency = pd.DataFrame({
+        "baseline": old_latency[metrics].stack(),
+        "current": new_latency[metrics].stack(),
+    }).dropna()
+    latency["change"] = (latency["current"] - latency["baseline"]) / latency["baseline"]
+    latency["regression"] = latency["change"] > latency_tolerance
+    latency.index = ["latency." + ".".join(key) for key in latency.index]
+
+    comparison = pd.concat([scores, latency])
+    if "example_id" in baseline and "example_id" in current:
+        old = feedback_scores(baseline).groupby(baseline["example_id"]).mean()
+        new = feedback_scores(current).groupby(current["example_id"]).mean()
+        worse = new.sub(old).lt(-score_tolerance).sum()
+        worse = worse[worse.index.isin(scores.index.str[len("score."):])]
+        comparison["examples_worse"] = pd.Series(worse.values, index="score." + worse.index)
+    return comparison
+
+
+def summary_table(df: pd.DataFrame) -> pd.DataFrame:
+    """Every summary statistic as one long (section, name, metric, value) table."""
+    frames = []
+    for section, frame in summarize(df).items():
+        long = frame.rename_axis("name").reset_index().melt(id_vars="name", var_name="metric", value_name="value")
+        long.insert(0, "section", section)
+        frames.append(long)
+    table = pd.concat(frames, ignore_index=True)
+    table["name"] = table["name"].astype(str)
+    table["value"] = pd.to_numeric(table["value"], errors="coerce")
+    return table.dropna(subset=["value"])
+
+
+def write_summary(df: pd.DataFrame, path: str) -> str:
+    """Write the summary table as a compressed Parquet file (needs pyarrow)."""
+    table = summary_table(df)
+    for column in ("section", "name", "metric"):
+        table[column] = table[column].astype("category")
+    table.to_parquet(path, index=False, compression="zstd")
+    return path
+
+
+def format_report(df: pd.DataFrame, comparison: Optional[pd.DataFrame] = None) -> str:
+    sections = summarize(df)
+    lines = [f"📊 {len(df)} run(s)"]
+    lines += ["", "Scores by evaluator:", sections["scores"].round(3).to_string()]
+    lines += ["", "Latency (ms):", sections["latency"].round(1).to_string()]
+    lines += ["", "Failure rate by task sequence:", sections["failures"].round(3).to_string()]
+    errors = error_counts(df)
+    if not errors.empty:
+        lines += ["", "Most frequent errors:", errors.head(10).to_string()]
+    if comparison is not None:
+        lines += ["", "Comparison with baseline:", comparison.round(3).to_string()]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("results", help="Offline runner output (JSONL) or a Parquet file of rows")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    parser.add_argument("--summary", help="Write the summary table as Parquet here")
+    parser.add_argument("--score-tolerance", type=float, default=0.01, help="Allowed drop in mean score")
+    parser.add_argument("--latency-tolerance", type=float, default=0.10, help="Allowed relative latency increase")
+    args = parser.parse_args()
+
+    df = load_results(args.results)
+    comparison = None
+    if args.baseline:
+        comparison = compare_experiments(
+            load_results(args.baseline), df, args.score_tolerance, args.latency_tolerance
+        )
+    print(format_report(df, comparison))
+
+    if args.summary:
+        write_summary(df, args.summary)
+        print(f"\n💾 Summary written to {args.summary}")
+
+    if comparison is not None and comparison["regression"].any():
+        print(f"\n❌ Regressions: {', '.join(comparison.index[comparison['regression']])}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
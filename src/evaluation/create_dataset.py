@@ -1,45 +1,46 @@
-from langsmith import Client
-from langsmith.utils import LangSmithConflictError
+import os
+from typing import Optional
 
-def create_evaluation_dataset():
-    client = Client()
-    dataset_name = "image_processing_agent"
-    
-    # Just one test case
-    test_cases = [
-        {
-            "request": "Generate an image of a sunset and add 'Beautiful Evening' text",
-            "expected_sequence": [
-                "Image Generation Agent: Generated new image",
-                "Text Overlay Agent: Added text to image"
-            ]
-        }
-    ]
+from ..config.settings import EVAL_DATASET_NAME, EVAL_DATASET_PATH
+from .datasets import make_example, sync_to_langsmith, write_examples
+
+# Written to EVAL_DATASET_PATH when no dataset file exists yet
+DEFAULT_TEST_CASES = [
+    {
+        "request": "Generate an image of a sunset and add 'Beautiful Evening' text",
+        "expected_sequence": [
+            "Image Generation Agent: Generated new image",
+            "Text Overlay Agent: Added text to image"
+        ]
+    }
+]
+
+def create_evaluation_dataset(path: Optional[str] = None, dataset_name: str = EVAL_DATASET_NAME) -> Optional[str]:
+    """Sync the local dataset at `path` to LangSmith and return the dataset name.
+
+    Only examples added to or removed from the file since the last sync touch the
+    remote dataset; an unchanged file costs no LangSmith calls.
+    """
+    path = path or EVAL_DATASET_PATH
+    if not os.path.exists(path):
+        write_examples(path, (make_example(**case) for case in DEFAULT_TEST_CASES))
+        print(f"Created local dataset {path} with {len(DEFAULT_TEST_CASES)} example(s)")
     
     try:
-        # Delete existing dataset if it exists
-        existing_datasets = client.list_datasets()
-        for dataset in existing_datasets:
-            if dataset.name == dataset_name:
-                client.delete_dataset(dataset_id=dataset.id)
-                print(f"Deleted existing dataset: {dataset_name}")
-        
-        # Create new dataset
-        dataset = client.create_dataset(
-            dataset_name=dataset_name,
+        summary = sync_to_langsmith(
+            path,
+            dataset_name,
             description="Test cases for multi-agent image processing system"
         )
-        
-        # Add examples to the dataset
-        client.create_examples(
-            dataset_id=dataset.id,
-            inputs=[{"request": case["request"]} for case in test_cases],
-            outputs=[{"expected_sequence": case["expected_sequence"]} for case in test_cases]
-        )
-        
-        print(f"Created new dataset with {len(test_cases)} example(s)")
-        return dataset
+        if summary["skipped"]:
+            print(f"Dataset {dataset_name} is up to date ({summary['examples']} example(s))")
+        else:
+            print(
+                f"Synced dataset {dataset_name}: {summary['created']} added, "
+                f"{summary['deleted']} removed, {summary['unchanged']} unchanged"
+            )
+        return dataset_name
         
     except Exception as e:
-        print(f"Error creating dataset: {e}")
-        return None 
\ No newline at end of file
+        print(f"Error syncing dataset: {e}")
+        return None
@@ -0,0 +1,178 @@
+"""
+Local evaluation datasets.
+
+A dataset is a JSONL file with one example per line:
+
+    {"id": "3f2a...", "request": "Generate an image of ...", "expected_sequence": ["...", "..."]}
+
+`id` is a content hash of the request and expected sequence, so identical examples
+share an id and an edited example gets a new one. Files are read lazily, one line
+at a time, so datasets of any size can be streamed into the offline runner.
+
+`sync_to_langsmith` mirrors a file into a LangSmith dataset incrementally: only
+examples whose ids are missing remotely are uploaded, and only remote examples no
+longer in the file are deleted. A manifest next to the file remembers the last
+synced content, so an unchanged dataset costs no remote calls at all.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Examples uploaded per create_examples call
+_UPLOAD_CHUNK = 500
+
+
+@dataclass
+class LocalExample:
+    """One dataset example, shaped like a LangSmith `Example` for the evaluators."""
+
+    id: str
+    inputs: Dict
+    outputs: Dict
+    metadata: Dict = field(default_factory=dict)
+
+    @property
+    def request(self) -> str:
+        return self.inputs["request"]
+
+    @property
+    def expected_sequence(self) -> List[str]:
+        return self.outputs["expected_sequence"]
+
+
+def example_id(request: str, expected_sequence: List[str]) -> str:
+    payload = json.dumps([request, list(expected_sequence)], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def make_example(request: str, expected_sequence: List[str], **metadata) -> LocalExample:
+    return LocalExample(
+        id=example_id(request, expected_sequence),
+        inputs={"request": request},
+        outputs={"expected_sequence": list(expected_sequence)},
+        metadata=metadata,
+    )
+
+
+def iter_examples(path: str, limit: Optional[int] = None) -> Iterator[LocalExample]:
+    """Stream the examples in `path`, at most `limit` of them."""
+    count = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if limit is not None and count >= limit:
+                return
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            request, expected = record["request"], record["expected_sequence"]
+            yield LocalExample(
+                id=record.get("id") or example_id(request, expected),
+                inputs={"request": request},
+                outputs={"expected_sequence": expected},
+                metadata=record.get("metadata") or {},
+            )
+            count += 1
+
+
+def write_examples(path: str, examples: Iterable[LocalExample]) -> int:
+    """Write `examples` to `path` atomically and return how many were written."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    count = 0
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for example in examples:
+            record = {"id": example.id, "request": example.request, "expected_sequence": example.expected_sequence}
+            if example.metadata:
+                record["metadata"] = example.metadata
+            f.write(json.dumps(record) + "\n")
+            count += 1
+    os.replace(temp_path, path)
+    return count
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _manifest_path(path: str) -> str:
+    return f"{path}.langsmith.json"
+
+
+def sync_to_langsmith(path: str, dataset_name: str, client=None, description: Optional[str] = None) -> Dict:
+    """Bring the LangSmith dataset `dataset_name` in line with the file at `path`.
+
+    Returns a summary with the dataset id and how many examples were created,
+    deleted and left as they were.
+    """
+    digest = _file_digest(path)
+    manifest_path = _manifest_path(path)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("dataset_name") == dataset_name and manifest.get("digest") == digest:
+            return {**manifest, "created": 0, "deleted": 0, "unchanged": manifest["examples"], "skipped": True}
+
+    if client is None:
+        from langsmith import Client
+        client = Client()
+
+    # One lookup by name instead of scanning every dataset
+    if client.has_dataset(dataset_name=dataset_name):
+        dataset = client.read_dataset(dataset_name=dataset_name)
+    else:
+        dataset = client.create_dataset(dataset_name=dataset_name, description=description)
+
+    remote: Dict[str, str] = {}
+    stale: List[str] = []
+    for example in client.list_examples(dataset_id=dataset.id):
+        local_id = (example.metadata or {}).get("local_id")
+        if local_id is None or local_id in remote:
+            stale.append(example.id)
+        else:
+            remote[local_id] = example.id
+
+    seen = set()
+    batch: List[Dict] = []
+    created = 0
+    for example in iter_examples(path):
+        if example.id in seen:
+            continue
+        seen.add(example.id)
+        if example.id in remote:
+            continue
+        batch.append({
+            "inputs": example.inputs,
+            "outputs": example.outputs,
+            "metadata": {**example.metadata, "local_id": example.id},
+        })
+        if len(batch) >= _UPLOAD_CHUNK:
+            client.create_examples(dataset_id=dataset.id, examples=batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        client.create_examples(dataset_id=dataset.id, examples=batch)
+        created += len(batch)
+
+    stale.extend(remote_id for local_id, remote_id in remote.items() if local_id not in seen)
+    if stale:
+        client.delete_examples(stale)
+
+    manifest = {
+        "dataset_name": dataset_name,
+        "dataset_id": str(dataset.id),
+        "digest": digest,
+        "examples": len(seen),
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return {**manifest, "created": created, "deleted": len(stale), "unchanged": len(seen) - created, "skipped": False}
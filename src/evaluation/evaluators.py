@@ -7,90 +7,170 @@ This module implements three key evaluation criteria:
 3. Individual Node Execution: Checks specific node/agent performance
 
 Each evaluator returns a score (0.0-1.0) and detailed reasoning.
+
+Only task completion needs judgement, and only when the agent sequence differs
+from the expected one; the other two criteria are exact sequence and containment
+checks and run locally. Judge calls go through the shared LLM gateway (pooled
+connections, rate limits, retries, and one call for identical prompts in flight),
+are bounded by `JUDGE_CONCURRENCY` and are cached by a hash of their input.
 """
 
-from typing import Dict
+from typing import TYPE_CHECKING, Any, Dict, List
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
-from langsmith.schemas import Run, Example
+import asyncio
 import json
+import weakref
+
+from ..cache.judge import get_judge_cache, judge_key
+from ..config.settings import JUDGE_CONCURRENCY, JUDGE_MODEL
+from ..llm.gateway import ChatModel, get_gateway
+
+if TYPE_CHECKING:
+    from langsmith.schemas import Run, Example
+
+# Bump whenever a judge prompt changes so cached verdicts are invalidated
+JUDGE_PROMPT_VERSION = "1"
+
+JUDGE = ChatModel(JUDGE_MODEL, temperature=0)
+
+# Per event loop (asyncio primitives cannot be shared across loops): a semaphore
+# bounding judge calls in flight
+_judge_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+async def _call_judge(instructions: str, content: str) -> str:
+    loop = asyncio.get_running_loop()
+    if loop not in _judge_slots:
+        _judge_slots[loop] = asyncio.Semaphore(JUDGE_CONCURRENCY)
+    async with _judge_slots[loop]:
+        response = await get_gateway().ainvoke(
+            JUDGE,
+            [
+                SystemMessage(content=instructions),
+                HumanMessage(content=content)
+            ]
+        )
+    return response.content
 
-# Initialize judge LLM
-judge_llm = ChatOpenAI(
-    model="gpt-4",
-    temperature=0
-)
+async def ask_judge(instructions: str, content: str) -> str:
+    """Judge verdict for a prompt, served from the judge cache when possible.
 
-async def evaluate_task_completion(run: Run, example: Example) -> Dict:
+    Identical prompts judged at the same time (repetitions of one example) share a
+    single call in the gateway.
+    """
+    key = judge_key(JUDGE_MODEL, JUDGE_PROMPT_VERSION, instructions, content)
+    cache = get_judge_cache()
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    verdict = await _call_judge(instructions, content)
+    if cache is not None:
+        cache.set(key, verdict)
+    return verdict
+
+def _field(msg: Any, name: str) -> Any:
+    # Messages arrive as dicts from LangSmith and as objects from a local run
+    if isinstance(msg, dict):
+        return msg.get(name)
+    return getattr(msg, name, None)
+
+def agent_messages(outputs: Dict) -> List[str]:
+    """Contents of the agent action messages in a run's output state, in order."""
+    return [
+        _field(msg, "content") for msg in outputs.get("messages", [])
+        if _field(msg, "role") == "system" and "Agent:" in (_field(msg, "content") or "")
+    ]
+
+def check_sequence_match(run: "Run", example: "Example") -> Dict:
+    """
+    Task completion without a judge: the agent actions must match the expected
+    sequence exactly. Used by offline runs that cannot reach the judge.
+    """
+    try:
+        actual_sequence = agent_messages(run.outputs)
+        expected_sequence = list(example.outputs["expected_sequence"])
+        if actual_sequence == expected_sequence:
+            return {"score": 1.0, "reasoning": "CORRECT - the actions match the expected sequence exactly"}
+        return {
+            "score": 0.0,
+            "reasoning": f"INCORRECT - expected {json.dumps(expected_sequence)}, got {json.dumps(actual_sequence)}"
+        }
+
+    except Exception as e:
+        return {
+            "score": 0.0,
+            "reasoning": f"Error during evaluation: {str(e)}"
+        }
+
+async def evaluate_task_completion(run: "Run", example: "Example") -> Dict:
     """
     Evaluation Criteria 1: Task Completion
-    
+
     Evaluates if the multi-agent system as a whole completed all requested tasks correctly.
     Considers:
     - All required tasks were completed
     - Tasks were done in logical order
     - Final output matches requirements
+
+    A run that matches the expected sequence exactly is correct without asking the judge.
     """
     try:
+        exact = check_sequence_match(run, example)
+        if exact["score"] == 1.0:
+            return exact
+
         # Extract actual sequence from run outputs
-        actual_sequence = [
-            msg["content"] for msg in run.outputs["messages"] 
-            if msg.get("role") == "system" and "Agent:" in msg.get("content", "")
-        ]
-        
+        actual_sequence = agent_messages(run.outputs)
+
         # Get expected sequence from example
         expected_sequence = example.outputs["expected_sequence"]
-        
+
         # Prepare instructions for the judge
         instructions = """
         You are an evaluation judge. Given the actual sequence of agent actions and the expected sequence,
         determine if the workflow completed all required tasks correctly.
-        
+
         Consider:
         1. Were all expected actions performed?
         2. Were they performed in a logical order?
         3. Did any unexpected or unnecessary actions occur?
-        
+
         Respond with either 'CORRECT' or 'INCORRECT', followed by a brief explanation.
         """
-        
+
         # Prepare the comparison message
         comparison_msg = f"""
         Original Request: {run.inputs.get('request', 'No request found')}
-        
+
         EXPECTED SEQUENCE:
         {json.dumps(expected_sequence, indent=2)}
-        
+
         ACTUAL SEQUENCE:
         {json.dumps(actual_sequence, indent=2)}
         """
-        
+
         # Get judge's evaluation
-        response = await judge_llm.ainvoke(
-            [
-                {"role": "system", "content": instructions},
-                {"role": "user", "content": comparison_msg}
-            ]
-        )
-        
+        verdict = await ask_judge(instructions, comparison_msg)
+
         # Parse the response
-        is_correct = response.content.upper().startswith("CORRECT")
-        
+        is_correct = verdict.upper().startswith("CORRECT")
+
         return {
             "score": 1.0 if is_correct else 0.0,
-            "reasoning": response.content
+            "reasoning": verdict
         }
-        
+
     except Exception as e:
         return {
             "score": 0.0,
             "reasoning": f"Error during evaluation: {str(e)}"
         }
 
-async def check_node_execution(run: Run, example: Example) -> Dict:
+def check_node_execution(run: "Run", example: "Example") -> Dict:
     """
     Evaluation Criteria 2: Node Execution Path
-    
+
     Analyzes the sequence of agent executions to verify correct workflow.
     Checks:
     - All necessary agents were involved
@@ -98,57 +178,24 @@ async def check_node_execution(run: Run, example: Example) -> Dict:
     - No unnecessary agent invocations
     """
     try:
-        judge_llm = ChatOpenAI(model="gpt-4", temperature=0)
-        
-        # Extract agent messages and their sequence
-        agent_messages = [
-            msg["content"] for msg in run.outputs["messages"] 
-            if msg.get("role") == "system" and "Agent:" in msg.get("content", "")
-        ]
-        
-        # Extract agent sequence from messages
-        agent_sequence = [
-            msg.split("Agent:")[0].strip() 
-            for msg in agent_messages
-        ]
-        
-        instructions = """
-        You are an evaluation judge analyzing workflow execution. Given the sequence of agent actions,
-        determine if:
-        
-        1. All necessary agents were involved based on the request
-        2. The agents executed their tasks in the correct order
-        3. The sequence makes logical sense for the task
-        
-        Respond with either 'CORRECT' or 'INCORRECT', followed by a brief analysis.
-        """
-        
-        comparison_msg = f"""
-        Original Request: {run.inputs.get('request', 'No request found')}
-        
-        EXPECTED WORKFLOW:
-        {json.dumps(example.outputs["expected_sequence"], indent=2)}
-        
-        ACTUAL EXECUTIONS:
-        {json.dumps(agent_messages, indent=2)}
-        
-        Agent Sequence: {json.dumps(agent_sequence, indent=2)}
-        """
-        
-        response = await judge_llm.ainvoke(
-            [
-                {"role": "system", "content": instructions},
-                {"role": "user", "content": comparison_msg}
-            ]
-        )
-        
-        is_correct = response.content.upper().startswith("CORRECT")
-        
-        return {
-            "score": 1.0 if is_correct else 0.0,
-            "reasoning": response.content
-        }
-        
+        # Agent names, in execution order
+        actual = [msg.split("Agent:")[0].strip() for msg in agent_messages(run.outputs)]
+        expected = [msg.split("Agent:")[0].strip() for msg in example.outputs["expected_sequence"]]
+
+        if actual == expected:
+            return {"score": 1.0, "reasoning": f"CORRECT - agents ran in the expected order: {' → '.join(actual)}"}
+
+        missing = [agent for agent in expected if agent not in actual]
+        unexpected = [agent for agent in actual if agent not in expected]
+        problems = []
+        if missing:
+            problems.append(f"missing {', '.join(missing)}")
+        if unexpected:
+            problems.append(f"unexpected {', '.join(unexpected)}")
+        if not problems:
+            problems.append(f"ran as {' → '.join(actual)} instead of {' → '.join(expected)}")
+        return {"score": 0.0, "reasoning": f"INCORRECT - {'; '.join(problems)}"}
+
     except Exception as e:
         return {
             "score": 0.0,
@@ -156,53 +203,28 @@ async def check_node_execution(run: Run, example: Example) -> Dict:
         }
 
 
-async def check_image_generation_node(run: Run, example: Example) -> Dict:
+def check_image_generation_node(run: "Run", example: "Example") -> Dict:
     """
     Evaluation Criteria 3: Individual Node Execution
-    
+
     Example of individual node evaluation, focusing on Image Generation Agent.
     Verifies:
     - If the specific agent was called
     - Simple binary check of agent involvement
     """
     try:
-        judge_llm = ChatOpenAI(model="gpt-4", temperature=0)
-        
         # Extract messages specifically from Image Generation Agent
         image_gen_messages = [
-            msg["content"] for msg in run.outputs.get("messages", [])
-            if msg.get("role") == "system" and "Image Generation Agent:" in msg.get("content", "")
+            msg for msg in agent_messages(run.outputs)
+            if "Image Generation Agent:" in msg
         ]
-        
-        instructions = """
-        You are an evaluation judge. Your only task is to check if the Image Generation Agent was called.
-        
-        Respond with:
-        - 'CORRECT' if you see any messages from the Image Generation Agent
-        - 'INCORRECT' if there are no messages from the Image Generation Agent
-        """
-        
-        comparison_msg = f"""
-        Messages from Image Generation Agent:
-        {json.dumps(image_gen_messages, indent=2)}
-        """
-        
-        response = await judge_llm.ainvoke(
-            [
-                {"role": "system", "content": instructions},
-                {"role": "user", "content": comparison_msg}
-            ]
-        )
-        
-        is_correct = response.content.upper().startswith("CORRECT")
-        
-        return {
-            "score": 1.0 if is_correct else 0.0,
-            "reasoning": response.content
-        }
-        
+
+        if image_gen_messages:
+            return {"score": 1.0, "reasoning": f"CORRECT - {len(image_gen_messages)} Image Generation Agent message(s)"}
+        return {"score": 0.0, "reasoning": "INCORRECT - the Image Generation Agent was not called"}
+
     except Exception as e:
         return {
             "score": 0.0,
             "reasoning": f"Error during evaluation: {str(e)}"
-        } 
\ No newline at end of file
+        }
@@ -0,0 +1,210 @@
+"""
+Offline evaluation runner.
+
+Streams a local dataset through the async graph and the evaluators without
+LangSmith. Examples are read lazily and at most `--concurrency` runs are in
+flight, so datasets of thousands of examples use bounded memory. Fast-path
+requests need no network at all; `--no-judge` replaces the LLM-judged task
+completion check with an exact sequence match so nothing leaves the machine.
+
+One JSON line is written per (example, repetition), with column names matching
+LangSmith's `to_pandas()` (`inputs.request`, `reference.expected_sequence`,
+`feedback.<evaluator>`, `execution_time`), plus per-node wall time in
+`outputs.node_ms`.
+
+Usage:
+    python -m src.evaluation.offline datasets/synthetic.jsonl --concurrency 32 --output results.jsonl
+    python -m src.evaluation.offline datasets/synthetic.jsonl --no-judge --limit 500
+"""
+
+import argparse
+import asyncio
+import contextlib
+import inspect
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Tuple
+
+from dotenv import load_dotenv
+
+from ..agent_types.state import create_initial_state
+from ..cache.judge import get_judge_cache
+from ..config.settings import BATCH_TIMEOUT_SECONDS, EVAL_CONCURRENCY, EVAL_REPETITIONS
+from ..llm.gateway import get_gateway
+from .datasets import LocalExample, iter_examples
+from .evaluators import (
+    check_image_generation_node,
+    check_node_execution,
+    check_sequence_match,
+    evaluate_task_completion,
+)
+
+JUDGED_EVALUATORS = [evaluate_task_completion, check_node_execution, check_image_generation_node]
+LOCAL_EVALUATORS = [check_sequence_match, check_node_execution, check_image_generation_node]
+
+
+@dataclass
+class LocalRun:
+    """The parts of a LangSmith `Run` the evaluators read."""
+
+    inputs: Dict
+    outputs: Dict
+
+
+def _message_content(msg) -> str:
+    return msg.content if hasattr(msg, "content") else msg.get("content", str(msg))
+
+
+async def _run_workflow(workflow, request: str) -> Tuple[Dict, Dict[str, float]]:
+    """Final state of one run and the wall time spent in each node, in ms."""
+    node_ms: Dict[str, float] = {}
+    final_state: Dict = {}
+    last = time.perf_counter()
+    initial_state = create_initial_state({"role": "user", "content": request})
+    async for mode, chunk in workflow.astream(initial_state, stream_mode=["updates", "values"]):
+        if mode == "values":
+            final_state = chunk
+            continue
+        now = time.perf_counter()
+        for node in chunk:
+            node_ms[node] = round(node_ms.get(node, 0.0) + (now - last) * 1000, 1)
+        last = now
+    return final_state, node_ms
+
+
+async def _evaluate_one(
+    workflow,
+    example: LocalExample,
+    repetition: int,
+    evaluators: List[Callable],
+    timeout: float,
+) -> Dict:
+    row = {
+        "example_id": example.id,
+        "repetition": repetition,
+        "inputs.request": example.request,
+        "reference.expected_sequence": example.expected_sequence,
+        "error": None,
+    }
+    started = time.perf_counter()
+    try:
+        final_state, node_ms = await asyncio.wait_for(_run_workflow(workflow, example.request), timeout=timeout)
+    except asyncio.TimeoutError:
+        final_state, node_ms = {"messages": []}, {}
+        row["error"] = f"Timed out after {timeout:.0f}s"
+    except Exception as e:
+        final_state, node_ms = {"messages": []}, {}
+        row["error"] = str(e)
+    row["execution_time"] = round(time.perf_counter() - started, 4)
+    row["outputs.messages"] = [_message_content(msg) for msg in final_state["messages"][1:]]
+    row["outputs.processed_image_url"] = final_state.get("processed_image_url")
+    row["outputs.hop_count"] = final_state.get("hop_count")
+    row["outputs.node_ms"] = node_ms
+
+    run = LocalRun(example.inputs, final_state)
+    for evaluator in evaluators:
+        result = evaluator(run, example)
+        if inspect.isawaitable(result):
+            result = await result
+        row[f"feedback.{evaluator.__name__}"] = result["score"]
+        row[f"reasoning.{evaluator.__name__}"] = result["reasoning"]
+    return row
+
+
+async def run_offline_evaluation(
+    examples: Iterable[LocalExample],
+    workflow=None,
+    concurrency: int = EVAL_CONCURRENCY,
+    repetitions: int = EVAL_REPETITIONS,
+    judge: bool = True,
+    timeout: float = BATCH_TIMEOUT_SECONDS,
+) -> AsyncIterator[Dict]:
+    """Evaluate every example `repetitions` times, yielding rows as they finish."""
+    if workflow is None:
+        from ..main import create_workflow
+        # No checkpointer: evaluation runs are never resumed
+        workflow = create_workflow(use_async=True)
+    evaluators = JUDGED_EVALUATORS if judge else LOCAL_EVALUATORS
+
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    for example in examples:
+        for repetition in range(repetitions):
+            await slots.acquire()
+            task = asyncio.create_task(_evaluate_one(workflow, example, repetition, evaluators, timeout))
+            task.add_done_callback(lambda _: slots.release())
+            pending.add(task)
+
+            finished = {task for task in pending if task.done()}
+            pending -= finished
+            for task in finished:
+                yield task.result()
+
+    while pending:
+        finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in finished:
+            yield task.result()
+
+
+async def _main(args) -> None:
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    totals: Dict[str, float] = {}
+    rows = errors = 0
+    started = time.perf_counter()
+
+    # Agents print progress for every run; keep the terminal for the summary
+    progress = contextlib.nullcontext(sys.stderr) if args.verbose else open(os.devnull, "w")
+    try:
+        with progress as sink, contextlib.redirect_stdout(sink):
+            async for row in run_offline_evaluation(
+                iter_examples(args.dataset, args.limit),
+                concurrency=args.concurrency,
+                repetitions=args.repetitions,
+                judge=args.judge,
+                timeout=args.timeout,
+            ):
+                rows += 1
+                errors += row["error"] is not None
+                for key, value in row.items():
+                    if key.startswith("feedback."):
+                        totals[key] = totals.get(key, 0.0) + value
+                if output is not None:
+                    output.write(json.dumps(row) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+        await get_gateway().aclose()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n🧪 Offline evaluation: {rows} run(s) in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.1f}/s), {errors} error(s)")
+    for key, total in totals.items():
+        print(f"• {key[len('feedback.'):]}: {total / rows:.3f}")
+    judge_cache = get_judge_cache()
+    if args.judge and judge_cache is not None:
+        stats = judge_cache.stats
+        print(f"• Judge Cache: {stats.hits} hit(s), {stats.misses} miss(es)")
+    if args.output:
+        print(f"\n💾 Rows written to {args.output}")
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Evaluate the workflow on a local dataset, without LangSmith")
+    parser.add_argument("dataset", help="Local dataset file (JSONL)")
+    parser.add_argument("-c", "--concurrency", type=int, default=EVAL_CONCURRENCY)
+    parser.add_argument("-r", "--repetitions", type=int, default=EVAL_REPETITIONS)
+    parser.add_argument("--limit", type=int, help="Evaluate only the first N examples")
+    parser.add_argument("--no-judge", dest="judge", action="store_false",
+                        help="Score task completion by exact sequence match instead of the LLM judge")
+    parser.add_argument("-t", "--timeout", type=float, default=BATCH_TIMEOUT_SECONDS, help="Per-run timeout in seconds")
+    parser.add_argument("-o", "--output", help="Write one JSON line per run here")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show agent progress on stderr")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,36 @@
-from langsmith import Client
 from dotenv import load_dotenv
+import argparse
 import os
 import asyncio
-import pandas as pd
-from tabulate import tabulate
-import json
-from datetime import datetime
+from typing import Optional
 
-from ..main import create_workflow
+from ..main import get_workflow
+from ..agent_types.state import create_initial_state
+from ..cache.judge import get_judge_cache
+from ..cache.routing import get_routing_cache
+from ..config.settings import EVAL_CONCURRENCY, EVAL_REPETITIONS
 from .evaluators import (
     evaluate_task_completion, 
     check_node_execution,
     check_image_generation_node
 )
+from .analysis import compare_experiments, format_report, load_results, write_results, write_summary
 from .create_dataset import create_evaluation_dataset
 
-async def run_evaluations():
+async def run_evaluations(
+    concurrency: Optional[int] = None,
+    repetitions: Optional[int] = None,
+    dataset_path: Optional[str] = None,
+    output_path: Optional[str] = None,
+    baseline_path: Optional[str] = None,
+    summary_path: Optional[str] = None,
+):
+    concurrency = concurrency or EVAL_CONCURRENCY
+    repetitions = repetitions or EVAL_REPETITIONS
+    
+    # langsmith's client is only needed once an evaluation actually runs
+    from langsmith import Client
+    
     # Initialize environment and check API key
     load_dotenv()
     if not os.getenv("OPENAI_API_KEY"):
@@ -27,27 +42,22 @@ async def run_evaluations():
     
     # Step 1: Dataset Creation/Retrieval
     print("\n1️⃣ Setting up test dataset...")
-    dataset = create_evaluation_dataset()
+    dataset_name = create_evaluation_dataset(dataset_path)
+    if dataset_name is None:
+        return
     client = Client()
-    print("✓ Dataset ready with test case: Generate image with text overlay")
+    print(f"✓ Dataset ready: {dataset_name}")
     
     # Step 2: Workflow Setup
     print("\n2️⃣ Initializing workflow...")
-    workflow = create_workflow()
+    # The async graph keeps the event loop free for the other examples in flight
+    workflow = get_workflow(use_async=True)
     print("✓ Multi-agent workflow initialized")
     
     # Step 3: Input Preparation
     print("\n3️⃣ Preparing input processor...")
     def process_request(inputs: dict) -> dict:
-        return {
-            "messages": [
-                {"role": "user", "content": inputs["request"]}
-            ],
-            "next_agent": None,
-            "current_task": None,
-            "image_url": None,
-            "processed_image_url": None
-        }
+        return create_initial_state({"role": "user", "content": inputs["request"]})
     print("✓ Input processor ready")
     
     # Step 4: Evaluation Setup
@@ -62,88 +72,66 @@ async def run_evaluations():
     print("1. Task Completion: Overall system performance")
     print("2. Node Execution: Agent interaction patterns")
     print("3. Individual Nodes: Specific agent performance")
+    print(f"Running {concurrency} example(s) at a time, {repetitions} repetition(s) each")
     
     experiment_results = await client.aevaluate(
         target,
-        data=dataset.name,
+        data=dataset_name,
         evaluators=[
             evaluate_task_completion,
             check_node_execution,
             check_image_generation_node
         ],
         experiment_prefix="image_processing_eval",
-        num_repetitions=1,
-        max_concurrency=1
+        num_repetitions=repetitions,
+        max_concurrency=concurrency
     )
     print("✓ Evaluation complete")
     
     # Step 6: Process Results
     print("\n6️⃣ Processing results...")
     results_df = experiment_results.to_pandas()
-    
-    results_dict = {
-        "Test Request": {
-            "input": results_df['inputs.request'].iloc[0],
-            "expected_sequence": results_df['reference.expected_sequence'].iloc[0]
-        },
-        "Execution Results": {
-            "agent_messages": results_df['outputs.messages'].iloc[0],
-            "final_state": {
-                "next_agent": results_df['outputs.next_agent'].iloc[0],
-                "current_task": results_df['outputs.current_task'].iloc[0],
-                "image_url": results_df.get('outputs.image_url', ['N/A']).iloc[0],
-                "processed_image_url": results_df.get('outputs.processed_image_url', ['N/A']).iloc[0]
-            }
-        },
-        "Evaluation": {
-            "task_completion": {
-                "score": float(results_df['feedback.evaluate_task_completion'].iloc[0]),
-                "reasoning": str(results_df['feedback.evaluate_task_completion'].iloc[0])
-            },
-            "node_execution": {
-                "score": float(results_df['feedback.check_node_execution'].iloc[0]),
-                "reasoning": str(results_df['feedback.check_node_execution'].iloc[0])
-            },
-            "image_generation": {
-                "score": float(results_df['feedback.check_image_generation_node'].iloc[0]),
-                "reasoning": str(results_df['feedback.check_image_generation_node'].iloc[0])
-            },
-            "execution_time_seconds": float(results_df['execution_time'].iloc[0])
-        }
-    }
+    if output_path:
+        write_results(results_df, output_path)
+        print(f"✓ Rows written to {output_path}")
+    comparison = None
+    if baseline_path:
+        comparison = compare_experiments(load_results(baseline_path), results_df)
     
     # Step 7: Display Results
-    print("\n7️⃣ Evaluation Results by Criteria")
-    print("==============================")
-    
-    print("\n1️⃣ Task Completion Evaluation:")
-    print("   Overall system performance score")
-    print(f"Score: {results_dict['Evaluation']['task_completion']['score']}")
-    print("Analysis:")
-    print(results_dict['Evaluation']['task_completion']['reasoning'])
-    
-    print("\n2️⃣ Node Execution Analysis:")
-    print("   Agent interaction patterns score")
-    print(f"Score: {results_dict['Evaluation']['node_execution']['score']}")
-    print("Analysis:")
-    print(results_dict['Evaluation']['node_execution']['reasoning'])
-    
-    print("\n3️⃣ Image Generation Node Check:")
-    print("   Individual node performance score")
-    print(f"Score: {results_dict['Evaluation']['image_generation']['score']}")
-    print("Analysis:")
-    print(results_dict['Evaluation']['image_generation']['reasoning'])
+    print("\n7️⃣ Evaluation Results")
+    print("====================")
+    print(format_report(results_df, comparison))
+    if summary_path:
+        write_summary(results_df, summary_path)
+        print(f"\n💾 Summary written to {summary_path}")
     
     # Step 8: Summary
     print("\n8️⃣ Quick Summary")
     print("===============")
-    print(f"• Request: {results_dict['Test Request']['input']}")
-    print(f"• Task Completion Score: {results_dict['Evaluation']['task_completion']['score']}")
-    print(f"• Node Execution Score: {results_dict['Evaluation']['node_execution']['score']}")
-    print(f"• Image Generation Score: {results_dict['Evaluation']['image_generation']['score']}")
-    print(f"• Execution Time: {results_dict['Evaluation']['execution_time_seconds']:.2f} seconds")
+    if comparison is not None:
+        regressions = comparison.index[comparison["regression"]]
+        print(f"• Regressions: {', '.join(regressions) if len(regressions) else 'none'}")
+    
+    routing_cache = get_routing_cache()
+    if routing_cache is not None:
+        stats = routing_cache.stats
+        print(f"• Routing Cache: {stats.hits} hit(s), {stats.misses} miss(es), {stats.hit_rate:.0%} hit rate")
+    
+    judge_cache = get_judge_cache()
+    if judge_cache is not None:
+        stats = judge_cache.stats
+        print(f"• Judge Cache: {stats.hits} hit(s), {stats.misses} miss(es), {stats.hit_rate:.0%} hit rate")
     
     return experiment_results
 
 if __name__ == "__main__":
-    asyncio.run(run_evaluations()) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Evaluate the multi-agent workflow on the LangSmith dataset")
+    parser.add_argument("--concurrency", type=int, help=f"Examples evaluated at once (default {EVAL_CONCURRENCY})")
+    parser.add_argument("--repetitions", type=int, help=f"Runs per example (default {EVAL_REPETITIONS})")
+    parser.add_argument("--dataset", help="Local dataset file to sync and evaluate (default EVAL_DATASET_PATH)")
+    parser.add_argument("--output", help="Write one JSON line per run here, for later comparison")
+    parser.add_argument("--baseline", help="Earlier results (JSONL or Parquet) to compare against")
+    parser.add_argument("--summary", help="Write the summary table as Parquet here")
+    args = parser.parse_args()
+    asyncio.run(run_evaluations(args.concurrency, args.repetitions, args.dataset, args.output, args.baseline, args.summary)) 
\ No newline at end of file
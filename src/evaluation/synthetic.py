@@ -0,0 +1,120 @@
+"""
+Synthetic evaluation datasets.
+
+Generates varied multi-step requests together with the agent messages a correct
+run produces, in the local dataset format. Every task sequence has several
+phrasings, and subjects and captions are drawn independently, so thousands of
+distinct examples can be produced from a seed.
+
+By default every request is phrased so the keyword fast path can plan it and the
+dataset runs fully offline; `--llm-fraction` mixes in phrasings that need the LLM
+supervisor.
+
+Usage:
+    python -m src.evaluation.synthetic --count 5000 --output datasets/synthetic.jsonl
+"""
+
+import argparse
+import random
+from typing import Iterator
+
+from ..agents.fused_pipeline import TASK_MESSAGES
+from ..agents.router import BACKGROUND_REMOVAL, IMAGE_GENERATION, TEXT_OVERLAY
+from ..benchmarks.workload import SUBJECTS, TEXTS
+from .datasets import LocalExample, make_example, write_examples
+
+GEN, TEXT, BG = IMAGE_GENERATION, TEXT_OVERLAY, BACKGROUND_REMOVAL
+
+# task sequence -> (fast-path phrasings, phrasings that need the LLM)
+SHAPES = {
+    (GEN,): (
+        [
+            "Generate an image of {subject}",
+            "Create a picture of {subject}",
+            "Draw {subject}",
+            "Make an illustration of {subject}",
+        ],
+        ["I'd like {subject}, nothing fancy or extra"],
+    ),
+    (GEN, TEXT): (
+        [
+            "Generate an image of {subject} and add text '{text}'",
+            "Create a picture of {subject} with the caption '{text}'",
+            "Make a poster of {subject} with the title '{text}'",
+            "Draw {subject} and add the words '{text}'",
+        ],
+        ["Create an image of {subject} and don't forget a caption saying '{text}'"],
+    ),
+    (GEN, BG): (
+        [
+            "Create an image of {subject} and remove the background",
+            "Generate a picture of {subject} with a transparent background",
+            "Draw {subject}, then cut out the background",
+        ],
+        ["Make a picture of {subject}, then remove the background or make it transparent"],
+    ),
+    (GEN, BG, TEXT): (
+        [
+            "Create an image of {subject}, remove the background, and add the text '{text}'",
+            "Generate a picture of {subject}, erase the background, then add a caption '{text}'",
+        ],
+        ["Create an image of {subject}, strip the background or make it transparent, then add text '{text}'"],
+    ),
+    (GEN, TEXT, BG): (
+        [
+            "Generate an image of {subject}, add a caption '{text}' and then remove the background",
+            "Create a picture of {subject} with the title '{text}', then delete the background",
+        ],
+        ["Generate an image of {subject}, add a caption '{text}', and don't keep the background; remove the background"],
+    ),
+}
+
+# Extra detail that makes subjects distinct without changing what has to be done
+_STYLES = ["", " in watercolor style", " in minimalist style", " in pixel art style", " at dusk", " in the rain"]
+
+# Draws allowed to repeat an earlier request before subjects are numbered to stay unique
+_MAX_RETRIES = 20
+
+
+def generate_examples(count: int, seed: int = 0, llm_fraction: float = 0.0) -> Iterator[LocalExample]:
+    """`count` distinct examples, generated lazily; about `llm_fraction` need the LLM to route."""
+    rng = random.Random(seed)
+    shapes = list(SHAPES.items())
+    seen = set()
+    retries = 0
+    while len(seen) < count:
+        tasks, (fast_templates, llm_templates) = rng.choice(shapes)
+        llm_routed = rng.random() < llm_fraction
+        template = rng.choice(llm_templates if llm_routed else fast_templates)
+        subject = rng.choice(SUBJECTS) + rng.choice(_STYLES)
+        if retries >= _MAX_RETRIES:
+            # The phrasing space is used up; number the subject like the load-test workload does
+            subject = f"{subject} #{len(seen)}"
+        request = template.format(subject=subject, text=rng.choice(TEXTS))
+        if request in seen:
+            retries += 1
+            continue
+        retries = 0
+        seen.add(request)
+        yield make_example(
+            request,
+            [TASK_MESSAGES[task] for task in tasks],
+            tasks=list(tasks),
+            llm_routed=llm_routed,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic evaluation dataset as JSON lines")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-fraction", type=float, default=0.0,
+                        help="Share of requests phrased so only the LLM supervisor can route them")
+    parser.add_argument("--output", required=True, help="Dataset file to write (JSONL)")
+    args = parser.parse_args()
+    written = write_examples(args.output, generate_examples(args.count, args.seed, args.llm_fraction))
+    print(f"📝 Wrote {written} example(s) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
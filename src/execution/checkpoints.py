@@ -0,0 +1,176 @@
+"""
+Durable checkpoints for workflow runs.
+
+With checkpointing enabled, the graph is compiled with a SQLite saver and LangGraph
+records `AgentState` after every node under the run's `thread_id`. A run that dies
+part-way (a crash, a timeout, a failed LLM call) can be resumed from the last
+completed node instead of starting over, so finished supervisor calls and image
+work are not paid for twice.
+
+Checkpoints stay small: state only carries `image://<sha256>` references, and the
+image store writes each image once, by content hash, to `IMAGE_BLOB_DIR` so those
+references are still resolvable after a restart. The state itself is written with
+the compact codec in `src.agent_types.codec`.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+import ormsgpack
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from ..agent_types.codec import FIELDS, decode_messages, decode_state, encode_messages, encode_state
+from ..agent_types.state import AgentMessage
+from ..config.settings import CHECKPOINT_PATH, CHECKPOINTING_ENABLED
+
+_STATE_CHANNELS = frozenset(name for name, _ in FIELDS)
+
+
+class StateSerializer(JsonPlusSerializer):
+    """Checkpoint serializer that writes workflow state with the compact state codec.
+
+    A checkpoint's state channels and every write of new messages are encoded
+    with `src.agent_types.codec`. Anything else, or anything the codec cannot
+    encode, goes through LangGraph's own serializer, which also still reads
+    checkpoints written before this one was used.
+    """
+
+    CHECKPOINT_TYPE = "agent_state"
+    MESSAGES_TYPE = "agent_messages"
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        try:
+            if isinstance(obj, dict) and isinstance(obj.get("channel_values"), dict):
+                return self._dumps_checkpoint(obj)
+            if isinstance(obj, list) and obj and all(isinstance(m, (AgentMessage, BaseMessage)) for m in obj):
+                return self.MESSAGES_TYPE, encode_messages(obj)
+        except (TypeError, ValueError, ormsgpack.MsgpackEncodeError):
+            pass
+        return super().dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == self.CHECKPOINT_TYPE:
+            state, rest_type, rest = ormsgpack.unpackb(payload)
+            checkpoint = super().loads_typed((rest_type, rest))
+            checkpoint["channel_values"].update(decode_state(state))
+            return checkpoint
+        if type_ == self.MESSAGES_TYPE:
+            return decode_messages(payload)
+        return super().loads_typed(data)
+
+    def _dumps_checkpoint(self, checkpoint: Dict) -> Tuple[str, bytes]:
+        values = checkpoint["channel_values"]
+        state = {name: value for name, value in values.items() if name in _STATE_CHANNELS}
+        # Other channels (graph bookkeeping, branch inputs) and checkpoint metadata
+        rest = {
+            **checkpoint,
+            "channel_values": {name: value for name, value in values.items() if name not in _STATE_CHANNELS},
+        }
+        rest_type, rest_payload = super().dumps_typed(rest)
+        return self.CHECKPOINT_TYPE, ormsgpack.packb([encode_state(state), rest_type, rest_payload])
+
+
+class ThreadedSqliteSaver(SqliteSaver):
+    """SqliteSaver whose async methods run the sync ones on a worker thread.
+
+    The stock saver only supports sync graphs; this lets the async graph share the
+    same file. The connection is serialized by the saver's lock, so it can be used
+    from any thread and any event loop.
+    """
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+
+def create_checkpointer(path: str = CHECKPOINT_PATH) -> ThreadedSqliteSaver:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    # WAL lets readers (resume, inspection) proceed while a run is writing
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return ThreadedSqliteSaver(conn, serde=StateSerializer())
+
+
+_checkpointer: Optional[ThreadedSqliteSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> Optional[ThreadedSqliteSaver]:
+    """Process-wide saver configured from settings, or None when checkpointing is disabled."""
+    global _checkpointer
+    if not CHECKPOINTING_ENABLED:
+        return None
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            _checkpointer = create_checkpointer()
+    return _checkpointer
+
+
+def thread_config(thread_id: str) -> RunnableConfig:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def run_config(thread_id: Optional[str] = None) -> Optional[RunnableConfig]:
+    """Config for one run: a thread (generated if not given) when checkpointing is on, else None."""
+    if get_checkpointer() is None:
+        if thread_id is not None:
+            raise ValueError("Resuming by thread_id requires CHECKPOINTING_ENABLED=true")
+        return None
+    return thread_config(thread_id or str(uuid.uuid4()))
+
+
+def resume_input(snapshot, initial_state: Optional[dict]) -> Tuple[Optional[dict], bool]:
+    """Decide how to (re)enter a thread given its latest checkpoint.
+
+    Returns `(graph_input, finished)`: the initial state for a thread with no
+    checkpoint, `None` to continue an interrupted thread from its last completed
+    node, and `finished=True` when the thread already ran to the end.
+    """
+    if not snapshot.values:
+        if initial_state is None:
+            raise KeyError("No checkpoint found for this thread")
+        return initial_state, False
+    if snapshot.next:
+        return None, False
+    return None, True
@@ -0,0 +1,188 @@
+"""
+Worker pools for CPU-bound agent work.
+
+Pillow and NumPy work holds the GIL for long stretches, which would stall every
+other workflow sharing the event loop. Agent factories can opt into a `WorkerPools`
+instance to run their image operations elsewhere:
+
+- each agent gets its own pool (process or thread) sized independently, so heavy
+  nodes such as background removal can scale across cores;
+- process pools receive and return pixels through shared memory segments, so
+  pixel data is never pickled;
+- every pool accepts at most `workers + max_pending` tasks; further submissions
+  wait for a slot, which pushes back on callers instead of queueing unboundedly.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from ..config.settings import IMAGE_SIZE, WORKER_POOL_MAX_PENDING, WORKER_POOL_SIZES, WORKER_POOLS_ENABLED
+from ..imaging.pipeline import run_pipeline
+
+# (shared memory name, mode, (width, height))
+ImageSpec = Tuple[str, str, Tuple[int, int]]
+
+_DEFAULT_POOL = "default"
+
+
+@dataclass
+class PoolConfig:
+    kind: str  # "process" or "thread"
+    workers: int
+
+
+def parse_pool_sizes(spec: str) -> Dict[str, PoolConfig]:
+    """Parse "background_removal=process:4,text_overlay=thread:2" style settings."""
+    configs = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = entry.partition("=")
+        kind, _, workers = value.partition(":")
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown pool kind '{kind}' for {name}")
+        configs[name.strip()] = PoolConfig(kind, int(workers or 1))
+    return configs
+
+
+def _apply_in_worker(tasks: List[str], source: Optional[ImageSpec], target: Tuple[str, int], params: Dict[str, str]):
+    """Process-pool entry point: read from shared memory, write the result back."""
+    image = None
+    source_shm = None
+    if source is not None:
+        source_shm = SharedMemory(name=source[0])
+        mode, size = source[1], source[2]
+        image = Image.frombytes(mode, size, source_shm.buf[:_nbytes(mode, size)])
+
+    try:
+        result, _ = run_pipeline(tasks, image, params)
+    finally:
+        if source_shm is not None:
+            source_shm.close()
+
+    data = result.tobytes()
+    target_shm = SharedMemory(name=target[0])
+    try:
+        if len(data) > target[1]:
+            # Unexpectedly large output; fall back to returning the image itself
+            return result
+        target_shm.buf[:len(data)] = data
+    finally:
+        target_shm.close()
+    return result.mode, result.size
+
+
+def _nbytes(mode: str, size: Tuple[int, int]) -> int:
+    return len(Image.new(mode, (1, 1)).tobytes()) * size[0] * size[1]
+
+
+class WorkerPools:
+    def __init__(self, configs: Dict[str, PoolConfig], max_pending: int = WORKER_POOL_MAX_PENDING):
+        self.configs = dict(configs)
+        self.configs.setdefault(_DEFAULT_POOL, PoolConfig("thread", os.cpu_count() or 2))
+        self.max_pending = max_pending
+        self._executors: Dict[str, Executor] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, agent: str) -> Tuple[str, PoolConfig, Executor, threading.BoundedSemaphore]:
+        name = agent if agent in self.configs else _DEFAULT_POOL
+        config = self.configs[name]
+        with self._lock:
+            if name not in self._executors:
+                if config.kind == "process":
+                    executor = ProcessPoolExecutor(max_workers=config.workers)
+                else:
+                    executor = ThreadPoolExecutor(max_workers=config.workers, thread_name_prefix=f"{name}-worker")
+                self._executors[name] = executor
+                self._slots[name] = threading.BoundedSemaphore(config.workers + self.max_pending)
+        return name, config, self._executors[name], self._slots[name]
+
+    def submit_image_task(self, agent: str, tasks: List[str], image: Optional[Image.Image], params: Dict[str, str]) -> "Future[Image.Image]":
+        """Run `tasks` on `image` in the agent's pool; blocks while the pool is saturated."""
+        _, config, executor, slot = self._pool(agent)
+        slot.acquire()
+        try:
+            if config.kind == "thread":
+                future = executor.submit(lambda: run_pipeline(tasks, image, params)[0])
+            else:
+                future = self._submit_shared(executor, tasks, image, params)
+        except BaseException:
+            slot.release()
+            raise
+        future.add_done_callback(lambda _: slot.release())
+        return future
+
+    async def run_image_task(self, agent: str, tasks: List[str], image: Optional[Image.Image], params: Dict[str, str]) -> Image.Image:
+        """Async form of `submit_image_task`; waiting for a slot never blocks the event loop."""
+        future = await asyncio.to_thread(self.submit_image_task, agent, tasks, image, params)
+        return await asyncio.wrap_future(future)
+
+    def _submit_shared(self, executor: Executor, tasks: List[str], image: Optional[Image.Image], params: Dict[str, str]) -> "Future[Image.Image]":
+        source_shm = None
+        source = None
+        if image is not None:
+            data = image.tobytes()
+            source_shm = SharedMemory(create=True, size=max(len(data), 1))
+            source_shm.buf[:len(data)] = data
+            source = (source_shm.name, image.mode, image.size)
+
+        # Every operation keeps the image dimensions and produces at most RGBA
+        width, height = image.size if image is not None else IMAGE_SIZE
+        capacity = max(width * height, IMAGE_SIZE[0] * IMAGE_SIZE[1]) * 4
+        target_shm = SharedMemory(create=True, size=capacity)
+
+        result: "Future[Image.Image]" = Future()
+
+        def collect(worker_future: Future) -> None:
+            try:
+                outcome = worker_future.result()
+                if isinstance(outcome, Image.Image):
+                    result.set_result(outcome)
+                else:
+                    mode, size = outcome
+                    image = Image.frombytes(mode, size, target_shm.buf[:_nbytes(mode, size)])
+                    result.set_result(image)
+            except BaseException as e:
+                result.set_exception(e)
+            finally:
+                for shm in (source_shm, target_shm):
+                    if shm is not None:
+                        shm.close()
+                        shm.unlink()
+
+        try:
+            worker_future = executor.submit(_apply_in_worker, tasks, source, (target_shm.name, capacity), params)
+        except BaseException:
+            for shm in (source_shm, target_shm):
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+            raise
+        worker_future.add_done_callback(collect)
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            for executor in self._executors.values():
+                executor.shutdown(wait=wait)
+            self._executors.clear()
+            self._slots.clear()
+
+
+_worker_pools: Optional[WorkerPools] = None
+
+
+def get_worker_pools() -> Optional[WorkerPools]:
+    """Process-wide pools configured from settings, or None when offloading is disabled."""
+    global _worker_pools
+    if not WORKER_POOLS_ENABLED:
+        return None
+    if _worker_pools is None:
+        _worker_pools = WorkerPools(parse_pool_sizes(WORKER_POOL_SIZES))
+    return _worker_pools
@@ -0,0 +1,275 @@
+"""
+Priority- and deadline-aware scheduling of workflow hops.
+
+Concurrent runs compete for two limited resources: LLM calls (provider rate
+limits) and CPU for image work. With `SCHEDULER_ENABLED=true`, every hop of the
+async graph that uses one of them first takes a slot from its capacity pool:
+
+- `llm` (`SCHEDULER_LLM_SLOTS`): each supervisor LLM call;
+- `cpu` (`SCHEDULER_CPU_SLOTS`): each image agent node (generation, text overlay,
+  background removal, fused pipeline, branch workers).
+
+A slot is held for one hop only. When a node returns, its run queues again for
+the next one, so at every node boundary a long chain can be overtaken by waiting
+work that ranks higher. Waiting hops are granted in order of:
+
+1. priority, higher first;
+2. hops of runs whose deadline can no longer be met unless they go next,
+   earliest deadline first;
+3. shortest predicted remaining plan: the supervisor's task plan once it has one,
+   the keyword router's prediction for the request before that. Time spent
+   waiting counts as one task fewer per `SCHEDULER_AGING_SECONDS`, so long chains
+   are not starved;
+4. arrival order.
+
+A run's priority, deadline and progress travel in a `Ticket`, made current for
+the run with `Scheduler.activate`; hops without one rank at default priority.
+Pools are used from one event loop at a time. Sync graphs are not scheduled.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import itertools
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Callable, Iterator, List, Mapping, Optional, Tuple
+
+from ..config.settings import (
+    SCHEDULER_AGING_SECONDS,
+    SCHEDULER_CPU_SLOTS,
+    SCHEDULER_ENABLED,
+    SCHEDULER_LLM_SLOTS,
+)
+
+# Nodes whose work is image processing; the supervisor takes an LLM slot per call instead
+CPU_NODES = frozenset({"image_generation", "text_overlay", "background_removal", "fused_pipeline", "branch_worker"})
+# Longest possible plan, assumed for requests the router cannot predict
+MAX_TASKS = 3
+# Weight of the newest sample in the per-pool hop duration estimate
+_EWMA_WEIGHT = 0.2
+
+_sequence = itertools.count()
+_current_ticket: contextvars.ContextVar[Optional["Ticket"]] = contextvars.ContextVar("ticket", default=None)
+
+Rank = Tuple[int, int, float, int]
+
+
+@dataclass(eq=False)
+class Ticket:
+    """Scheduling identity of one run."""
+
+    priority: int = 0
+    # time.monotonic() by which the run should finish
+    deadline: Optional[float] = None
+    # Tasks still to run, as predicted at submission and then from the run's state
+    remaining: int = MAX_TASKS
+    submitted: float = field(default_factory=time.monotonic)
+    sequence: int = field(default_factory=lambda: next(_sequence))
+    # Seconds spent waiting for slots so far
+    waited: float = 0.0
+    predicted: int = MAX_TASKS
+
+    def observe(self, state: Mapping[str, Any]) -> None:
+        """Update the remaining task count from the run's state."""
+        plan = state.get("task_plan")
+        if plan:
+            self.remaining = max(len(plan) - (state.get("plan_step") or 0), 0)
+        else:
+            completed = len(state.get("completed_tasks") or [])
+            self.remaining = max(self.predicted - completed, 1)
+
+
+def rank(ticket: Ticket, waiting_since: float, now: float, hop_seconds: float, aging_seconds: float) -> Rank:
+    """Sort key of a waiting hop; the smallest is granted first."""
+    if ticket.deadline is not None:
+        # Time the rest of the run needs, if every remaining task costs one hop of each kind
+        slack = ticket.deadline - now - ticket.remaining * hop_seconds
+        if slack <= 0:
+            return (-ticket.priority, 0, ticket.deadline, ticket.sequence)
+    waited = ticket.waited + (now - waiting_since)
+    return (-ticket.priority, 1, ticket.remaining - waited / aging_seconds, ticket.sequence)
+
+
+@dataclass
+class SchedulerStats:
+    granted: int = 0  # slots handed out
+    queued: int = 0  # hops that had to wait for a slot
+    reordered: int = 0  # grants that went to a hop other than the longest-waiting one
+    finished: int = 0
+    deadline_missed: int = 0
+
+
+@dataclass(eq=False)
+class _Waiter:
+    ticket: Ticket
+    since: float
+    future: asyncio.Future
+
+
+class CapacityPool:
+    """A fixed number of slots, granted to waiting hops in rank order."""
+
+    def __init__(self, name: str, capacity: int, scheduler: "Scheduler", hop_seconds: float = 0.1):
+        self.name = name
+        self.capacity = max(capacity, 1)
+        self.busy = 0
+        # Running estimate of how long a hop holds a slot
+        self.hop_seconds = hop_seconds
+        self._scheduler = scheduler
+        self._waiting: List[_Waiter] = []
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    async def acquire(self, ticket: Ticket) -> None:
+        if self.busy < self.capacity and not self._waiting:
+            self.busy += 1
+            self._scheduler.stats.granted += 1
+            return
+        waiter = _Waiter(ticket, time.monotonic(), asyncio.get_running_loop().create_future())
+        self._waiting.append(waiter)
+        self._scheduler.stats.queued += 1
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiting:
+                self._waiting.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as it was cancelled: pass the slot on
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.busy -= 1
+        self._grant()
+
+    def _grant(self) -> None:
+        while self.busy < self.capacity and self._waiting:
+            now = time.monotonic()
+            hop_seconds = self._scheduler.hop_seconds()
+            aging = self._scheduler.aging_seconds
+            waiter = min(self._waiting, key=lambda w: rank(w.ticket, w.since, now, hop_seconds, aging))
+            if waiter is not self._waiting[0]:
+                self._scheduler.stats.reordered += 1
+            self._waiting.remove(waiter)
+            if waiter.future.done():
+                continue
+            self.busy += 1
+            self._scheduler.stats.granted += 1
+            waiter.ticket.waited += now - waiter.since
+            waiter.future.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, ticket: Ticket) -> AsyncIterator[None]:
+        await self.acquire(ticket)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.hop_seconds += _EWMA_WEIGHT * (elapsed - self.hop_seconds)
+            self.release()
+
+
+class Scheduler:
+    """LLM and CPU capacity pools shared by every scheduled run."""
+
+    def __init__(
+        self,
+        llm_slots: int = SCHEDULER_LLM_SLOTS,
+        cpu_slots: int = SCHEDULER_CPU_SLOTS,
+        aging_seconds: float = SCHEDULER_AGING_SECONDS,
+    ):
+        self.aging_seconds = aging_seconds
+        self.stats = SchedulerStats()
+        self.llm = CapacityPool("llm", llm_slots, self, hop_seconds=1.0)
+        self.cpu = CapacityPool("cpu", cpu_slots, self, hop_seconds=0.2)
+
+    def hop_seconds(self) -> float:
+        """Estimated time one remaining task adds: a supervisor call and an image hop."""
+        return self.llm.hop_seconds + self.cpu.hop_seconds
+
+    def ticket(self, request: Optional[str], priority: int = 0, deadline_seconds: Optional[float] = None) -> Ticket:
+        """A ticket for a new run, with its task count predicted from the request."""
+        from ..agents.router import default_router
+
+        # predict, not plan: the supervisor counts the run in the router stats itself
+        plan = default_router.predict(request) if request else None
+        predicted = len(plan) if plan else MAX_TASKS
+        submitted = time.monotonic()
+        deadline = submitted + deadline_seconds if deadline_seconds is not None else None
+        return Ticket(priority, deadline, predicted, submitted=submitted, predicted=predicted)
+
+    def rank(self, ticket: Ticket, waiting_since: float) -> Rank:
+        return rank(ticket, waiting_since, time.monotonic(), self.hop_seconds(), self.aging_seconds)
+
+    @contextlib.contextmanager
+    def activate(self, ticket: Ticket) -> Iterator[Ticket]:
+        """Make `ticket` the current run's for everything started inside the block."""
+        token = _current_ticket.set(ticket)
+        try:
+            yield ticket
+        finally:
+            _current_ticket.reset(token)
+            self.stats.finished += 1
+            if ticket.deadline is not None and time.monotonic() > ticket.deadline:
+                self.stats.deadline_missed += 1
+
+    def health(self) -> dict:
+        return {
+            "llm": {"busy": self.llm.busy, "waiting": self.llm.waiting, "hop_ms": round(self.llm.hop_seconds * 1000, 1)},
+            "cpu": {"busy": self.cpu.busy, "waiting": self.cpu.waiting, "hop_ms": round(self.cpu.hop_seconds * 1000, 1)},
+            **asdict(self.stats),
+        }
+
+
+def current_ticket() -> Ticket:
+    ticket = _current_ticket.get()
+    # Unscheduled callers (the CLI, tests) still take slots, at default priority
+    return ticket if ticket is not None else Ticket()
+
+
+@contextlib.asynccontextmanager
+async def llm_slot(state: Optional[Mapping[str, Any]] = None) -> AsyncIterator[None]:
+    """Hold an LLM slot for one call when scheduling is enabled."""
+    scheduler = get_scheduler()
+    if scheduler is None:
+        yield
+        return
+    ticket = current_ticket()
+    if state is not None:
+        ticket.observe(state)
+    async with scheduler.llm.slot(ticket):
+        yield
+
+
+def schedule_node(name: str, node: Callable) -> Callable:
+    """Wrap an async image node so each execution holds a CPU slot; other nodes are returned as is."""
+    scheduler = get_scheduler()
+    if scheduler is None or name not in CPU_NODES or not asyncio.iscoroutinefunction(node):
+        return node
+
+    @functools.wraps(node)
+    async def scheduled(state):
+        ticket = current_ticket()
+        ticket.observe(state)
+        async with scheduler.cpu.slot(ticket):
+            return await node(state)
+
+    return scheduled
+
+
+_scheduler: Optional[Scheduler] = None
+
+
+def get_scheduler() -> Optional[Scheduler]:
+    """Process-wide scheduler configured from settings, or None when scheduling is disabled."""
+    global _scheduler
+    if not SCHEDULER_ENABLED:
+        return None
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
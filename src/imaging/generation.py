@@ -0,0 +1,82 @@
+"""
+Procedural placeholder image generation.
+
+Produces a deterministic image for a prompt: a soft vertical gradient background
+with a contrasting subject in the middle. The palette is picked from keywords in
+the prompt and the layout is seeded from its hash, so the same prompt always
+produces the same pixels. Passing a `variant` index reseeds the layout, so one
+prompt can yield several distinct but equally deterministic images; variant 0 is
+the prompt's canonical image.
+"""
+
+import hashlib
+import random
+from typing import Tuple
+
+from PIL import Image, ImageDraw
+
+Color = Tuple[int, int, int]
+
+# (background top, background bottom, subject)
+_PALETTES = {
+    "sunset": ((250, 170, 120), (230, 140, 130), (60, 30, 70)),
+    "sunrise": ((250, 200, 150), (235, 175, 140), (70, 40, 60)),
+    "night": ((30, 35, 70), (20, 25, 55), (240, 230, 160)),
+    "mountain": ((170, 200, 235), (150, 185, 225), (70, 80, 95)),
+    "ocean": ((120, 180, 230), (90, 160, 215), (250, 250, 245)),
+    "beach": ((180, 220, 245), (160, 205, 235), (200, 120, 60)),
+    "forest": ((200, 230, 200), (180, 215, 180), (30, 90, 40)),
+    "cat": ((235, 235, 225), (220, 220, 210), (120, 80, 40)),
+    "dog": ((230, 225, 240), (215, 210, 230), (140, 90, 50)),
+}
+_DEFAULT_PALETTE = ((225, 230, 240), (205, 212, 228), (40, 60, 120))
+
+
+def _palette(prompt: str) -> Tuple[Color, Color, Color]:
+    lowered = prompt.lower()
+    for keyword, palette in _PALETTES.items():
+        if keyword in lowered:
+            return palette
+    return _DEFAULT_PALETTE
+
+
+def _gradient(size: Tuple[int, int], top: Color, bottom: Color) -> Image.Image:
+    # Build one column and stretch it; avoids a per-pixel Python loop
+    width, height = size
+    column = Image.new("RGB", (1, height))
+    column.putdata([
+        tuple(top[c] + (bottom[c] - top[c]) * y // max(height - 1, 1) for c in range(3))
+        for y in range(height)
+    ])
+    return column.resize((width, height), Image.NEAREST)
+
+
+def generate_image(prompt: str, size: Tuple[int, int] = (512, 512), variant: int = 0) -> Image.Image:
+    seed_text = prompt if variant == 0 else f"{prompt}#{variant}"
+    seed = int.from_bytes(hashlib.sha256(seed_text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    top, bottom, subject = _palette(prompt)
+
+    image = _gradient(size, top, bottom)
+    draw = ImageDraw.Draw(image)
+    width, height = size
+
+    # A central subject well inside the borders, so the background stays connected
+    cx = width // 2 + rng.randint(-width // 10, width // 10)
+    cy = height // 2 + rng.randint(-height // 10, height // 10)
+    rx = rng.randint(width // 6, width // 4)
+    ry = rng.randint(height // 6, height // 4)
+    if "mountain" in prompt.lower():
+        draw.polygon([(cx - rx * 1.5, cy + ry), (cx, cy - ry), (cx + rx * 1.5, cy + ry)], fill=subject)
+    else:
+        draw.ellipse([cx - rx, cy - ry, cx + rx, cy + ry], fill=subject)
+
+    # A few accents inside the subject for texture
+    accent = tuple(min(channel + 60, 255) for channel in subject)
+    for _ in range(rng.randint(2, 5)):
+        ax = cx + rng.randint(-rx // 2, rx // 2)
+        ay = cy + rng.randint(-ry // 3, ry // 3)
+        ar = rng.randint(max(rx // 10, 1), max(rx // 5, 2))
+        draw.ellipse([ax - ar, ay - ar, ax + ar, ay + ar], fill=accent)
+
+    return image
@@ -0,0 +1,122 @@
+"""
+Fused execution of a chain of image operations.
+
+Running "generate → remove background → add text" as separate agents hashes and
+stores the image after every step, and goes back through the supervisor between
+steps. A fused pipeline applies the whole chain to one working buffer and only
+publishes the final result.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from ..config.settings import (
+    BACKGROUND_METHOD,
+    BACKGROUND_MORPH_RADIUS,
+    BACKGROUND_THRESHOLD,
+    BACKGROUND_TILE_SIZE,
+    BACKGROUND_WORKERS,
+    IMAGE_SIZE,
+)
+from .background import remove_background
+from .generation import generate_image
+from .text import render_text, render_text_layer
+
+# op(input image or None, request parameters) -> output image
+Operation = Callable[[Optional[Image.Image], Dict[str, str]], Image.Image]
+
+
+def _generate(image: Optional[Image.Image], params: Dict[str, str]) -> Image.Image:
+    return generate_image(params["subject"], IMAGE_SIZE, int(params.get("variant", 0)))
+
+
+def _remove_background(image: Optional[Image.Image], params: Dict[str, str]) -> Image.Image:
+    if image is None:
+        raise ValueError("no image to remove the background from")
+    return remove_background(
+        image,
+        threshold=BACKGROUND_THRESHOLD,
+        tile_size=BACKGROUND_TILE_SIZE,
+        workers=BACKGROUND_WORKERS,
+        radius=BACKGROUND_MORPH_RADIUS,
+        method=BACKGROUND_METHOD,
+    )
+
+
+def _overlay_text(image: Optional[Image.Image], params: Dict[str, str]) -> Image.Image:
+    if image is None:
+        raise ValueError("no image to add text to")
+    # The working buffer is private to the pipeline, so draw on it directly
+    return render_text(image, params["text"], inplace=True)
+
+
+def _text_layer(image: Optional[Image.Image], params: Dict[str, str]) -> Image.Image:
+    # Only the size of the input is used; the layer is composited on by the merge step
+    if image is None:
+        raise ValueError("no image to size the text layer for")
+    return render_text_layer(image.size, params["text"])
+
+
+OPERATIONS: Dict[str, Operation] = {
+    "image_generation": _generate,
+    "background_removal": _remove_background,
+    "text_overlay": _overlay_text,
+    "text_layer": _text_layer,
+}
+
+
+def operation_params(task: str, params: Dict[str, str]) -> Dict:
+    """Everything that determines `task`'s output besides its input image.
+
+    Used to key cached results, so it must change whenever an operation's output
+    would; request parameters an operation ignores are left out so unrelated
+    differences between requests do not defeat the cache.
+    """
+    if task == "image_generation":
+        return {"subject": params["subject"], "size": list(IMAGE_SIZE), "variant": int(params.get("variant", 0))}
+    if task == "background_removal":
+        return {"threshold": BACKGROUND_THRESHOLD, "method": BACKGROUND_METHOD, "radius": BACKGROUND_MORPH_RADIUS}
+    if task in ("text_overlay", "text_layer"):
+        return {"text": params["text"]}
+    raise KeyError(f"Unknown operation '{task}'")
+
+
+class PipelineError(Exception):
+    """Raised when a step fails; carries the partial result and the failing step."""
+
+    def __init__(self, task: str, completed: List[str], image: Optional[Image.Image], cause: Exception):
+        super().__init__(str(cause))
+        self.task = task
+        self.completed = completed
+        self.image = image
+        self.cause = cause
+
+    def __reduce__(self):
+        # Keeps the error intact when it crosses a process-pool boundary
+        return PipelineError, (self.task, self.completed, self.image, self.cause)
+
+
+def can_fuse(tasks: List[str]) -> bool:
+    return len(tasks) > 1 and all(task in OPERATIONS for task in tasks)
+
+
+def run_pipeline(tasks: List[str], image: Optional[Image.Image], params: Dict[str, str]) -> Tuple[Image.Image, List[str]]:
+    """Apply `tasks` in order to a single working buffer.
+
+    The input image is copied once if it will be modified in place, so images held
+    by the store are never mutated.
+    """
+    completed: List[str] = []
+    working = image
+    owned = False
+    for task in tasks:
+        try:
+            if task == "text_overlay" and working is not None and not owned:
+                working = working.copy()
+            working = OPERATIONS[task](working, params)
+            owned = True
+        except Exception as e:
+            raise PipelineError(task, completed, working if completed else None, e) from e
+        completed.append(task)
+    return working, completed
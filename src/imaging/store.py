@@ -0,0 +1,119 @@
+"""
+In-memory image store shared by the task agents.
+
+Agents never pass pixels through `AgentState`; they put decoded PIL images here and
+record the returned reference (`image://<sha256>`) in `image_url` /
+`processed_image_url`. The next agent gets the same decoded object back, so a
+multi-step workflow never re-encodes or touches the disk between hops.
+
+References are content hashes, so identical images share one entry.
+
+When a blob directory is configured (checkpointing enabled), every image is also
+written through to disk once, named by its hash, and images missing from memory
+are reloaded from there. Checkpoints then only need the reference, and a resumed
+run in a new process can still read the images produced before the interruption.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from PIL import Image
+
+from ..config.settings import CHECKPOINTING_ENABLED, IMAGE_BLOB_DIR, IMAGE_STORE_CAPACITY
+
+REF_PREFIX = "image://"
+
+
+def content_hash(image: Image.Image) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}:{image.width}x{image.height}:".encode("ascii"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class ImageStore:
+    def __init__(self, capacity: int = IMAGE_STORE_CAPACITY, blob_dir: Optional[str] = None):
+        self.capacity = capacity
+        self.blob_dir = blob_dir
+        self._images: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+        if blob_dir is not None:
+            os.makedirs(blob_dir, exist_ok=True)
+
+    def _blob_path(self, ref: str) -> str:
+        return os.path.join(self.blob_dir, f"{ref[len(REF_PREFIX):]}.png")
+
+    def _write_blob(self, ref: str, image: Image.Image) -> None:
+        path = self._blob_path(ref)
+        if os.path.exists(path):
+            # Same content, already persisted
+            return
+        # Unique per process and thread: several processes may share the directory
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # PNG is lossless, so a reloaded image hashes to the same reference
+        image.save(temp_path, format="PNG", compress_level=1)
+        os.replace(temp_path, path)
+
+    def put(self, image: Image.Image) -> str:
+        ref = REF_PREFIX + content_hash(image)
+        if self.blob_dir is not None:
+            self._write_blob(ref, image)
+        self._remember(ref, image)
+        return ref
+
+    def _remember(self, ref: str, image: Image.Image) -> None:
+        with self._lock:
+            self._images[ref] = image
+            self._images.move_to_end(ref)
+            # Least recently used images are dropped once the store is full
+            while len(self._images) > self.capacity:
+                self._images.popitem(last=False)
+
+    def get(self, ref: str) -> Image.Image:
+        with self._lock:
+            image = self._images.get(ref)
+            if image is not None:
+                self._images.move_to_end(ref)
+                return image
+
+        if ref.startswith(REF_PREFIX):
+            if self.blob_dir is None or not os.path.exists(self._blob_path(ref)):
+                raise KeyError(f"Image {ref} is no longer in the store")
+            path = self._blob_path(ref)
+        else:
+            # Anything else is treated as a local file supplied by the caller
+            path = ref
+
+        with Image.open(path) as opened:
+            opened.load()
+            image = opened.copy()
+        self._remember(ref, image)
+        return image
+
+    def save(self, ref: str, directory: str, format: str = "PNG") -> str:
+        """Encode an image once, at the end of a workflow, and return its path."""
+        os.makedirs(directory, exist_ok=True)
+        name = ref[len(REF_PREFIX):] if ref.startswith(REF_PREFIX) else os.path.basename(ref)
+        path = os.path.join(directory, f"{name[:16]}.{format.lower()}")
+        self.get(ref).save(path, format=format)
+        return path
+
+    def __contains__(self, ref: Optional[str]) -> bool:
+        if ref in self._images:
+            return True
+        return (
+            self.blob_dir is not None
+            and isinstance(ref, str)
+            and ref.startswith(REF_PREFIX)
+            and os.path.exists(self._blob_path(ref))
+        )
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+
+# Shared by every agent in the process; persisted when runs are checkpointed
+image_store = ImageStore(blob_dir=IMAGE_BLOB_DIR if CHECKPOINTING_ENABLED else None)
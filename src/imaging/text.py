@@ -0,0 +1,73 @@
+"""
+Text rendering with Pillow.
+
+Fonts are loaded once per size and cached; loading a TrueType face from disk is
+far more expensive than drawing with it.
+"""
+
+from functools import lru_cache
+from typing import Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Tried in order; Pillow's bundled default face is the last resort
+_FONT_CANDIDATES = ("DejaVuSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf", "Arial.ttf")
+
+
+@lru_cache(maxsize=64)
+def load_font(size: int) -> ImageFont.FreeTypeFont:
+    for name in _FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size)
+
+
+def _fit_font(draw: ImageDraw.ImageDraw, text: str, max_width: int, start_size: int) -> ImageFont.FreeTypeFont:
+    size = start_size
+    font = load_font(size)
+    while size > 10 and draw.textlength(text, font=font) > max_width:
+        # Shrink in coarse steps so the number of cached sizes stays small
+        size = int(size * 0.85)
+        font = load_font(size)
+    return font
+
+
+def render_text(image: Image.Image, text: str, inplace: bool = False) -> Image.Image:
+    """Return `image` with `text` centred near the bottom edge.
+
+    Draws on a copy unless `inplace` is set; images in other modes are always
+    converted to RGBA first.
+    """
+    if image.mode not in ("RGB", "RGBA"):
+        result = image.convert("RGBA")
+    else:
+        result = image if inplace else image.copy()
+    draw = ImageDraw.Draw(result)
+    width, height = result.size
+
+    font = _fit_font(draw, text, int(width * 0.9), max(height // 10, 12))
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    x = (width - (right - left)) // 2 - left
+    y = height - (bottom - top) - height // 12 - top
+
+    stroke = max(font.size // 12, 1)
+    fill = (255, 255, 255, 255) if result.mode == "RGBA" else (255, 255, 255)
+    outline = (0, 0, 0, 255) if result.mode == "RGBA" else (0, 0, 0)
+    draw.text((x, y), text, font=font, fill=fill, stroke_width=stroke, stroke_fill=outline)
+    return result
+
+
+def render_text_layer(size: Tuple[int, int], text: str) -> Image.Image:
+    """Transparent RGBA layer holding only `text`, laid out as `render_text` would.
+
+    Needs nothing but the target size, so it can be prepared while the image it
+    will go on is still being produced; `apply_text_layer` puts it on.
+    """
+    return render_text(Image.new("RGBA", size, (0, 0, 0, 0)), text, inplace=True)
+
+
+def apply_text_layer(image: Image.Image, layer: Image.Image) -> Image.Image:
+    """Composite a layer from `render_text_layer` over `image`."""
+    return Image.alpha_composite(image.convert("RGBA"), layer)
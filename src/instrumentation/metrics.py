@@ -0,0 +1,202 @@
+"""
+In-process metrics for the workflow graph.
+
+Every node execution records its wall time, the size of the state it received and
+the hop number within its workflow. Every supervisor LLM call records its latency
+and prompt/completion tokens, and every compact prompt the tokens it saved
+against the verbose one. Samples are kept in bounded per-node windows, so
+p50/p95/p99 summaries reflect recent traffic.
+
+Exports are local only: Prometheus text exposition format (suitable for a
+node_exporter textfile collector) and JSON lines, one event per node execution,
+LLM call or prompt.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional
+
+from ..config.settings import (
+    LLM_COMPLETION_COST_PER_1K,
+    LLM_PROMPT_COST_PER_1K,
+    METRICS_JSONL_PATH,
+    METRICS_WINDOW,
+)
+from .percentiles import percentile
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def llm_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of a call at the configured per-1K token prices."""
+    return (prompt_tokens * LLM_PROMPT_COST_PER_1K + completion_tokens * LLM_COMPLETION_COST_PER_1K) / 1000
+
+
+class _NodeMetrics:
+    def __init__(self, window: int):
+        self.calls = 0
+        self.errors = 0
+        self.wall_seconds_total = 0.0
+        self.wall_seconds: Deque[float] = deque(maxlen=window)
+        self.state_bytes: Deque[int] = deque(maxlen=window)
+        self.max_hop = 0
+        self.llm_calls = 0
+        self.llm_seconds_total = 0.0
+        self.llm_seconds: Deque[float] = deque(maxlen=window)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.prompt_tokens_saved = 0
+
+
+class MetricsRegistry:
+    def __init__(self, window: int = METRICS_WINDOW, jsonl_path: Optional[str] = METRICS_JSONL_PATH):
+        self.window = window
+        self.jsonl_path = jsonl_path
+        self._nodes: Dict[str, _NodeMetrics] = defaultdict(lambda: _NodeMetrics(self.window))
+        self._lock = threading.Lock()
+
+    def record_node(
+        self, node: str, wall_seconds: float, state_bytes: Optional[int], hop: int, error: bool = False
+    ) -> None:
+        """One node execution; `state_bytes` is None when the state size was not sampled."""
+        with self._lock:
+            metrics = self._nodes[node]
+            metrics.calls += 1
+            metrics.errors += int(error)
+            metrics.wall_seconds_total += wall_seconds
+            metrics.wall_seconds.append(wall_seconds)
+            if state_bytes is not None:
+                metrics.state_bytes.append(state_bytes)
+            metrics.max_hop = max(metrics.max_hop, hop)
+        self._emit({
+            "event": "node", "node": node, "wall_ms": round(wall_seconds * 1000, 3),
+            "state_bytes": state_bytes, "hop": hop, "error": error,
+        })
+
+    def record_llm_call(self, node: str, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        with self._lock:
+            metrics = self._nodes[node]
+            metrics.llm_calls += 1
+            metrics.llm_seconds_total += seconds
+            metrics.llm_seconds.append(seconds)
+            metrics.prompt_tokens += prompt_tokens
+            metrics.completion_tokens += completion_tokens
+        self._emit({
+            "event": "llm", "node": node, "latency_ms": round(seconds * 1000, 3),
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+        })
+
+    def record_prompt(self, node: str, tokens: int, saved: int) -> None:
+        """A prompt built by a node: its size and the tokens saved against the verbose prompt."""
+        with self._lock:
+            self._nodes[node].prompt_tokens_saved += saved
+        self._emit({"event": "prompt", "node": node, "tokens": tokens, "saved": saved})
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-node counts, totals and p50/p95/p99 of wall time, LLM latency and state size."""
+        with self._lock:
+            result = {}
+            for name, m in sorted(self._nodes.items()):
+                result[name] = {
+                    "calls": m.calls,
+                    "errors": m.errors,
+                    "max_hop": m.max_hop,
+                    "wall_ms": {f"p{int(q * 100)}": percentile(m.wall_seconds, q) * 1000 for q in QUANTILES},
+                    "state_bytes": {f"p{int(q * 100)}": percentile(m.state_bytes, q) for q in QUANTILES},
+                    "llm_calls": m.llm_calls,
+                    "llm_ms": {f"p{int(q * 100)}": percentile(m.llm_seconds, q) * 1000 for q in QUANTILES},
+                    "prompt_tokens": m.prompt_tokens,
+                    "completion_tokens": m.completion_tokens,
+                    "prompt_tokens_saved": m.prompt_tokens_saved,
+                    "cost_usd": llm_cost(m.prompt_tokens, m.completion_tokens),
+                }
+            return result
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def summary_metric(name: str, help_text: str, attr: str, total_attr: str, count_attr: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} summary")
+            for node, m in sorted(self._nodes.items()):
+                samples = getattr(m, attr)
+                for q in QUANTILES:
+                    lines.append(f'{name}{{node="{node}",quantile="{q}"}} {percentile(samples, q):.6f}')
+                lines.append(f'{name}_sum{{node="{node}"}} {getattr(m, total_attr):.6f}')
+                lines.append(f'{name}_count{{node="{node}"}} {getattr(m, count_attr)}')
+
+        with self._lock:
+            summary_metric("workflow_node_duration_seconds", "Wall time per node execution.",
+                           "wall_seconds", "wall_seconds_total", "calls")
+            summary_metric("workflow_llm_latency_seconds", "Latency per LLM call made by a node.",
+                           "llm_seconds", "llm_seconds_total", "llm_calls")
+
+            lines.append("# HELP workflow_node_errors_total Node executions that raised.")
+            lines.append("# TYPE workflow_node_errors_total counter")
+            for node, m in sorted(self._nodes.items()):
+                lines.append(f'workflow_node_errors_total{{node="{node}"}} {m.errors}')
+
+            lines.append("# HELP workflow_llm_tokens_total Tokens spent by LLM calls per node.")
+            lines.append("# TYPE workflow_llm_tokens_total counter")
+            for node, m in sorted(self._nodes.items()):
+                lines.append(f'workflow_llm_tokens_total{{node="{node}",kind="prompt"}} {m.prompt_tokens}')
+                lines.append(f'workflow_llm_tokens_total{{node="{node}",kind="completion"}} {m.completion_tokens}')
+
+            lines.append("# HELP workflow_llm_prompt_tokens_saved_total Prompt tokens saved by compact prompts per node.")
+            lines.append("# TYPE workflow_llm_prompt_tokens_saved_total counter")
+            for node, m in sorted(self._nodes.items()):
+                lines.append(f'workflow_llm_prompt_tokens_saved_total{{node="{node}"}} {m.prompt_tokens_saved}')
+
+            lines.append("# HELP workflow_llm_cost_usd_total Estimated LLM spend per node.")
+            lines.append("# TYPE workflow_llm_cost_usd_total counter")
+            for node, m in sorted(self._nodes.items()):
+                lines.append(f'workflow_llm_cost_usd_total{{node="{node}"}} {llm_cost(m.prompt_tokens, m.completion_tokens):.6f}')
+
+            lines.append("# HELP workflow_node_state_bytes Serialized size of the state a node received.")
+            lines.append("# TYPE workflow_node_state_bytes gauge")
+            for node, m in sorted(self._nodes.items()):
+                lines.append(f'workflow_node_state_bytes{{node="{node}"}} {percentile(m.state_bytes, 0.5):.0f}')
+
+            lines.append("# HELP workflow_node_max_hop Highest hop number seen for a node.")
+            lines.append("# TYPE workflow_node_max_hop gauge")
+            for node, m in sorted(self._nodes.items()):
+                lines.append(f'workflow_node_max_hop{{node="{node}"}} {m.max_hop}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        # Write-then-rename so a scraper never reads a half-written file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+    def format_table(self) -> str:
+        rows = [f"{'node':<20} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'llm p50':>9} {'tokens':>8} {'saved':>7} {'cost $':>8}"]
+        for node, s in self.summary().items():
+            rows.append(
+                f"{node:<20} {s['calls']:>6} {s['wall_ms']['p50']:>9.1f} {s['wall_ms']['p95']:>9.1f} "
+                f"{s['wall_ms']['p99']:>9.1f} {s['llm_ms']['p50']:>9.1f} "
+                f"{s['prompt_tokens'] + s['completion_tokens']:>8} {s['prompt_tokens_saved']:>7} {s['cost_usd']:>8.4f}"
+            )
+        return "\n".join(rows)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._nodes.clear()
+
+    def _emit(self, event: Dict) -> None:
+        if not self.jsonl_path:
+            return
+        event["ts"] = time.time()
+        line = json.dumps(event) + "\n"
+        with self._lock:
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+# Process-wide registry used by the node wrappers and the supervisor
+metrics = MetricsRegistry()
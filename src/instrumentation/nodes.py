@@ -0,0 +1,80 @@
+"""
+Node wrappers that feed the metrics registry.
+
+`instrument_node` wraps a graph node (sync or async) without changing its
+signature, so LangGraph still reads the `Command[Literal[...]]` return annotation
+for routing. Each call records wall time and the hop number, and bumps
+`hop_count` in the node's update. Pickling the incoming state costs O(history),
+so its size is only recorded for a `METRICS_STATE_SAMPLE_RATE` share of calls.
+"""
+
+import asyncio
+import dataclasses
+import functools
+import pickle
+import random
+import time
+from typing import Any, Callable, Mapping, Optional
+
+from langgraph.types import Command
+
+from ..config.settings import METRICS_STATE_SAMPLE_RATE
+from .metrics import MetricsRegistry, metrics as default_metrics
+
+
+def state_size(state: Mapping[str, Any]) -> int:
+    """Serialized size of a state snapshot in bytes (0 if it cannot be pickled)."""
+    try:
+        return len(pickle.dumps(dict(state), protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+def _sampled_state_size(state: Mapping[str, Any]) -> Optional[int]:
+    if METRICS_STATE_SAMPLE_RATE <= 0 or random.random() >= METRICS_STATE_SAMPLE_RATE:
+        return None
+    return state_size(state)
+
+
+def _with_hop(result: Any, hop: int) -> Any:
+    if isinstance(result, Command):
+        update = dict(result.update or {})
+        update["hop_count"] = hop
+        return dataclasses.replace(result, update=update)
+    if isinstance(result, dict):
+        return {**result, "hop_count": hop}
+    return result
+
+
+def instrument_node(name: str, node: Callable, registry: MetricsRegistry = None) -> Callable:
+    """Wrap `node` so every execution is recorded under `name`."""
+    registry = registry or default_metrics
+
+    if asyncio.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def instrumented(state):
+            hop = (state.get("hop_count") or 0) + 1
+            size = _sampled_state_size(state)
+            started = time.perf_counter()
+            try:
+                result = await node(state)
+            except BaseException:
+                registry.record_node(name, time.perf_counter() - started, size, hop, error=True)
+                raise
+            registry.record_node(name, time.perf_counter() - started, size, hop)
+            return _with_hop(result, hop)
+    else:
+        @functools.wraps(node)
+        def instrumented(state):
+            hop = (state.get("hop_count") or 0) + 1
+            size = _sampled_state_size(state)
+            started = time.perf_counter()
+            try:
+                result = node(state)
+            except BaseException:
+                registry.record_node(name, time.perf_counter() - started, size, hop, error=True)
+                raise
+            registry.record_node(name, time.perf_counter() - started, size, hop)
+            return _with_hop(result, hop)
+
+    return instrumented
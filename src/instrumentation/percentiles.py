@@ -0,0 +1,17 @@
+"""
+Percentiles of latency and size samples.
+
+Shared by the metrics registry and the benchmarks. It reads no settings, so the
+benchmarks can import it before they configure the environment.
+"""
+
+from typing import Iterable
+
+
+def percentile(samples: Iterable[float], q: float) -> float:
+    """Nearest-rank `q` quantile (0 to 1) of `samples`, 0.0 when there are none."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
@@ -0,0 +1,447 @@
+"""
+Process-wide gateway for chat model calls.
+
+Every LLM call in the process (supervisor routing and planning, evaluation
+judging) goes through `get_gateway()`, which:
+
+- keeps one pooled HTTP client for synchronous calls and one per event loop for
+  async calls, shared by every model, so connections are reused across calls,
+  agents and evaluators (`LLM_MAX_CONNECTIONS`);
+- paces calls with client-side token buckets for requests and tokens per minute
+  (`LLM_RPM_LIMIT`, `LLM_TPM_LIMIT`), shared by every thread and event loop;
+- retries 429s, 5xx responses, timeouts and connection errors with full-jitter
+  exponential backoff, honouring `Retry-After`; a 429 pauses every caller rather
+  than only the one that received it, so a burst does not turn into a 429 storm;
+- coalesces identical in-flight prompts (single flight): concurrent callers of the
+  same temperature-0 prompt share one call, and only the first is charged for it.
+
+The OpenAI client's own retries are turned off, so each retry is made and
+counted here once. Point `OPENAI_BASE_URL` at `src.benchmarks.mock_llm` to
+exercise all of this offline.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import random
+import threading
+import time
+import weakref
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config.settings import (
+    LLM_COALESCE,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_RETRY_MAX_SECONDS,
+    LLM_RPM_LIMIT,
+    LLM_TIMEOUT_SECONDS,
+    LLM_TPM_LIMIT,
+)
+from .tokens import MESSAGE_OVERHEAD, count_tokens
+
+# Completion tokens reserved per call before its usage is known
+COMPLETION_ESTIMATE = 256
+# Burst allowed by a bucket, in seconds of its rate; providers enforce per-minute
+# limits over shorter windows, so a full minute's allowance at once still gets 429s
+_BURST_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class ChatModel:
+    """A model configuration calls are made against.
+
+    With `schema`, the call returns structured output via function calling, as
+    {"raw": AIMessage, "parsed": schema instance, "parsing_error": ...}.
+    """
+
+    model: str
+    temperature: float = 0
+    schema: Optional[type] = None
+
+
+@dataclass
+class GatewayStats:
+    calls: int = 0  # requests sent upstream, retries included
+    coalesced: int = 0  # calls answered by another caller's identical in-flight call
+    retries: int = 0
+    rate_limited: int = 0  # 429 responses received
+    throttled_seconds: float = 0.0  # time spent waiting on the client-side limits
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class _Bucket:
+    """Token bucket refilled continuously at `per_minute` / 60 per second."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(self.rate * _BURST_SECONDS, 1.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` now, going into debt if needed; returns seconds until it is covered."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Request and token buckets plus a shared pause after 429s; 0 disables a limit.
+
+    Callers reserve capacity and then sleep for the returned wait outside the
+    lock, so one limiter serves threads and any number of event loops.
+    """
+
+    def __init__(self, rpm: int = LLM_RPM_LIMIT, tpm: int = LLM_TPM_LIMIT):
+        self._requests = _Bucket(rpm) if rpm > 0 else None
+        self._tokens = _Bucket(tpm) if tpm > 0 else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = self._paused_until - now
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            return max(wait, 0.0)
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Return the unused part of a token reservation once usage is known."""
+        if self._tokens is not None and used < reserved:
+            with self._lock:
+                self._tokens.refund(reserved - used)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class _Flight:
+    """An in-flight call that identical calls can wait on."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop]):
+        self.loop = loop
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+
+
+def _usage(response: Any) -> Dict:
+    # Structured output with include_raw returns {"raw": AIMessage, "parsed": ...}
+    message = response.get("raw") if isinstance(response, dict) else response
+    return getattr(message, "usage_metadata", None) or {}
+
+
+def _shared(response: Any) -> Any:
+    """A coalesced caller's copy of a response, without the usage it did not pay for."""
+    if isinstance(response, dict):
+        raw = response.get("raw")
+        return {**response, "raw": raw.model_copy(update={"usage_metadata": None}) if raw is not None else None}
+    return response.model_copy(update={"usage_metadata": None})
+
+
+def _retry_after(error: Any) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(header)
+        if value is not None:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue  # an HTTP date; fall back to backoff
+    return None
+
+
+def _classify(error: Exception) -> Tuple[bool, bool]:
+    """(retryable, rate limited) for an error raised by the OpenAI client."""
+    import openai
+    if isinstance(error, openai.RateLimitError):
+        # Exhausted quota is a 429 too, but waiting will not help
+        return getattr(error, "code", None) != "insufficient_quota", True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500, False
+    # Timeouts are connection errors
+    return isinstance(error, openai.APIConnectionError), False
+
+
+class LLMGateway:
+    """Shared, rate-limited, retrying and coalescing entry point for chat model calls."""
+
+    def __init__(
+        self,
+        rpm: int = LLM_RPM_LIMIT,
+        tpm: int = LLM_TPM_LIMIT,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff: float = LLM_RETRY_BASE_SECONDS,
+        max_backoff: float = LLM_RETRY_MAX_SECONDS,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        coalesce: bool = LLM_COALESCE,
+    ):
+        self.limiter = RateLimiter(rpm, tpm)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.coalesce = coalesce
+        self.stats = GatewayStats()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+        self._http_client = None
+        self._models: Dict[ChatModel, Any] = {}
+        # Async HTTP connections belong to the event loop that opened them
+        self._async_models: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[ChatModel, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def invoke(self, model: ChatModel, messages: List[Any]) -> Any:
+        key = self._flight_key(model, messages)
+        if key is None:
+            return self._call(model, messages)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            flight = self._inflight.get(key)
+            # Blocking on a call driven by this thread's own event loop would deadlock
+            if flight is not None and (flight.loop is None or flight.loop is not loop):
+                self.stats.coalesced += 1
+            else:
+                flight = None
+                leader = self._inflight[key] = _Flight(None)
+        if flight is not None:
+            return _shared(flight.future.result())
+        try:
+            response = self._call(model, messages)
+        except BaseException as error:
+            self._land(key, leader, error=error)
+            raise
+        self._land(key, leader, response=response)
+        return response
+
+    async def ainvoke(self, model: ChatModel, messages: List[Any]) -> Any:
+        key = self._flight_key(model, messages)
+        if key is None:
+            return await self._acall(model, messages)
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.stats.coalesced += 1
+            else:
+                leader = self._inflight[key] = _Flight(asyncio.get_running_loop())
+        if flight is not None:
+            return _shared(await asyncio.wrap_future(flight.future))
+
+        # Shielded so that a cancelled leader does not fail the callers waiting on it
+        call = asyncio.ensure_future(self._acall(model, messages))
+
+        def landed(task: asyncio.Task) -> None:
+            if task.cancelled():
+                self._land(key, leader, error=asyncio.CancelledError())
+            elif task.exception() is not None:
+                self._land(key, leader, error=task.exception())
+            else:
+                self._land(key, leader, response=task.result())
+
+        call.add_done_callback(landed)
+        return await asyncio.shield(call)
+
+    def _flight_key(self, model: ChatModel, messages: List[Any]) -> Optional[str]:
+        # Sampled answers differ from call to call, so only deterministic prompts are shared
+        if not self.coalesce or model.temperature != 0:
+            return None
+        payload = json.dumps(
+            {
+                "model": model.model,
+                "schema": model.schema.__name__ if model.schema is not None else None,
+                "messages": [[getattr(m, "type", None), getattr(m, "content", m)] for m in messages],
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _land(self, key: str, flight: _Flight, response: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        if error is not None:
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_result(response)
+
+    def _call(self, model: ChatModel, messages: List[Any]) -> Any:
+        runnable = self._runnable(model)
+        tokens = self._estimate_tokens(model, messages)
+        attempt = 0
+        while True:
+            wait = self._reserve(tokens)
+            if wait:
+                time.sleep(wait)
+            try:
+                response = runnable.invoke(messages)
+            except Exception as error:
+                delay = self._retry_delay(error, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self._settle(tokens, response)
+            return response
+
+    async def _acall(self, model: ChatModel, messages: List[Any]) -> Any:
+        runnable = self._async_runnable(model)
+        tokens = self._estimate_tokens(model, messages)
+        attempt = 0
+        while True:
+            wait = self._reserve(tokens)
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                response = await runnable.ainvoke(messages)
+            except Exception as error:
+                delay = self._retry_delay(error, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._settle(tokens, response)
+            return response
+
+    def _reserve(self, tokens: int) -> float:
+        wait = self.limiter.reserve(tokens)
+        with self._lock:
+            self.stats.calls += 1
+            self.stats.throttled_seconds += wait
+        return wait
+
+    def _settle(self, reserved: int, response: Any) -> None:
+        usage = _usage(response)
+        if usage:
+            self.limiter.settle(reserved, usage.get("total_tokens", reserved))
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying after `error`, or None to give up."""
+        retryable, rate_limited = _classify(error)
+        if rate_limited:
+            with self._lock:
+                self.stats.rate_limited += 1
+        if not retryable or attempt >= self.max_retries:
+            return None
+
+        # Full jitter keeps callers that failed together from retrying together
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = min(retry_after, self.max_backoff) + random.uniform(0, self.backoff)
+        if rate_limited:
+            self.limiter.pause(delay)
+        with self._lock:
+            self.stats.retries += 1
+        print(f"🔁 LLM call failed ({type(error).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        return delay
+
+    def _estimate_tokens(self, model: ChatModel, messages: List[Any]) -> int:
+        # Only pacing depends on this, so never wait for an encoding to load here
+        prompt = sum(
+            count_tokens(content, model.model) + MESSAGE_OVERHEAD
+            for content in (getattr(m, "content", "") for m in messages)
+            if isinstance(content, str)
+        )
+        return prompt + COMPLETION_ESTIMATE
+
+    def _limits(self):
+        import httpx
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+
+    def _sync_http_client(self):
+        with self._lock:
+            if self._http_client is None:
+                import httpx
+                self._http_client = httpx.Client(limits=self._limits(), timeout=self.timeout, follow_redirects=True)
+            return self._http_client
+
+    def _runnable(self, model: ChatModel) -> Any:
+        runnable = self._models.get(model)
+        if runnable is None:
+            runnable = self._models[model] = self._build(model, self._sync_http_client(), None)
+        return runnable
+
+    def _async_runnable(self, model: ChatModel) -> Any:
+        loop = asyncio.get_running_loop()
+        models = self._async_models.setdefault(loop, {})
+        runnable = models.get(model)
+        if runnable is None:
+            http_client = self._async_http_clients.get(loop)
+            if http_client is None:
+                import httpx
+                http_client = self._async_http_clients[loop] = httpx.AsyncClient(
+                    limits=self._limits(), timeout=self.timeout, follow_redirects=True
+                )
+            runnable = models[model] = self._build(model, self._sync_http_client(), http_client)
+        return runnable
+
+    def _build(self, model: ChatModel, http_client: Any, http_async_client: Any) -> Any:
+        # langchain_openai is slow to import and fast-path runs may never need it
+        from langchain_openai import ChatOpenAI
+        llm = ChatOpenAI(
+            model=model.model,
+            temperature=model.temperature,
+            max_retries=0,
+            timeout=self.timeout,
+            http_client=http_client,
+            http_async_client=http_async_client,
+        )
+        if model.schema is not None:
+            # include_raw keeps the AIMessage so token usage can be recorded
+            return llm.with_structured_output(model.schema, method="function_calling", include_raw=True)
+        return llm
+
+    def close(self) -> None:
+        """Close the synchronous connection pool; use `aclose` from a loop that made async calls."""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+            self._models.clear()
+
+    async def aclose(self) -> None:
+        """Close the running event loop's connection pool, then the synchronous one."""
+        loop = asyncio.get_running_loop()
+        self._async_models.pop(loop, None)
+        http_client = self._async_http_clients.pop(loop, None)
+        if http_client is not None:
+            await http_client.aclose()
+        self.close()
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Process-wide LLM gateway configured from settings."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
@@ -0,0 +1,95 @@
+"""
+Token counting for chat prompts.
+
+Counts use the model's tiktoken encoding, or a 4-characters-per-token estimate
+when the encoding cannot be loaded: tiktoken downloads it on first use, so
+offline (or if the download takes too long) the estimate is used.
+
+Loading an encoding can take seconds, so only callers that need exact counts
+(prompt budgets) load one with `get_tokenizer`. `count_tokens` never loads
+anything: it uses an encoding some caller has already loaded, else the estimate.
+"""
+
+import threading
+from typing import Dict, Optional
+
+from ..config.settings import SUPERVISOR_MODEL
+
+# Chat formatting tokens added around each message
+MESSAGE_OVERHEAD = 4
+_ELLIPSIS = " … "
+
+# Longest wait for tiktoken to load (and possibly download) an encoding
+_ENCODING_LOAD_SECONDS = 5.0
+
+
+def estimate_tokens(text: str) -> int:
+    """About 4 characters per token, for when no encoding is loaded."""
+    return (len(text) + 3) // 4
+
+
+def _load_encoding(model: str):
+    loaded = {}
+
+    def load():
+        try:
+            import tiktoken
+            loaded["encoding"] = tiktoken.encoding_for_model(model)
+        except Exception as e:
+            loaded["error"] = e
+
+    # Offline, the download can block until the socket times out; do not wait for it
+    thread = threading.Thread(target=load, name="tiktoken-load", daemon=True)
+    thread.start()
+    thread.join(_ENCODING_LOAD_SECONDS)
+    encoding = loaded.get("encoding")
+    if encoding is None:
+        reason = loaded.get("error") or f"not loaded within {_ENCODING_LOAD_SECONDS:g}s"
+        print(f"⚠️ No tiktoken encoding for {model} ({reason}), estimating tokens from characters")
+    return encoding
+
+
+class Tokenizer:
+    """Token counts for a model's encoding, estimated when tiktoken is unavailable."""
+
+    def __init__(self, model: str):
+        self._encoding = _load_encoding(model)
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if self._encoding is None:
+            return estimate_tokens(text)
+        return len(self._encoding.encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """`text` cut to about `max_tokens`, keeping its start and end."""
+        if self.count(text) <= max_tokens:
+            return text
+        head, tail = max_tokens * 2 // 3, max_tokens // 3
+        if self._encoding is None:
+            return text[:head * 4].rstrip() + _ELLIPSIS + text[-tail * 4:].lstrip()
+        tokens = self._encoding.encode(text)
+        return (
+            self._encoding.decode(tokens[:head]).rstrip() + _ELLIPSIS + self._encoding.decode(tokens[-tail:]).lstrip()
+        )
+
+
+_tokenizers: Dict[str, Tokenizer] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def get_tokenizer(model: str = SUPERVISOR_MODEL) -> Tokenizer:
+    """Process-wide tokenizer for `model`, loading its encoding on first use."""
+    with _tokenizers_lock:
+        if model not in _tokenizers:
+            _tokenizers[model] = Tokenizer(model)
+        return _tokenizers[model]
+
+
+def count_tokens(text: str, model: str = SUPERVISOR_MODEL) -> int:
+    """Exact count if `model`'s encoding is already loaded, else the estimate."""
+    tokenizer: Optional[Tokenizer] = _tokenizers.get(model)
+    return tokenizer.count(text) if tokenizer is not None else estimate_tokens(text)
@@ -1,74 +1,182 @@
 from langgraph.graph import StateGraph, START
 from langchain_core.messages import HumanMessage
 from dotenv import load_dotenv
+import argparse
+import contextlib
+import json
 import os
-from langchain_core.runnables.graph import MermaidDrawMethod
+import sys
+import threading
+import uuid
+from typing import Optional
 
 # Use relative imports (note the . before agents)
-from .agents.supervisor import create_supervisor_agent
-from .agents.image_generation import create_image_generation_agent
-from .agents.text_overlay import create_text_overlay_agent
-from .agents.background_removal import create_background_removal_agent
-from .agent_types.state import AgentState
+from .agents.supervisor import create_supervisor_agent, create_async_supervisor_agent
+from .agents.image_generation import create_image_generation_agent, create_async_image_generation_agent
+from .agents.text_overlay import create_text_overlay_agent, create_async_text_overlay_agent
+from .agents.background_removal import create_background_removal_agent, create_async_background_removal_agent
+from .agents.fused_pipeline import create_fused_pipeline_agent, create_async_fused_pipeline_agent
+from .agents.branches import create_branch_worker_agent, create_async_branch_worker_agent, create_merge_agent
+from .agent_types.state import AgentState, create_initial_state
+from .execution.checkpoints import get_checkpointer, resume_input, run_config
+from .execution.pools import get_worker_pools
+from .execution.scheduler import schedule_node
+from .cache.results import get_result_cache
+from .cache.routing import get_routing_cache
+from .config.settings import INSTRUMENTATION_ENABLED, METRICS_PROMETHEUS_PATH, OUTPUT_DIR
+from .imaging.store import image_store
+from .instrumentation.metrics import metrics
+from .instrumentation.nodes import instrument_node
+from .visualization import FORMATS, render_workflow_graph
 
-def create_workflow():
+_workflows = {}
+_workflows_lock = threading.Lock()
+
+def create_workflow(use_async: bool = False, checkpointer=None):
     # Create the graph
     builder = StateGraph(AgentState)
 
-    # Add nodes for each agent
-    builder.add_node("supervisor", create_supervisor_agent())
-    builder.add_node("image_generation", create_image_generation_agent())
-    builder.add_node("text_overlay", create_text_overlay_agent())
-    builder.add_node("background_removal", create_background_removal_agent())
+    # CPU-heavy agents run in worker pools when offloading is enabled
+    pools = get_worker_pools()
+
+    # Add nodes for each agent; async nodes require ainvoke/astream
+    if use_async:
+        nodes = {
+            "supervisor": create_async_supervisor_agent(),
+            "image_generation": create_async_image_generation_agent(pools),
+            "text_overlay": create_async_text_overlay_agent(pools),
+            "background_removal": create_async_background_removal_agent(pools),
+            "fused_pipeline": create_async_fused_pipeline_agent(pools),
+            "branch_worker": create_async_branch_worker_agent(pools),
+            "merge": create_merge_agent(),
+        }
+    else:
+        nodes = {
+            "supervisor": create_supervisor_agent(),
+            "image_generation": create_image_generation_agent(pools),
+            "text_overlay": create_text_overlay_agent(pools),
+            "background_removal": create_background_removal_agent(pools),
+            "fused_pipeline": create_fused_pipeline_agent(pools),
+            "branch_worker": create_branch_worker_agent(pools),
+            "merge": create_merge_agent(),
+        }
+
+    for name, node in nodes.items():
+        if INSTRUMENTATION_ENABLED:
+            # Record wall time, state size and hop count for every execution
+            node = instrument_node(name, node)
+        if use_async:
+            # Image nodes wait for a CPU slot in priority order when scheduling is enabled
+            node = schedule_node(name, node)
+        builder.add_node(name, node)
 
     # Add starting edge
     builder.add_edge(START, "supervisor")
 
-    graph = builder.compile()
-    
-    # Generate and save the graph visualization
-    graph_png = graph.get_graph().draw_mermaid_png(
-        draw_method=MermaidDrawMethod.API
-    )
-    
-    with open("workflow_graph.png", "wb") as f:
-        f.write(graph_png)
-    
-    print("\n📊 Graph visualization saved as 'workflow_graph.png'")
-    
-    return graph
+    # With a checkpointer, state is saved after every node and runs can be resumed
+    return builder.compile(checkpointer=checkpointer)
+
+def get_workflow(use_async: bool = False):
+    """Process-wide compiled graph; built on first use and shared afterwards.
+
+    Compiled graphs are stateless between runs, so every caller in the process
+    (CLI, batch, evaluation, workers) can reuse the same instance.
+    """
+    if use_async not in _workflows:
+        with _workflows_lock:
+            if use_async not in _workflows:
+                _workflows[use_async] = create_workflow(use_async, get_checkpointer())
+    return _workflows[use_async]
+
+def run_workflow(request: Optional[str], thread_id: Optional[str] = None) -> AgentState:
+    """Run a request to completion; with a `thread_id`, continue that run if it exists.
+
+    A thread that was interrupted resumes from its last completed node, and a
+    thread that already finished returns its final state without doing any work.
+    `request` may be None to resume an existing thread only.
+    """
+    workflow = get_workflow()
+    config = run_config(thread_id)
+    graph_input = create_initial_state(HumanMessage(content=request)) if request is not None else None
+    if config is not None:
+        snapshot = workflow.get_state(config)
+        graph_input, finished = resume_input(snapshot, graph_input)
+        if finished:
+            return snapshot.values
+    return workflow.invoke(graph_input, config)
+
+def resume_workflow(thread_id: str) -> AgentState:
+    """Continue an interrupted run from its last checkpoint."""
+    return run_workflow(None, thread_id)
+
+async def arun_workflow(request: Optional[str], thread_id: Optional[str] = None) -> AgentState:
+    """Async form of `run_workflow`, on the async graph."""
+    workflow = get_workflow(use_async=True)
+    config = run_config(thread_id)
+    graph_input = create_initial_state(HumanMessage(content=request)) if request is not None else None
+    if config is not None:
+        snapshot = await workflow.aget_state(config)
+        graph_input, finished = resume_input(snapshot, graph_input)
+        if finished:
+            return snapshot.values
+    return await workflow.ainvoke(graph_input, config)
+
+async def aresume_workflow(thread_id: str) -> AgentState:
+    return await arun_workflow(None, thread_id)
 
 def main():
+    parser = argparse.ArgumentParser(description="Image Processing Multi-Agent System")
+    parser.add_argument("--render-graph", action="store_true",
+                        help="Save the workflow graph visualization before running")
+    parser.add_argument("--graph-format", choices=FORMATS, default="png",
+                        help="'mermaid' writes the diagram source without any renderer")
+    parser.add_argument("--thread-id", help="Checkpoint the run under this id (continues it if it exists)")
+    parser.add_argument("--resume", metavar="THREAD_ID", help="Resume an interrupted run instead of asking for a request")
+    parser.add_argument("--request", help="Run this request instead of prompting for one")
+    parser.add_argument("--stream", action="store_true",
+                        help="Emit one JSON line per node as it finishes (progress goes to stderr)")
+    args = parser.parse_args()
+    
     # Load environment variables
     load_dotenv()
     
+    # Create the workflow
+    workflow = get_workflow()
+    
+    if args.render_graph:
+        output = "workflow_graph.png" if args.graph_format == "png" else "workflow_graph.mmd"
+        render_workflow_graph(workflow, output, args.graph_format)
+        print(f"\n📊 Graph visualization saved as '{output}'")
+    
     # Check for OpenAI API key
     if not os.getenv("OPENAI_API_KEY"):
         print("Error: OPENAI_API_KEY not found in environment variables")
         return
-
-    # Create the workflow
-    workflow = create_workflow()
+    
+    if args.stream:
+        stream_main(args)
+        return
     
     # Get user input
     print("\n🤖 Image Processing Multi-Agent System")
     print("----------------------------------------")
-    user_instruction = input("\nWhat would you like to do with the image?\n(e.g., 'Generate an image of a sunset and add text to it')\n\nYour request: ")
-    
-    # Initialize state
-    initial_state = {
-        "messages": [HumanMessage(content=user_instruction)],
-        "next_agent": None,
-        "current_task": None,
-        "image_url": None,
-        "processed_image_url": None
-    }
+    if args.resume:
+        user_instruction = None
+        thread_id = args.resume
+        print(f"\n♻️ Resuming run {thread_id} from its last checkpoint...")
+    else:
+        user_instruction = args.request or input("\nWhat would you like to do with the image?\n(e.g., 'Generate an image of a sunset and add text to it')\n\nYour request: ")
+        thread_id = args.thread_id
+        if thread_id is None and get_checkpointer() is not None:
+            thread_id = str(uuid.uuid4())
+        if thread_id is not None:
+            print(f"\n💾 Checkpointing run as {thread_id} (resume with --resume {thread_id})")
     
     print("\n🚀 Starting workflow...")
     print("----------------------------------------")
     
     # Execute workflow
-    final_state = workflow.invoke(initial_state)
+    final_state = run_workflow(user_instruction, thread_id)
     
     # Print results
     print("\n✨ Workflow completed!")
@@ -80,6 +188,51 @@ def main():
         print(f"- {content}")
     
     print(f"\nFinal image URL: {final_state['processed_image_url']}")
+    if final_state["processed_image_url"] in image_store:
+        # The only encode of the workflow happens here, once, for the final result
+        path = image_store.save(final_state["processed_image_url"], OUTPUT_DIR)
+        print(f"💾 Saved final image to {path}")
+    for ref in (final_state.get("variant_urls") or [])[1:]:
+        if ref in image_store:
+            print(f"💾 Saved variant to {image_store.save(ref, OUTPUT_DIR)}")
+    print(f"⚡ Supervisor LLM calls skipped: {final_state['llm_calls_skipped']}")
+    termination = final_state.get("termination")
+    if termination:
+        print(f"🛑 Stopped early ({termination['reason']}): {termination['detail']}")
+        print(f"   Completed: {', '.join(termination['completed_tasks']) or 'nothing'}")
+    
+    routing_cache = get_routing_cache()
+    if routing_cache is not None:
+        stats = routing_cache.stats
+        print(f"🗄️ Routing cache: {stats.hits} hit(s), {stats.misses} miss(es)")
+    
+    result_cache = get_result_cache()
+    if result_cache is not None:
+        stats = result_cache.stats
+        print(f"🧩 Result cache: {stats.hits} step(s) reused, {stats.misses} computed")
+    
+    if INSTRUMENTATION_ENABLED:
+        print(f"\n⏱️ Node metrics ({final_state['hop_count']} hops):")
+        print(metrics.format_table())
+        if METRICS_PROMETHEUS_PATH:
+            metrics.write_prometheus(METRICS_PROMETHEUS_PATH)
+            print(f"📈 Prometheus metrics written to {METRICS_PROMETHEUS_PATH}")
+
+def stream_main(args):
+    """`--stream`: JSON lines on stdout, agent progress on stderr."""
+    from .streaming import stream_workflow
+    
+    request = None if args.resume else (args.request or sys.stdin.readline().strip())
+    thread_id = args.resume or args.thread_id
+    stdout = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            for event in stream_workflow(request, thread_id, save_dir=OUTPUT_DIR):
+                stdout.write(json.dumps(event) + "\n")
+                stdout.flush()
+    except Exception as e:
+        stdout.write(json.dumps({"event": "error", "error": str(e)}) + "\n")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,541 @@
+"""
+HTTP service for the workflow.
+
+A dependency-free ASGI application that shares one compiled async graph across
+every request. Jobs are queued, run by a fixed pool of worker tasks on the event
+loop, and followed by polling or streaming:
+
+    POST /jobs               {"request": "...", "thread_id": "...", "priority": 0, "deadline_seconds": 30}
+                             -> 202 {"job_id": ..., "status": "queued"}
+    GET  /jobs/{id}          status, final result and error
+    GET  /jobs/{id}/events   progress events (see src/streaming.py) as JSON lines, live until the job ends
+    GET  /images/{sha256}    a result image as PNG
+    GET  /health             queue depth, running jobs and whether the service is draining
+
+The tenant is read from the `X-Tenant` header. A submission is rejected with 429
+when `SERVER_QUEUE_SIZE` jobs are already waiting or its tenant has
+`SERVER_TENANT_MAX_QUEUED` waiting. At most `SERVER_TENANT_CONCURRENCY` jobs of one
+tenant run at once, and workers take tenants round robin, so a busy tenant cannot
+starve the others. A `thread_id` belongs to the tenant that created it: the same
+id sent with another `X-Tenant` names a different thread. On shutdown the service stops admitting jobs (503), lets queued
+and running jobs finish for up to `SERVER_DRAIN_SECONDS`, then cancels the rest.
+
+`priority` (higher first) and `deadline_seconds` are optional. With
+`SCHEDULER_ENABLED=true` workers start a tenant's best-ranked job first, and the
+job's LLM calls and image hops are scheduled by them (see src/execution/scheduler.py).
+
+Usage:
+    python -m src.server --port 8000        # needs uvicorn
+    uvicorn src.server:app --port 8000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .config.settings import (
+    BATCH_TIMEOUT_SECONDS,
+    SERVER_DRAIN_SECONDS,
+    SERVER_HOST,
+    SERVER_JOB_RETENTION,
+    SERVER_PORT,
+    SERVER_QUEUE_SIZE,
+    SERVER_TENANT_CONCURRENCY,
+    SERVER_TENANT_MAX_QUEUED,
+    SERVER_WORKERS,
+)
+from .execution.checkpoints import get_checkpointer
+from .execution.scheduler import Ticket, get_scheduler
+from .llm.gateway import get_gateway
+
+# (request, thread id) -> progress events
+StreamFn = Callable[[Optional[str], Optional[str]], AsyncIterator[Dict]]
+
+FINISHED = ("done", "failed", "cancelled")
+_MAX_BODY_BYTES = 64 * 1024
+_DEFAULT_TENANT = "default"
+
+
+class AdmissionError(Exception):
+    """A submission the service will not take; carries the HTTP status to answer with."""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    id: str
+    tenant: str
+    request: Optional[str]
+    thread_id: Optional[str] = None
+    priority: int = 0
+    deadline_seconds: Optional[float] = None
+    status: str = "queued"  # queued, running, done, failed or cancelled
+    events: List[Dict] = field(default_factory=list)
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    ticket: Optional[Ticket] = field(default=None, repr=False)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def _notify(self) -> None:
+        # Wake every follower, then arm a fresh event for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def publish(self, event: Dict) -> None:
+        self.events.append(event)
+        self._notify()
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        self._notify()
+
+    async def follow(self) -> AsyncIterator[Dict]:
+        """Every event of the job, from the first, as they are published."""
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.finished:
+                return
+            await changed.wait()
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "tenant": self.tenant,
+            "status": self.status,
+            "request": self.request,
+            "thread_id": self.thread_id,
+            "priority": self.priority,
+            "deadline_seconds": self.deadline_seconds,
+            "events": len(self.events),
+            "result": self.result,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobService:
+    """Bounded, tenant-fair job queue in front of the shared async graph."""
+
+    def __init__(
+        self,
+        stream: Optional[StreamFn] = None,
+        workers: int = SERVER_WORKERS,
+        queue_size: int = SERVER_QUEUE_SIZE,
+        tenant_concurrency: int = SERVER_TENANT_CONCURRENCY,
+        tenant_max_queued: int = SERVER_TENANT_MAX_QUEUED,
+        retention: int = SERVER_JOB_RETENTION,
+        timeout: float = BATCH_TIMEOUT_SECONDS,
+    ):
+        self.stream = stream
+        self.workers = workers
+        self.queue_size = queue_size
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_max_queued = tenant_max_queued
+        self.retention = retention
+        self.timeout = timeout
+        self.draining = False
+        self.rejected = 0
+
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._waiting: Dict[str, Deque[Job]] = {}
+        # Tenants with waiting jobs, in the order workers serve them
+        self._rotation: Deque[str] = deque()
+        self._running: Dict[str, int] = {}
+        self._queued = 0
+        self._finished: Deque[str] = deque()
+        self._ready: Optional[asyncio.Condition] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    async def start(self) -> None:
+        """Start the workers on the running loop; later calls do nothing."""
+        if self._ready is not None:
+            return
+        if self.stream is None:
+            from .streaming import astream_workflow
+            self.stream = astream_workflow
+        self._ready = asyncio.Condition()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{index}") for index in range(self.workers)
+        ]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def submit(
+        self,
+        tenant: str,
+        request: Optional[str],
+        thread_id: Optional[str] = None,
+        priority: int = 0,
+        deadline_seconds: Optional[float] = None,
+    ) -> Job:
+        """Queue a job, or raise `AdmissionError` if the service cannot take it now."""
+        await self.start()
+        async with self._ready:
+            if self.draining:
+                raise AdmissionError(503, "Service is draining")
+            if self._queued >= self.queue_size:
+                self.rejected += 1
+                raise AdmissionError(429, "Queue is full", retry_after=1)
+            waiting = self._waiting.get(tenant)
+            if waiting is not None and len(waiting) >= self.tenant_max_queued:
+                self.rejected += 1
+                raise AdmissionError(429, f"Tenant '{tenant}' has too many queued jobs", retry_after=1)
+
+            job = Job(id=uuid.uuid4().hex, tenant=tenant, request=request, thread_id=thread_id,
+                      priority=priority, deadline_seconds=deadline_seconds)
+            scheduler = get_scheduler()
+            if scheduler is not None:
+                job.ticket = scheduler.ticket(request, priority, deadline_seconds)
+            self._jobs[job.id] = job
+            if waiting is None:
+                waiting = self._waiting[tenant] = deque()
+                self._rotation.append(tenant)
+            waiting.append(job)
+            self._queued += 1
+            self._ready.notify()
+        return job
+
+    def _next_job(self) -> Optional[Job]:
+        """Next job of the first tenant in rotation that is under its concurrency limit."""
+        scheduler = get_scheduler()
+        for _ in range(len(self._rotation)):
+            tenant = self._rotation.popleft()
+            if self._running.get(tenant, 0) >= self.tenant_concurrency:
+                self._rotation.append(tenant)
+                continue
+            waiting = self._waiting[tenant]
+            if scheduler is not None:
+                # The tenant's best-ranked job rather than its oldest
+                job = min(waiting, key=lambda queued: scheduler.rank(queued.ticket, queued.ticket.submitted))
+                waiting.remove(job)
+            else:
+                job = waiting.popleft()
+            if waiting:
+                self._rotation.append(tenant)
+            else:
+                del self._waiting[tenant]
+            self._queued -= 1
+            self._running[tenant] = self._running.get(tenant, 0) + 1
+            return job
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            async with self._ready:
+                job = self._next_job()
+                while job is None:
+                    await self._ready.wait()
+                    job = self._next_job()
+            try:
+                await self._run(job)
+            finally:
+                async with self._ready:
+                    self._running[job.tenant] -= 1
+                    if not self._running[job.tenant]:
+                        del self._running[job.tenant]
+                    # A tenant slot freed up; also wakes a pending drain
+                    self._ready.notify_all()
+                self._retire(job)
+
+    async def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        if job.thread_id is None and get_checkpointer() is not None:
+            # Named here rather than by the stream, so a new thread is scoped to its tenant too
+            job.thread_id = str(uuid.uuid4())
+        thread_id = _tenant_thread(job.tenant, job.thread_id) if job.thread_id is not None else None
+
+        async def consume():
+            async for event in self.stream(job.request, thread_id):
+                if event.get("thread_id") is not None:
+                    if thread_id is None:
+                        job.thread_id = event["thread_id"]
+                    else:
+                        # Clients only ever see their own, unscoped id
+                        event = {**event, "thread_id": job.thread_id}
+                job.publish(event)
+                if event.get("event") == "end":
+                    job.result = event
+
+        scheduler = get_scheduler()
+        # The job's ticket is current for every node it runs
+        scheduled = scheduler.activate(job.ticket) if job.ticket is not None else contextlib.nullcontext()
+        try:
+            with scheduled:
+                await asyncio.wait_for(consume(), timeout=self.timeout)
+            job.finish("done")
+        except asyncio.TimeoutError:
+            job.finish("failed", f"Timed out after {self.timeout:.0f}s")
+        except asyncio.CancelledError:
+            job.finish("cancelled", "Cancelled while draining")
+            raise
+        except Exception as e:
+            job.finish("failed", str(e))
+
+    def _retire(self, job: Job) -> None:
+        # Finished jobs stay pollable until `retention` newer ones have finished
+        self._finished.append(job.id)
+        while len(self._finished) > self.retention:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    async def drain(self, timeout: float = SERVER_DRAIN_SECONDS) -> None:
+        """Stop admitting jobs, wait for the accepted ones, then stop the workers."""
+        self.draining = True
+        if self._ready is None:
+            return
+        try:
+            async with self._ready:
+                await asyncio.wait_for(
+                    self._ready.wait_for(lambda: not self._queued and not self._running), timeout
+                )
+        except asyncio.TimeoutError:
+            pass
+
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        for waiting in self._waiting.values():
+            for job in waiting:
+                job.finish("cancelled", "Not started before the service stopped")
+        self._waiting.clear()
+        self._rotation.clear()
+        self._queued = 0
+
+    def health(self) -> Dict:
+        health = {
+            "status": "draining" if self.draining else "ok",
+            "queued": self._queued,
+            "running": self.running,
+            "workers": self.workers,
+            "tenants": len(set(self._waiting) | set(self._running)),
+            "rejected": self.rejected,
+        }
+        scheduler = get_scheduler()
+        if scheduler is not None:
+            health["scheduler"] = scheduler.health()
+        return health
+
+
+def _encode_png(ref: str) -> bytes:
+    from .imaging.store import image_store
+
+    buffer = io.BytesIO()
+    image_store.get(ref).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class ServiceApp:
+    """ASGI application exposing a `JobService`."""
+
+    def __init__(self, service: Optional[JobService] = None):
+        self.service = service or JobService()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.service.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.service.drain()
+                await get_gateway().aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send) -> None:
+        method = scope["method"]
+        parts = [part for part in scope["path"].split("/") if part]
+        try:
+            if parts == ["jobs"] and method == "POST":
+                await self._submit(scope, receive, send)
+            elif len(parts) == 2 and parts[0] == "jobs" and method == "GET":
+                job = self._job(parts[1])
+                await _send_json(send, 200, job.to_dict())
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events" and method == "GET":
+                await self._stream_events(self._job(parts[1]), send)
+            elif len(parts) == 2 and parts[0] == "images" and method == "GET":
+                await self._image(parts[1], send)
+            elif parts == ["health"] and method == "GET":
+                await _send_json(send, 200, self.service.health())
+            else:
+                await _send_json(send, 404, {"error": "Not found"})
+        except _HTTPError as e:
+            await _send_json(send, e.status, {"error": str(e)}, e.headers)
+
+    def _job(self, job_id: str) -> Job:
+        job = self.service.get(job_id)
+        if job is None:
+            raise _HTTPError(404, f"Unknown job {job_id}")
+        return job
+
+    async def _submit(self, scope, receive, send) -> None:
+        body = await _read_body(receive)
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise _HTTPError(400, "Body must be JSON")
+        if not isinstance(payload, dict):
+            raise _HTTPError(400, "Body must be a JSON object")
+        request, thread_id = payload.get("request"), payload.get("thread_id")
+        if thread_id is not None and not isinstance(thread_id, str):
+            raise _HTTPError(400, "'thread_id' must be a string")
+        if not isinstance(request, str) and thread_id is None:
+            raise _HTTPError(400, "'request' is required unless resuming a 'thread_id'")
+
+        priority, deadline_seconds = payload.get("priority", 0), payload.get("deadline_seconds")
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise _HTTPError(400, "'priority' must be an integer")
+        if deadline_seconds is not None and (
+            not isinstance(deadline_seconds, (int, float)) or isinstance(deadline_seconds, bool) or deadline_seconds <= 0
+        ):
+            raise _HTTPError(400, "'deadline_seconds' must be a positive number")
+
+        tenant = _header(scope, b"x-tenant") or _DEFAULT_TENANT
+        try:
+            job = await self.service.submit(tenant, request, thread_id, priority, deadline_seconds)
+        except AdmissionError as e:
+            headers = [(b"retry-after", str(e.retry_after).encode())] if e.retry_after else []
+            raise _HTTPError(e.status, str(e), headers)
+        await _send_json(send, 202, {"job_id": job.id, "status": job.status, "queued": self.service.queued},
+                         [(b"location", f"/jobs/{job.id}".encode())])
+
+    async def _stream_events(self, job: Job, send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/x-ndjson"), (b"cache-control", b"no-cache")],
+        })
+        async for event in job.follow():
+            await send({"type": "http.response.body", "body": json.dumps(event).encode() + b"\n", "more_body": True})
+        status = {"event": "job", "status": job.status, "error": job.error}
+        await send({"type": "http.response.body", "body": json.dumps(status).encode() + b"\n", "more_body": False})
+
+    async def _image(self, name: str, send) -> None:
+        from .imaging.store import REF_PREFIX
+
+        try:
+            # PNG encoding holds the GIL for a while; keep it off the loop
+            data = await asyncio.to_thread(_encode_png, REF_PREFIX + name)
+        except (KeyError, FileNotFoundError):
+            raise _HTTPError(404, f"Unknown image {name}")
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"image/png")]})
+        await send({"type": "http.response.body", "body": data})
+
+
+def _tenant_thread(tenant: str, thread_id: str) -> str:
+    """Checkpoint thread of a tenant's `thread_id`, so tenants cannot reach each other's threads."""
+    return f"{tenant}:{thread_id}"
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or []
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > _MAX_BODY_BYTES:
+            raise _HTTPError(413, "Body too large")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def _send_json(send, status: int, payload: Dict, headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), *(headers or [])],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+app = ServiceApp()
+
+
+def main():
+    load_dotenv()
+    if not os.getenv("OPENAI_API_KEY"):
+        print("Error: OPENAI_API_KEY not found in environment variables")
+        return
+
+    parser = argparse.ArgumentParser(description="Serve the workflow over HTTP")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ Serving over HTTP needs an ASGI server: pip install uvicorn (or run src.server:app under any ASGI server)")
+        return
+
+    print(f"🌐 Serving on http://{args.host}:{args.port} ({app.service.workers} workers)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning",
+                timeout_graceful_shutdown=int(SERVER_DRAIN_SECONDS))
+
+
+if __name__ == "__main__":
+    main()
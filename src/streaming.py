@@ -0,0 +1,162 @@
+"""
+Streaming execution: per-node progress events instead of one final state.
+
+`stream_workflow` and `astream_workflow` are generators over the graph's update
+stream. They yield a JSON-serializable event as soon as each node finishes, so a
+caller sees the first image while later steps are still running:
+
+    {"event": "start", "request": ..., "thread_id": ...}
+    {"event": "node", "node": "image_generation", "step": 2, "elapsed_ms": ..., "node_ms": ...,
+     "messages": [...], "processed_image_url": "image://..."}
+    ...
+    {"event": "end", "elapsed_ms": ..., "first_result_ms": ..., "processed_image_url": ..., "hop_count": ...,
+     "termination": null}
+
+`termination` is set when a safeguard ended the run early (see src/agents/guards.py).
+
+`node_ms` is the time since the previous event, which covers the node and the
+graph's own bookkeeping for that step.
+
+Usage:
+    python -m src.main --stream --request "Generate an image of a cat and add text 'Hi'"
+"""
+
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from langchain_core.messages import HumanMessage
+
+from .agent_types.state import create_initial_state
+from .execution.checkpoints import resume_input, run_config
+from .imaging.store import image_store
+
+STREAM_MODES = ["updates", "values"]
+
+
+def _message_content(msg) -> str:
+    return msg.content if hasattr(msg, "content") else msg.get("content", str(msg))
+
+
+class _StreamTracker:
+    """Turns graph stream chunks into progress events."""
+
+    def __init__(self, request: Optional[str], config: Optional[dict], save_dir: Optional[str]):
+        self.request = request
+        self.thread_id = config["configurable"]["thread_id"] if config else None
+        self.save_dir = save_dir
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.first_result_ms: Optional[float] = None
+        self.step = 0
+        self.final_state: Dict[str, Any] = {}
+
+    def _ms(self, since: float) -> float:
+        return round((time.perf_counter() - since) * 1000, 1)
+
+    def start(self) -> Dict:
+        return {"event": "start", "request": self.request, "thread_id": self.thread_id}
+
+    def chunk(self, mode: str, chunk: Any) -> Iterator[Dict]:
+        if mode == "values":
+            self.final_state = chunk
+            return
+        for node, update in chunk.items():
+            update = update or {}
+            self.step += 1
+            event = {
+                "event": "node",
+                "node": node,
+                "step": self.step,
+                "elapsed_ms": self._ms(self.started),
+                "node_ms": self._ms(self.last),
+                "messages": [_message_content(msg) for msg in update.get("messages", [])],
+            }
+            if update.get("next_agent"):
+                event["next_agent"] = update["next_agent"]
+            if update.get("failed_task"):
+                event["failed_task"] = update["failed_task"]
+            for result in update.get("branch_results") or []:
+                # One parallel branch finished; the merge step publishes the combined image
+                event["branch"] = result["branch"]
+                event["branch_image_url"] = result["image_url"]
+            ref = update.get("processed_image_url")
+            if ref:
+                event["processed_image_url"] = ref
+                if self.first_result_ms is None:
+                    self.first_result_ms = event["elapsed_ms"]
+                if self.save_dir and ref in image_store:
+                    event["image_path"] = image_store.save(ref, self.save_dir)
+            self.last = time.perf_counter()
+            yield event
+
+    def end(self) -> Dict:
+        state = self.final_state
+        return {
+            "event": "end",
+            "thread_id": self.thread_id,
+            "elapsed_ms": self._ms(self.started),
+            "first_result_ms": self.first_result_ms,
+            "processed_image_url": state.get("processed_image_url"),
+            "hop_count": state.get("hop_count"),
+            "llm_calls_skipped": state.get("llm_calls_skipped"),
+            "termination": state.get("termination"),
+        }
+
+
+def stream_workflow(
+    request: Optional[str],
+    thread_id: Optional[str] = None,
+    save_dir: Optional[str] = None,
+) -> Iterator[Dict]:
+    """Run a request on the sync graph, yielding an event as each node finishes.
+
+    With `save_dir`, every intermediate image is also written there and its path
+    reported as `image_path`. A `thread_id` continues a checkpointed run.
+    """
+    from .main import get_workflow
+
+    workflow = get_workflow()
+    config = run_config(thread_id)
+    graph_input = create_initial_state(HumanMessage(content=request)) if request is not None else None
+    tracker = _StreamTracker(request, config, save_dir)
+    yield tracker.start()
+
+    if config is not None:
+        snapshot = workflow.get_state(config)
+        graph_input, finished = resume_input(snapshot, graph_input)
+        if finished:
+            tracker.final_state = snapshot.values
+            yield tracker.end()
+            return
+
+    for mode, chunk in workflow.stream(graph_input, config, stream_mode=STREAM_MODES):
+        yield from tracker.chunk(mode, chunk)
+    yield tracker.end()
+
+
+async def astream_workflow(
+    request: Optional[str],
+    thread_id: Optional[str] = None,
+    save_dir: Optional[str] = None,
+) -> AsyncIterator[Dict]:
+    """Async form of `stream_workflow`, on the async graph."""
+    from .main import get_workflow
+
+    workflow = get_workflow(use_async=True)
+    config = run_config(thread_id)
+    graph_input = create_initial_state(HumanMessage(content=request)) if request is not None else None
+    tracker = _StreamTracker(request, config, save_dir)
+    yield tracker.start()
+
+    if config is not None:
+        snapshot = await workflow.aget_state(config)
+        graph_input, finished = resume_input(snapshot, graph_input)
+        if finished:
+            tracker.final_state = snapshot.values
+            yield tracker.end()
+            return
+
+    async for mode, chunk in workflow.astream(graph_input, config, stream_mode=STREAM_MODES):
+        for event in tracker.chunk(mode, chunk):
+            yield event
+    yield tracker.end()
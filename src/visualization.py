@@ -0,0 +1,49 @@
+"""
+On-demand rendering of the workflow graph.
+
+Rendering is never part of building the graph. The Mermaid source is produced
+locally; PNG output goes through a Mermaid renderer (the mermaid.ink API by
+default, or pyppeteer for fully offline use) and is cached under the hash of the
+Mermaid source, so an unchanged graph is only ever rendered once per machine.
+"""
+
+import hashlib
+import os
+import shutil
+
+from .config.settings import GRAPH_CACHE_DIR, GRAPH_RENDER_METHOD
+
+FORMATS = ("png", "mermaid")
+
+
+def graph_hash(graph) -> str:
+    """Stable digest of a compiled graph's structure."""
+    return hashlib.sha256(graph.get_graph().draw_mermaid().encode("utf-8")).hexdigest()[:16]
+
+
+def render_workflow_graph(graph, output: str = "workflow_graph.png", fmt: str = "png", cache_dir: str = GRAPH_CACHE_DIR) -> str:
+    """Write the graph visualization to `output` and return its path."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown graph format '{fmt}'")
+
+    drawable = graph.get_graph()
+    if fmt == "mermaid":
+        # Plain text, no renderer or network needed
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(drawable.draw_mermaid())
+        return output
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cached = os.path.join(cache_dir, f"{graph_hash(graph)}.png")
+    if not os.path.exists(cached):
+        from langchain_core.runnables.graph import MermaidDrawMethod
+
+        png = drawable.draw_mermaid_png(draw_method=MermaidDrawMethod(GRAPH_RENDER_METHOD))
+        temp_path = f"{cached}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(png)
+        os.replace(temp_path, cached)
+
+    if os.path.abspath(output) != os.path.abspath(cached):
+        shutil.copyfile(cached, output)
+    return output
@@ -0,0 +1,81 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from src.agent_types.state import create_initial_state
+from src.agents.fused_pipeline import create_fused_pipeline_agent
+from src.imaging.pipeline import run_pipeline
+from src.imaging.store import image_store
+
+REQUEST = "Generate an image of a cat and add text 'Hello'"
+
+
+def _state(task_plan, **values):
+    state = create_initial_state({"role": "user", "content": REQUEST})
+    state.update(task_plan=task_plan, plan_step=0, **values)
+    return state
+
+
+class _Pools:
+    """Runs image tasks inline, failing the ones listed in `broken`."""
+
+    def __init__(self, broken=()):
+        self.broken = set(broken)
+        self.calls = []
+
+    def submit_image_task(self, agent, tasks, image, params):
+        self.calls.append(list(tasks))
+        future = Future()
+        if self.broken.intersection(tasks):
+            future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+        else:
+            future.set_result(run_pipeline(tasks, image, params)[0])
+        return future
+
+
+def test_generation_is_published_as_image_url():
+    pools = _Pools()
+    update = create_fused_pipeline_agent(pools)(_state(["image_generation", "text_overlay"])).update
+
+    generated, _ = run_pipeline(["image_generation"], None, {"subject": "a cat"})
+    assert image_store.get(update["image_url"]).tobytes() == generated.tobytes()
+    assert update["processed_image_url"] != update["image_url"]
+    assert update["plan_step"] == 2
+    assert "failed_task" not in update
+    assert pools.calls == [["image_generation"], ["text_overlay"]]
+
+
+def test_chains_without_generation_run_in_one_pass():
+    source = image_store.put(run_pipeline(["image_generation"], None, {"subject": "a cat"})[0])
+    pools = _Pools()
+    update = create_fused_pipeline_agent(pools)(
+        _state(["background_removal", "text_overlay"], image_url=source)
+    ).update
+
+    assert pools.calls == [["background_removal", "text_overlay"]]
+    assert "image_url" not in update
+    assert update["processed_image_url"] != source
+
+
+def test_pool_failure_fails_at_first_unfinished_task():
+    command = create_fused_pipeline_agent(_Pools(broken=["image_generation"]))(
+        _state(["image_generation", "text_overlay"])
+    )
+    assert command.goto == "supervisor"
+    assert command.update["failed_task"] == "image_generation"
+    assert command.update["plan_step"] == 1
+    assert "processed_image_url" not in command.update
+
+    update = create_fused_pipeline_agent(_Pools(broken=["text_overlay"]))(
+        _state(["image_generation", "text_overlay"])
+    ).update
+    assert update["failed_task"] == "text_overlay"
+    assert update["plan_step"] == 2
+    assert update["processed_image_url"] == update["image_url"]
+
+
+def test_missing_input_image_is_a_failure():
+    update = create_fused_pipeline_agent(_Pools())(
+        _state(["background_removal", "text_overlay"], image_url="image://" + "0" * 64)
+    ).update
+    assert update["failed_task"] == "background_removal"
+    assert update["plan_step"] == 1
@@ -0,0 +1,93 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+from src import main
+from src.agents import supervisor
+from src.agents.router import KeywordRouter
+from src.benchmarks.checkpoints import history_mismatches
+from src.execution import checkpoints
+from src.execution.checkpoints import create_checkpointer, thread_config
+
+REQUEST = "Generate an image of a cat and add text 'Hello'"
+
+
+class _NoFastPath(KeywordRouter):
+    def plan(self, request):
+        return None
+
+
+class _ScriptedGateway:
+    """Answers step-by-step routing calls from a script, one answer per call."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def invoke(self, model, messages):
+        self.calls += 1
+        return AIMessage(content=self.answers.pop(0))
+
+
+class _Killed(Exception):
+    pass
+
+
+@pytest.fixture
+def counted_workflow(monkeypatch, tmp_path):
+    """The sync graph checkpointing to `tmp_path`, with LLM-routed supervisor calls and
+    node executions counted; text_overlay dies on its first execution."""
+    saver = create_checkpointer(str(tmp_path / "checkpoints.db"))
+    monkeypatch.setattr(checkpoints, "get_checkpointer", lambda: saver)
+    monkeypatch.setattr(supervisor, "get_routing_cache", lambda: None)
+    gateway = _ScriptedGateway(["image_generation", "text_overlay", "__end__"])
+    monkeypatch.setattr(supervisor, "get_gateway", lambda: gateway)
+
+    executions = {"supervisor": 0, "image_generation": 0, "text_overlay": 0}
+
+    def counted(name, agent, die_once=False):
+        def node(state):
+            executions[name] += 1
+            if die_once and executions[name] == 1:
+                raise _Killed(f"{name} killed")
+            return agent(state)
+        return node
+
+    create_supervisor = supervisor.create_supervisor_agent
+    create_image_generation = main.create_image_generation_agent
+    create_text_overlay = main.create_text_overlay_agent
+    monkeypatch.setattr(main, "create_supervisor_agent", lambda: counted(
+        "supervisor", create_supervisor(router=_NoFastPath(), planning=False, fused=False, parallel=False)))
+    monkeypatch.setattr(main, "create_image_generation_agent", lambda pools: counted(
+        "image_generation", create_image_generation(pools)))
+    monkeypatch.setattr(main, "create_text_overlay_agent", lambda pools: counted(
+        "text_overlay", create_text_overlay(pools), die_once=True))
+    monkeypatch.setattr(main, "_workflows", {False: main.create_workflow(False, saver)})
+    return gateway, executions
+
+
+def test_resume_continues_after_the_last_completed_node(counted_workflow):
+    gateway, executions = counted_workflow
+
+    with pytest.raises(_Killed):
+        main.run_workflow(REQUEST, "killed")
+    assert gateway.calls == 2
+    assert executions == {"supervisor": 2, "image_generation": 1, "text_overlay": 1}
+
+    final = main.resume_workflow("killed")
+
+    # Only the work left after the crash ran: text_overlay again, then one supervisor call to end
+    assert gateway.calls == 3
+    assert executions == {"supervisor": 3, "image_generation": 1, "text_overlay": 2}
+    assert final["llm_calls"] == 3
+    assert final["completed_tasks"] == ["image_generation", "text_overlay"]
+    assert final["processed_image_url"] != final["image_url"]
+
+    history = list(main.get_workflow().get_state_history(thread_config("killed")))
+    assert history_mismatches(history) == []
+
+    # A finished thread returns its final state without running anything
+    resumed = main.resume_workflow("killed")
+    assert resumed["messages"] == final["messages"]
+    assert resumed["processed_image_url"] == final["processed_image_url"]
+    assert gateway.calls == 3
+    assert executions["supervisor"] == 3
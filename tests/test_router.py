@@ -0,0 +1,25 @@
+from src.agents.router import KeywordRouter, RouterStats, default_router
+from src.execution.scheduler import Scheduler
+
+REQUEST = "Generate an image of a cat and add text 'Hello'"
+
+
+def test_predict_matches_plan_without_counting():
+    router = KeywordRouter()
+    for request in (REQUEST, "Resize the image", "Create a picture of a dog on a beach background"):
+        assert router.predict(request) == KeywordRouter().plan(request)
+    assert router.stats == RouterStats()
+
+
+def test_plan_counts_fast_path_and_fallbacks():
+    router = KeywordRouter()
+    assert router.plan(REQUEST) == ["image_generation", "text_overlay"]
+    assert router.plan("Resize the image") is None
+    assert router.stats == RouterStats(planned=1, fallbacks=1)
+
+
+def test_scheduler_ticket_leaves_router_stats_alone():
+    before = RouterStats(**vars(default_router.stats))
+    ticket = Scheduler().ticket(REQUEST)
+    assert ticket.predicted == 2
+    assert default_router.stats == before
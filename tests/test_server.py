@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+from src import server
+from src.server import JobService, ServiceApp
+
+
+async def _post(app, body: bytes, tenant: bytes = b"acme"):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/jobs", "headers": [(b"x-tenant", tenant)]}
+    await app(scope, receive, send)
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def _recording_stream(threads):
+    async def stream(request, thread_id):
+        threads.append(thread_id)
+        yield {"event": "start", "request": request, "thread_id": thread_id}
+        yield {"event": "end", "thread_id": thread_id}
+
+    return stream
+
+
+@pytest.mark.parametrize("body", [b"[]", b'"x"', b"1", b'{"thread_id": 3}', b"{"])
+def test_rejects_malformed_submissions(body):
+    app = ServiceApp(JobService(stream=_recording_stream([])))
+    status, response = asyncio.run(_post(app, body))
+    assert status == 400
+    assert "error" in response
+
+
+def test_thread_ids_are_scoped_to_their_tenant(monkeypatch):
+    monkeypatch.setattr(server, "get_checkpointer", lambda: object())
+    threads = []
+
+    async def scenario():
+        service = JobService(stream=_recording_stream(threads))
+        app = ServiceApp(service)
+        _, created = await _post(app, b'{"request": "Generate an image of a cat"}', b"acme")
+        await asyncio.sleep(0.05)
+        job = service.get(created["job_id"])
+        _, resumed = await _post(app, json.dumps({"thread_id": job.thread_id}).encode(), b"other")
+        await asyncio.sleep(0.05)
+        return job, service.get(resumed["job_id"])
+
+    job, other = asyncio.run(scenario())
+
+    assert threads == [f"acme:{job.thread_id}", f"other:{job.thread_id}"]
+    # Clients see the id they can send back, not the scoped one
+    assert [event["thread_id"] for event in job.events] == [job.thread_id, job.thread_id]
+    assert other.thread_id == job.thread_id
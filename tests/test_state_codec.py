@@ -0,0 +1,141 @@
+import ormsgpack
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from PIL import Image
+
+from src.agent_types.codec import (
+    CODEC_VERSION,
+    FIELDS,
+    StateCodecError,
+    decode_messages,
+    decode_state,
+    encode_messages,
+    encode_state,
+)
+from src.agent_types.state import AgentMessage, create_initial_state
+from src.imaging.store import REF_PREFIX, image_store
+
+REF = REF_PREFIX + "ab" * 32
+OTHER_REF = REF_PREFIX + "cd" * 32
+
+
+def _raw(data: bytes) -> list:
+    """The encoded array with extensions left as `ormsgpack.Ext`."""
+    return ormsgpack.unpackb(data, ext_hook=lambda tag, payload: ormsgpack.Ext(tag, payload))
+
+
+def test_round_trips_mixed_messages():
+    messages = [
+        HumanMessage(content="Generate an image of a cat", id="run-1"),
+        {"role": "user", "content": "Add text 'Hello'"},
+        AgentMessage("system", "Image Generation Agent: Generated new image"),
+        AgentMessage("system", "Supervisor: Routing to text_overlay"),
+        AgentMessage("assistant", "Not in the message table"),
+        AIMessage(content="done", additional_kwargs={"refusal": None}),
+    ]
+    decoded = decode_state(encode_state({"messages": messages}))
+
+    assert decoded["messages"] == messages
+    assert [type(message) for message in decoded["messages"]] == [type(message) for message in messages]
+
+
+def test_round_trips_full_state():
+    state = {
+        **create_initial_state({"role": "user", "content": "Generate an image of a cat"}),
+        "next_agent": "text_overlay",
+        "current_task": "image_generation",
+        "image_url": REF,
+        "processed_image_url": OTHER_REF,
+        "task_plan": ["image_generation", "text_overlay"],
+        "plan_step": 1,
+        "completed_tasks": ["image_generation"],
+        "routing_history": ["image_generation"],
+        "llm_cost_usd": 0.0125,
+    }
+    assert decode_state(encode_state(state)) == state
+
+
+def test_missing_fields_stay_missing():
+    partial = {"plan_step": 2, "failed_task": None}
+    decoded = decode_state(encode_state(partial))
+
+    assert decoded == partial
+    assert "messages" not in decoded
+    assert "next_agent" not in decoded
+    assert decode_state(encode_state({})) == {}
+
+
+def test_image_refs_are_extensions_wherever_they_appear():
+    state = {
+        "image_url": REF,
+        "variant_urls": [REF, OTHER_REF],
+        "branch_results": [{"branch": 0, "image_url": OTHER_REF}],
+        "custom_key": {"nested": [REF]},
+    }
+    data = encode_state(state)
+
+    assert REF.encode() not in data and OTHER_REF.encode() not in data
+    raw = ormsgpack.unpackb(data, ext_hook=lambda tag, payload: (tag, payload))
+    image_url = raw[1 + [name for name, _ in FIELDS].index("image_url")]
+    assert image_url == (1, bytes.fromhex("ab" * 32))
+    assert decode_state(data) == state
+
+
+def test_strings_that_only_look_like_refs_are_kept():
+    state = {"image_url": REF_PREFIX + "not-a-hash", "processed_image_url": "https://example.com/a.png"}
+    assert decode_state(encode_state(state)) == state
+
+
+def test_images_are_stored_and_encoded_as_refs():
+    image = Image.new("RGB", (4, 4), "red")
+    decoded = decode_state(encode_state({"processed_image_url": image}))
+
+    ref = decoded["processed_image_url"]
+    assert ref.startswith(REF_PREFIX)
+    assert image_store.get(ref).tobytes() == image.tobytes()
+
+
+def test_unknown_names_and_keys_round_trip():
+    state = {
+        "next_agent": "upscaler",
+        "current_task": "upscale",
+        "failed_task": "upscale",
+        "task_plan": ["image_generation", "upscale", "text_overlay"],
+        "completed_tasks": ["image_generation", "upscale"],
+        "routing_history": ["supervisor", "upscaler"],
+        "messages": [AgentMessage("system", "Supervisor: Routing to upscaler")],
+        "custom_key": {"a": 1},
+    }
+    assert decode_state(encode_state(state)) == state
+
+
+def test_tuples_decode_as_lists():
+    decoded = decode_state(encode_state({"task_plan": ("image_generation", "text_overlay")}))
+    assert decoded["task_plan"] == ["image_generation", "text_overlay"]
+
+
+def test_rejects_other_versions():
+    raw = _raw(encode_state({"plan_step": 1}))
+    assert raw[0] == CODEC_VERSION
+    raw[0] = CODEC_VERSION + 1
+
+    with pytest.raises(StateCodecError, match="Unsupported state codec version"):
+        decode_state(ormsgpack.packb(raw))
+    with pytest.raises(StateCodecError, match="Unsupported state codec version"):
+        decode_messages(ormsgpack.packb([CODEC_VERSION + 1, []]))
+
+
+def test_rejects_malformed_data():
+    raw = _raw(encode_state({"plan_step": 1}))
+
+    with pytest.raises(StateCodecError, match="Expected"):
+        decode_state(ormsgpack.packb(raw[:-1]))
+    with pytest.raises(StateCodecError):
+        decode_state(ormsgpack.packb({"plan_step": 1}))
+    with pytest.raises(StateCodecError):
+        decode_state(b"\xc1")
+
+
+def test_messages_round_trip_on_their_own():
+    messages = [HumanMessage(content="hi"), AgentMessage("system", "Text Overlay Agent: Added text to image")]
+    assert decode_messages(encode_messages(messages)) == messages